@@ -0,0 +1,29 @@
+"""Add token_version column to users table
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Add token_version column (bumped to invalidate issued tokens)
+    op.add_column('users', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+    
+    # Create index on updated_at for incremental token version sync
+    op.create_index('ix_users_updated_at', 'users', ['updated_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_updated_at', table_name='users')
+    op.drop_column('users', 'token_version')
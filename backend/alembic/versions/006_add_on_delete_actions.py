@@ -0,0 +1,45 @@
+"""Add ON DELETE actions to foreign keys
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+# (table, column, referenced table, constraint name, ON DELETE action)
+FOREIGN_KEYS = [
+    ('enrollments', 'student_id', 'students', 'fk_enrollments_student_id', 'CASCADE'),
+    ('enrollments', 'course_id', 'courses', 'fk_enrollments_course_id', 'CASCADE'),
+    ('attendance', 'student_id', 'students', 'fk_attendance_student_id', 'CASCADE'),
+    ('students', 'user_id', 'users', 'fk_students_user_id', 'SET NULL'),
+    ('courses', 'instructor_id', 'users', 'fk_courses_instructor_id', 'SET NULL'),
+]
+
+
+def _drop_existing(table: str, column: str) -> None:
+    # The initial schema left these unnamed, so look up what the database called them
+    for fk in sa.inspect(op.get_bind()).get_foreign_keys(table):
+        if fk['constrained_columns'] == [column] and fk.get('name'):
+            op.drop_constraint(fk['name'], table, type_='foreignkey')
+
+
+def upgrade() -> None:
+    for table, column, referred, name, action in FOREIGN_KEYS:
+        _drop_existing(table, column)
+        op.create_foreign_key(name, table, referred, [column], ['id'], ondelete=action)
+
+
+def downgrade() -> None:
+    for table, column, referred, name, _ in FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referred, [column], ['id'])
@@ -0,0 +1,24 @@
+"""Add index on courses.department
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Per-department course filters and GROUP BY department aggregates
+    op.create_index('ix_courses_department', 'courses', ['department'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_courses_department', table_name='courses')
@@ -0,0 +1,35 @@
+"""Microsecond updated_at on students and courses; add enrollments.updated_at
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+PreciseDateTime = sa.DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql")
+
+
+def upgrade() -> None:
+    # updated_at is compared for If-Match, so it must change on every edit
+    for table in ('students', 'courses'):
+        op.alter_column(table, 'updated_at', type_=PreciseDateTime, existing_type=sa.DateTime(), existing_nullable=True)
+
+    op.add_column('enrollments', sa.Column('updated_at', PreciseDateTime, nullable=True))
+    op.execute("UPDATE enrollments SET updated_at = enrolled_at")
+
+
+def downgrade() -> None:
+    op.drop_column('enrollments', 'updated_at')
+    for table in ('students', 'courses'):
+        op.alter_column(table, 'updated_at', type_=sa.DateTime(), existing_type=PreciseDateTime, existing_nullable=True)
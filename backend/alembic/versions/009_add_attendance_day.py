@@ -0,0 +1,51 @@
+"""Add attendance.day with a unique index on (student_id, day)
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+# Duplicates listed in the error before "..."
+MAX_REPORTED = 20
+
+
+def upgrade() -> None:
+    # Concurrent requests to POST /attendance could mark a student twice on
+    # one day. Which record is right is for an operator to decide, so stop
+    # and list them rather than delete attendance history.
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT student_id, DATE(date) AS day, GROUP_CONCAT(id) AS ids "
+        "FROM attendance GROUP BY student_id, DATE(date) HAVING COUNT(*) > 1 "
+        "ORDER BY student_id, day"
+    )).all()
+    if duplicates:
+        lines = [
+            f"  student {row.student_id} on {row.day}: attendance ids {row.ids}"
+            for row in duplicates[:MAX_REPORTED]
+        ]
+        if len(duplicates) > MAX_REPORTED:
+            lines.append(f"  ... and {len(duplicates) - MAX_REPORTED} more")
+        raise RuntimeError(
+            f"{len(duplicates)} (student, day) pairs have more than one attendance record. "
+            "Delete or merge the extra records, then run the migration again:\n" + "\n".join(lines)
+        )
+
+    # Self check-ins are flushed as batched upserts against this index
+    op.add_column('attendance', sa.Column('day', sa.Date(), sa.Computed('date(date)', persisted=True)))
+    op.create_index('uq_attendance_student_day', 'attendance', ['student_id', 'day'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_attendance_student_day', table_name='attendance')
+    op.drop_column('attendance', 'day')
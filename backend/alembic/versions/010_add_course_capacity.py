@@ -0,0 +1,78 @@
+"""Course capacity and seat counter; enrollment status for waitlists
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+# Conflicting duplicates listed in the error before "..."
+MAX_REPORTED = 20
+
+
+def upgrade() -> None:
+    op.add_column('courses', sa.Column('capacity', sa.Integer(), nullable=True))
+    op.add_column('courses', sa.Column('seats_taken', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('enrollments', sa.Column(
+        'status',
+        sa.Enum('enrolled', 'waitlisted', name='enrollment_status'),
+        nullable=False,
+        server_default='enrolled'
+    ))
+
+    # Merge duplicate enrollments into the first one, keeping the grade
+    # (which only one of them may have); stop if they disagree on it
+    bind = op.get_bind()
+    duplicates = bind.execute(sa.text(
+        "SELECT student_id, course_id, MIN(id) AS first_id, MAX(grade) AS grade, "
+        "COUNT(DISTINCT grade) AS grades, GROUP_CONCAT(id) AS ids "
+        "FROM enrollments GROUP BY student_id, course_id HAVING COUNT(*) > 1"
+    )).all()
+    conflicts = [row for row in duplicates if row.grades > 1]
+    if conflicts:
+        lines = [
+            f"  student {row.student_id} in course {row.course_id}: enrollment ids {row.ids}"
+            for row in conflicts[:MAX_REPORTED]
+        ]
+        if len(conflicts) > MAX_REPORTED:
+            lines.append(f"  ... and {len(conflicts) - MAX_REPORTED} more")
+        raise RuntimeError(
+            f"{len(conflicts)} duplicate enrollments have different grades. "
+            "Delete the wrong records, then run the migration again:\n" + "\n".join(lines)
+        )
+    for row in duplicates:
+        if row.grade is not None:
+            bind.execute(
+                sa.text("UPDATE enrollments SET grade = :grade WHERE id = :id"),
+                {"grade": row.grade, "id": row.first_id}
+            )
+    # The derived table lets MySQL delete from the table it selects from
+    op.execute(
+        "DELETE FROM enrollments WHERE id NOT IN ("
+        "SELECT id FROM (SELECT MIN(id) AS id FROM enrollments GROUP BY student_id, course_id) AS first)"
+    )
+    op.create_index('uq_enrollments_student_course', 'enrollments', ['student_id', 'course_id'], unique=True)
+    op.create_index('ix_enrollments_course_status', 'enrollments', ['course_id', 'status'])
+
+    op.execute(
+        "UPDATE courses SET seats_taken = "
+        "(SELECT COUNT(*) FROM enrollments WHERE enrollments.course_id = courses.id)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_enrollments_course_status', table_name='enrollments')
+    op.drop_index('uq_enrollments_student_course', table_name='enrollments')
+    op.drop_column('enrollments', 'status')
+    op.drop_column('courses', 'seats_taken')
+    op.drop_column('courses', 'capacity')
@@ -0,0 +1,38 @@
+"""Link student profiles to student accounts with the same email
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19
+
+GET /attendance used to find a student's profile by email when it was not
+linked by user_id; it now relies on the link alone, so set it for every
+unlinked profile whose email belongs to a student account without a profile.
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The derived table (DISTINCT keeps it from being merged) lets MySQL
+    # read the table it updates
+    op.execute(
+        "UPDATE students SET user_id = ("
+        "SELECT users.id FROM users WHERE LOWER(users.email) = LOWER(students.email) AND users.role = 'student'"
+        ") "
+        "WHERE user_id IS NULL AND EXISTS ("
+        "SELECT 1 FROM users WHERE LOWER(users.email) = LOWER(students.email) AND users.role = 'student' "
+        "AND users.id NOT IN (SELECT user_id FROM (SELECT DISTINCT user_id FROM students WHERE user_id IS NOT NULL) AS linked)"
+        ")"
+    )
+
+
+def downgrade() -> None:
+    # Links made here cannot be told apart from others; they are kept
+    pass
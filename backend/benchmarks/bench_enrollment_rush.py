@@ -0,0 +1,270 @@
+"""Registration rush: parallel enrollments into one small course
+
+Creates a course with ``--capacity`` seats and ``--requests`` students,
+starts the API with ``serve.py`` and sends one ``POST /enrollments`` per
+student, all released at once from ``--concurrency`` threads. Then drops
+``--drops`` of the enrolled students in parallel, which should hand their
+seats to the waitlist. Run from the backend directory::
+
+    python benchmarks/bench_enrollment_rush.py --requests 1000 --capacity 100
+    python benchmarks/bench_enrollment_rush.py --database-url mysql+pymysql://... --workers 4
+
+Reports throughput and latency, and exits non-zero if the course was ever
+oversubscribed: more enrolled students than seats, a seat counter that
+disagrees with the enrollments, a request that failed, or a seat left
+empty while students were waitlisted.
+
+The default database is a SQLite file, which serializes writes; point
+``--database-url`` at MySQL to see the row-lock contention of a real rush.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from load_test import git_commit, percentile, start_server  # noqa: E402
+
+PASSWORD = "Password@123"
+
+
+def setup(database_url: str, students: int, capacity: int) -> Tuple[int, List[int], str]:
+    """Course, students and an admin login for this run; returns (course id, student ids, admin email)"""
+    import bcrypt
+    from sqlalchemy import create_engine, select
+    from models import Base, User, Student, Course
+
+    run = uuid.uuid4().hex[:8]
+    now = datetime.now(timezone.utc)
+    engine = create_engine(database_url)
+    try:
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            email = f"rush-admin-{run}@example.edu"
+            conn.execute(User.__table__.insert(), [{
+                "email": email,
+                "username": f"rush-admin-{run}",
+                "hashed_password": bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(rounds=4)).decode(),
+                "full_name": "Rush Admin",
+                "role": "admin",
+                "is_active": True,
+                "token_version": 0
+            }])
+            conn.execute(Course.__table__.insert(), [{
+                "course_code": f"RUSH-{run}",
+                "course_name": "Registration Rush",
+                "credits": 3,
+                "department": "Benchmarks",
+                "capacity": capacity,
+                "created_at": now,
+                "updated_at": now
+            }])
+            course_id = conn.execute(select(Course.id).where(Course.course_code == f"RUSH-{run}")).scalar_one()
+            conn.execute(Student.__table__.insert(), [{
+                "full_name": f"Rush Student {i}",
+                "roll_number": f"RUSH{run}{i:05d}",
+                "email": f"rush-{run}-{i}@example.edu",
+                "phone_number": "9876543210",
+                "department": "Benchmarks",
+                "year_of_study": "1",
+                "created_at": now,
+                "updated_at": now
+            } for i in range(students)])
+            student_ids = conn.execute(
+                select(Student.id).where(Student.roll_number.like(f"RUSH{run}%")).order_by(Student.id)
+            ).scalars().all()
+        return course_id, student_ids, email
+    finally:
+        engine.dispose()
+
+
+def course_state(database_url: str, course_id: int) -> dict:
+    from sqlalchemy import create_engine, func, select
+    from models import Course, Enrollment
+
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as conn:
+            counts = dict(conn.execute(
+                select(Enrollment.status, func.count(Enrollment.id))
+                .where(Enrollment.course_id == course_id)
+                .group_by(Enrollment.status)
+            ).all())
+            seats_taken = conn.execute(select(Course.seats_taken).where(Course.id == course_id)).scalar_one()
+        return {
+            "enrolled": counts.get("enrolled", 0),
+            "waitlisted": counts.get("waitlisted", 0),
+            "seats_taken": seats_taken
+        }
+    finally:
+        engine.dispose()
+
+
+def login(port: int, email: str) -> str:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.request("POST", "/auth/login", body=json.dumps({"email": email, "password": PASSWORD}),
+                 headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    body = json.loads(response.read())
+    if response.status != 200:
+        raise RuntimeError(f"Login failed: {body}")
+    return body["access_token"]
+
+
+def burst(port: int, token: str, requests: List[Tuple[str, str, Optional[dict]]], concurrency: int) -> dict:
+    """Send the requests from ``concurrency`` threads released together; returns timings and responses"""
+    if not requests:
+        return {"requests": 0, "responses": []}
+    latencies: List[float] = []
+    responses: List[Tuple[int, Optional[dict]]] = []
+    lock = threading.Lock()
+    pending = list(reversed(requests))
+
+    def worker() -> None:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        barrier.wait()
+        while True:
+            with lock:
+                if not pending:
+                    return
+                method, path, body = pending.pop()
+            started = time.perf_counter()
+            try:
+                conn.request(method, path, body=json.dumps(body) if body is not None else None, headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {token}"
+                })
+                response = conn.getresponse()
+                data = response.read()
+                result = (response.status, json.loads(data) if data else None)
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+                result = (0, None)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed_ms)
+                responses.append(result)
+
+    threads = [threading.Thread(target=worker) for _ in range(min(concurrency, len(requests)))]
+    barrier = threading.Barrier(len(threads) + 1)
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(requests),
+        "seconds": round(elapsed, 3),
+        "req_per_s": round(len(requests) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "mean_ms": round(statistics.mean(latencies), 1),
+        "responses": responses
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Parallel enrollments into one course with limited seats")
+    parser.add_argument("--requests", type=int, default=1000, help="students enrolling at once")
+    parser.add_argument("--capacity", type=int, default=100, help="seats in the course")
+    parser.add_argument("--drops", type=int, default=50, help="enrolled students dropping afterwards")
+    parser.add_argument("--concurrency", type=int, default=1000, help="client threads")
+    parser.add_argument("--workers", type=int, default=1, help="server worker processes")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--database-url", help="defaults to a fresh SQLite file in the temp directory")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if database_url is None:
+        path = Path(tempfile.gettempdir()) / "sms_enrollment_rush.db"
+        if path.exists():
+            os.unlink(path)
+        database_url = f"sqlite:///{path}"
+
+    course_id, student_ids, admin_email = setup(database_url, args.requests, args.capacity)
+    server = start_server(database_url, args.port, args.workers)
+    try:
+        token = login(args.port, admin_email)
+        print(f"{args.requests} students enrolling in a {args.capacity}-seat course "
+              f"from {args.concurrency} threads...")
+        enroll = burst(args.port, token, [
+            ("POST", "/enrollments", {"student_id": student_id, "course_id": course_id})
+            for student_id in student_ids
+        ], args.concurrency)
+        after_enroll = course_state(database_url, course_id)
+
+        seated = [body["id"] for code, body in enroll["responses"] if code == 201 and body["status"] == "enrolled"]
+        print(f"{len(seated[:args.drops])} enrolled students dropping...")
+        drop = burst(args.port, token, [
+            ("DELETE", f"/enrollments/{enrollment_id}", None) for enrollment_id in seated[:args.drops]
+        ], args.concurrency)
+        after_drop = course_state(database_url, course_id)
+    finally:
+        server.terminate()
+        server.wait()
+
+    failures = []
+    enroll_errors = sum(1 for code, _ in enroll["responses"] if code != 201)
+    drop_errors = sum(1 for code, _ in drop["responses"] if code != 204)
+    if enroll_errors or drop_errors:
+        failures.append(f"{enroll_errors} enrollments and {drop_errors} drops failed")
+    expected_seated = min(args.capacity, args.requests)
+    if after_enroll["enrolled"] != expected_seated or after_enroll["seats_taken"] != after_enroll["enrolled"]:
+        failures.append(f"after enrolling: {after_enroll}, expected {expected_seated} enrolled")
+    if after_enroll["enrolled"] + after_enroll["waitlisted"] != args.requests:
+        failures.append(f"after enrolling: {after_enroll}, expected {args.requests} enrollments")
+    expected_after_drop = min(args.capacity, args.requests - drop["requests"])
+    if after_drop["enrolled"] != expected_after_drop or after_drop["seats_taken"] != after_drop["enrolled"]:
+        failures.append(f"after dropping: {after_drop}, expected {expected_after_drop} enrolled")
+
+    for name, result in (("POST /enrollments", enroll), ("DELETE /enrollments/{id}", drop)):
+        if result["requests"]:
+            print(f"  {name:<26} {result['requests']:>5} req  {result['req_per_s']:>8.1f} req/s  "
+                  f"p50 {result['p50_ms']:>7.1f} ms  p99 {result['p99_ms']:>7.1f} ms")
+    print(f"  after enrolling: {after_enroll}")
+    print(f"  after dropping:  {after_drop}")
+
+    if args.output:
+        for result in (enroll, drop):
+            del result["responses"]
+        Path(args.output).write_text(json.dumps({
+            "benchmark": "enrollment_rush",
+            "commit": git_commit(),
+            "database": database_url.split(":", 1)[0],
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "capacity": args.capacity,
+            "enroll": enroll,
+            "drop": drop,
+            "after_enroll": after_enroll,
+            "after_drop": after_drop,
+            "ok": not failures
+        }, indent=2))
+
+    if failures:
+        print("\nFAILED:")
+        for line in failures:
+            print(f"  {line}")
+        return 1
+    print("\nNo oversubscription")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
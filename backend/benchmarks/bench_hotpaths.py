@@ -0,0 +1,210 @@
+"""Microbenchmarks for per-request hot paths
+
+Times token creation and decoding, password verification at the configured
+BCRYPT_ROUNDS, schema validation and response serialization, without a
+server. Attendance listing runs GET /attendance's query against an
+in-memory SQLite database. Run from the backend directory::
+
+    python benchmarks/bench_hotpaths.py --output hotpaths.json
+    python benchmarks/bench_hotpaths.py --compare hotpaths.json --history hotpaths.jsonl
+
+Every benchmark is checked against its budget in ``hotpath_thresholds.json``
+(microseconds per operation; for verify_password, per one of the 2**rounds
+bcrypt iterations, so the budget follows BCRYPT_ROUNDS). ``--compare`` also flags anything more than
+``--threshold`` slower than an earlier run. The exit code is 1 on any failure.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+# Keep the benchmark from creating a .secret_key file
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+THRESHOLDS_FILE = Path(__file__).resolve().parent / "hotpath_thresholds.json"
+# Rows per list benchmark, roughly one page of results
+ROWS = 100
+# Budgets given per unit of work rather than per operation
+BUDGET_UNITS = {"verify_password": lambda: 2 ** _bcrypt_rounds()}
+
+
+def _bcrypt_rounds() -> int:
+    from config import BCRYPT_ROUNDS
+    return BCRYPT_ROUNDS
+
+
+def measure(func: Callable[[], object], min_time: float = 0.2, repeats: int = 5) -> Dict[str, float]:
+    """Microseconds per call: the median and best of several timed loops"""
+    # Calibrate the loop size so each timed loop runs for about min_time
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    per_call = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        per_call.append((time.perf_counter() - started) / number * 1e6)
+    return {"median_us": statistics.median(per_call), "min_us": min(per_call), "loops": number}
+
+
+def build_benchmarks() -> Dict[str, Callable[[], object]]:
+    from pydantic import TypeAdapter
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from config import BCRYPT_ROUNDS
+    from models import Base, Student, Course, Enrollment, Attendance
+    from schemas import StudentCreate, StudentResponse, EnrollmentResponse, AttendanceResponse
+    from utils import create_access_token, decode_token, get_password_hash, verify_password
+    from routers.enrollments import _serialize_enrollment
+    from routers.attendance import _attendance_rows_query
+
+    claims = {"sub": "42", "role": "faculty", "ver": 0}
+    token = create_access_token(claims)
+    hashed = get_password_hash("Password@123")
+    student_payload = {
+        "full_name": "Ananya Sharma",
+        "roll_number": "cs2024001",
+        "email": "ananya.sharma@example.edu",
+        "phone_number": "+91 98765 43210",
+        "department": "Computer Science",
+        "year_of_study": "2nd Year",
+    }
+
+    now = datetime.now(timezone.utc)
+    course = Course(id=1, course_code="CS101", course_name="Data Structures", credits=4, department="Computer Science")
+    students = [
+        Student(id=i, user_id=i, full_name=f"Student {i}", roll_number=f"R{i:08d}", email=f"student{i}@example.edu",
+                phone_number="9876543210", department="Computer Science", year_of_study="2nd Year")
+        for i in range(1, ROWS + 1)
+    ]
+    enrollments = [
+        Enrollment(id=i, student_id=s.id, course_id=course.id, enrolled_at=now, grade="A", status="enrolled", student=s, course=course)
+        for i, s in enumerate(students, 1)
+    ]
+    records = [
+        Attendance(id=i, student_id=s.id, date=now - timedelta(days=i), status="Present", remarks=None, student=s)
+        for i, s in enumerate(students, 1)
+    ]
+    # GET /attendance reads its rows straight from a joined column query
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as setup:
+        setup.add_all(
+            [Student(**{c: getattr(s, c) for c in Student.__table__.columns.keys()}) for s in students]
+            + [Attendance(id=r.id, student_id=r.student_id, date=r.date, status=r.status) for r in records]
+        )
+        setup.commit()
+    db = sessionmaker(bind=engine)()
+    attendance_query = _attendance_rows_query(db).order_by(Attendance.date, Attendance.id).limit(ROWS + 1)
+    attendance_rows = attendance_query.all()
+
+    student_list = TypeAdapter(List[StudentResponse])
+    enrollment_list = TypeAdapter(List[EnrollmentResponse])
+    attendance_list = TypeAdapter(List[AttendanceResponse])
+
+    return {
+        "create_access_token": lambda: create_access_token(claims),
+        "decode_token": lambda: decode_token(token),
+        f"verify_password[rounds={BCRYPT_ROUNDS}]": lambda: verify_password("Password@123", hashed),
+        "student_create_validation": lambda: StudentCreate(**student_payload),
+        f"student_response_serialize[{ROWS}]": lambda: student_list.dump_json(
+            student_list.validate_python(students, from_attributes=True)
+        ),
+        f"enrollment_rows[{ROWS}]": lambda: [_serialize_enrollment(e) for e in enrollments],
+        f"enrollment_response[{ROWS}]": lambda: enrollment_list.dump_json(
+            enrollment_list.validate_python([_serialize_enrollment(e) for e in enrollments])
+        ),
+        f"attendance_query[{ROWS}]": lambda: [row._asdict() for row in attendance_query.all()],
+        f"attendance_rows[{ROWS}]": lambda: [row._asdict() for row in attendance_rows],
+        f"attendance_response[{ROWS}]": lambda: attendance_list.dump_json(
+            attendance_list.validate_python([row._asdict() for row in attendance_rows])
+        ),
+    }
+
+
+def check(results: Dict[str, dict], thresholds: Dict[str, float],
+          baseline: Optional[dict], threshold: float) -> List[str]:
+    """Benchmarks over their budget or slower than the baseline"""
+    failures = []
+    for name, result in results.items():
+        # Budgets are keyed without the [..] parameter suffix
+        key = name.split("[")[0]
+        budget = thresholds.get(key)
+        if budget is not None and key in BUDGET_UNITS:
+            budget *= BUDGET_UNITS[key]()
+        if budget is not None and result["median_us"] > budget:
+            failures.append(f"{name}: {result['median_us']:.1f}us over budget {budget:.1f}us")
+        before = (baseline or {}).get("results", {}).get(name)
+        if before and result["median_us"] > before["median_us"] * (1 + threshold):
+            failures.append(f"{name}: {before['median_us']:.1f}us -> {result['median_us']:.1f}us")
+    return failures
+
+
+def git_commit() -> Optional[str]:
+    proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True)
+    return proc.stdout.strip() or None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmark per-request hot paths")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timed loop")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--history", help="append results as a JSON line to this file")
+    parser.add_argument("--compare", help="baseline JSON result to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    results = {}
+    for name, func in build_benchmarks().items():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = measure(func, min_time=args.min_time)
+        print(f"  {name:40} {results[name]['median_us']:12.1f} us/op  (min {results[name]['min_us']:.1f})")
+
+    run = {
+        "benchmark": "hotpaths",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(run, indent=2))
+    if args.history:
+        with open(args.history, "a") as f:
+            f.write(json.dumps(run) + "\n")
+
+    thresholds = json.loads(THRESHOLDS_FILE.read_text())
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    failures = check(results, thresholds, baseline, args.threshold)
+    if failures:
+        print("\nFailed:")
+        for line in failures:
+            print(f"  {line}")
+        return 1
+    print("\nAll benchmarks within thresholds")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
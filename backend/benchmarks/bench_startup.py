@@ -0,0 +1,81 @@
+"""Cold start benchmark: process spawn to first successful request
+
+Starts the API with uvicorn several times and measures how long it takes
+until ``GET /health`` answers. Run from the backend directory::
+
+    python benchmarks/bench_startup.py --runs 5 --output startup.json
+
+Exits non-zero when the median exceeds the target (300 ms by default).
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def cold_start_ms(timeout: float = 30.0) -> float:
+    """Milliseconds from spawning the server to the first 200 from /health"""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=os.environ.copy()
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"Server exited with code {proc.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - started) * 1000
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"Server did not answer within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure API cold start time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=300.0)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    samples = [cold_start_ms() for _ in range(args.runs)]
+    result = {
+        "benchmark": "cold_start",
+        "schema_mode": os.getenv("STARTUP_SCHEMA_MODE", "create"),
+        "runs": args.runs,
+        "min_ms": min(samples),
+        "median_ms": statistics.median(samples),
+        "max_ms": max(samples),
+        "target_ms": args.target_ms,
+        "samples_ms": samples
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+    return 0 if result["median_ms"] <= args.target_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
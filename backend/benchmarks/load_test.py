@@ -0,0 +1,369 @@
+"""End-to-end load test: seeded database, real server, scenario mixes
+
+Seeds a database with ``database/generate_data.py``, starts the API with
+``serve.py`` and drives it with concurrent virtual users, each repeatedly
+running a scenario picked from the chosen mix. Run from the backend
+directory::
+
+    python benchmarks/load_test.py --mix morning --users 32 --duration 60 --output run.json
+    python benchmarks/load_test.py --mix morning --skip-seed --compare run.json
+
+Reports throughput, latency percentiles and SQL statements per request
+(from the X-DB-Queries header) for every endpoint. With ``--compare`` the
+run is diffed against an earlier JSON result and the exit code is 1 when an
+endpoint regressed by more than ``--threshold``.
+
+The default database is a SQLite file, which serializes writes; point
+``--database-url`` at MySQL for numbers that mean something in production.
+Generated users have a low-cost bcrypt hash, so logins here are cheaper
+than with real accounts.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+REPO_DIR = BACKEND_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+PASSWORD = "Password@123"
+ATTENDANCE_STATUSES = ["Present"] * 17 + ["Absent", "Late", "Excused"]
+
+# Scenario weights per mix
+MIXES = {
+    "login_storm": {"login": 1.0},
+    "morning": {"roll_call": 0.6, "dashboard": 0.3, "login": 0.1},
+    "dashboard": {"dashboard": 1.0},
+    "registrar": {"enrollments": 0.7, "dashboard": 0.3},
+    "mixed": {"login": 0.1, "roll_call": 0.35, "dashboard": 0.35, "enrollments": 0.2},
+}
+
+
+class Recorder:
+    """Thread-safe per-endpoint samples"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.queries: Dict[str, List[int]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.recording = False
+
+    def add(self, endpoint: str, latency_ms: float, ok: bool, queries: Optional[int]) -> None:
+        if not self.recording:
+            return
+        with self.lock:
+            self.latencies[endpoint].append(latency_ms)
+            if queries is not None:
+                self.queries[endpoint].append(queries)
+            if not ok:
+                self.errors[endpoint] += 1
+
+
+class Client:
+    """One keep-alive connection per virtual user"""
+
+    def __init__(self, port: int, recorder: Recorder):
+        self.port = port
+        self.recorder = recorder
+        self.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        self.token: Optional[str] = None
+
+    def request(self, method: str, path: str, endpoint: str, body=None, expect=(200, 201)):
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        payload = json.dumps(body) if body is not None else None
+
+        started = time.perf_counter()
+        try:
+            self.conn.request(method, path, body=payload, headers=headers)
+            response = self.conn.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+            self.recorder.add(endpoint, (time.perf_counter() - started) * 1000, False, None)
+            return None
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        queries = response.getheader("X-DB-Queries")
+        ok = response.status in expect
+        self.recorder.add(endpoint, latency_ms, ok, int(queries) if queries else None)
+        return json.loads(data) if ok and data else None
+
+    def login(self, email: str) -> bool:
+        result = self.request("POST", "/auth/login", "POST /auth/login",
+                              {"email": email, "password": PASSWORD})
+        self.token = result["access_token"] if result else None
+        return self.token is not None
+
+
+class Scenarios:
+    """Requests made by one run of each scenario"""
+
+    def __init__(self, fixtures: dict, rng: random.Random):
+        self.fixtures = fixtures
+        self.rng = rng
+
+    def login(self, client: Client) -> None:
+        """A student signs in and loads their profile"""
+        client.login(self.rng.choice(self.fixtures["student_emails"]))
+        client.request("GET", "/auth/me", "GET /auth/me")
+
+    def roll_call(self, client: Client) -> None:
+        """Faculty marks a handful of students and reviews today's register"""
+        client.login(self.rng.choice(self.fixtures["faculty_emails"]))
+        for student_id in self.rng.sample(self.fixtures["student_ids"], 5):
+            client.request("POST", "/attendance", "POST /attendance", {
+                "student_id": student_id,
+                "status": self.rng.choice(ATTENDANCE_STATUSES)
+            })
+        today = datetime.now(timezone.utc).date().isoformat()
+        client.request("GET", f"/attendance?date={today}", "GET /attendance?date")
+
+    def dashboard(self, client: Client) -> None:
+        """A signed-in user's dashboard polls its widgets"""
+        if client.token is None:
+            client.login(self.rng.choice(self.fixtures["faculty_emails"]))
+        client.request("GET", "/dashboard/stats", "GET /dashboard/stats")
+        client.request("GET", "/attendance/today/stats", "GET /attendance/today/stats")
+
+    def enrollments(self, client: Client) -> None:
+        """Registrar enrolls a student and lists their courses"""
+        client.login(self.rng.choice(self.fixtures["faculty_emails"]))
+        student_id = self.rng.choice(self.fixtures["student_ids"])
+        client.request("POST", "/enrollments", "POST /enrollments", {
+            "student_id": student_id,
+            "course_id": self.rng.choice(self.fixtures["course_ids"])
+        }, expect=(201, 400))  # 400: already enrolled
+        client.request("GET", f"/enrollments/student/{student_id}/courses",
+                       "GET /enrollments/student/{id}/courses")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def seed(database_url: str, args) -> None:
+    print(f"Seeding {args.students} students, {args.years} years of attendance...")
+    subprocess.run([
+        sys.executable, str(REPO_DIR / "database" / "generate_data.py"),
+        "--database-url", database_url,
+        "--students", str(args.students),
+        "--years", str(args.years),
+        "--seed", str(args.seed),
+        "--reset"
+    ], check=True)
+
+
+def load_fixtures(database_url: str, limit: int = 5000) -> dict:
+    """Ids and logins the scenarios pick from"""
+    from sqlalchemy import create_engine, select
+    from models import User, Student, Course
+
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as conn:
+            return {
+                "student_emails": conn.execute(
+                    select(User.email).where(User.role == "student", User.is_active.is_(True)).limit(limit)
+                ).scalars().all(),
+                "faculty_emails": conn.execute(
+                    select(User.email).where(User.role == "faculty", User.is_active.is_(True)).limit(limit)
+                ).scalars().all(),
+                "student_ids": conn.execute(select(Student.id).limit(limit)).scalars().all(),
+                "course_ids": conn.execute(select(Course.id)).scalars().all(),
+            }
+    finally:
+        engine.dispose()
+
+
+def start_server(database_url: str, port: int, workers: int, timeout: float = 60.0) -> subprocess.Popen:
+    env = os.environ.copy()
+    env.update({
+        "DATABASE_URL": database_url,
+        "QUERY_COUNT_HEADER": "true",
+        "STARTUP_SCHEMA_MODE": "skip",
+        "JOB_WORKERS": "0",
+        "LOG_LEVEL": "WARNING",
+    })
+    proc = subprocess.Popen(
+        [sys.executable, "serve.py", "--port", str(port), "--workers", str(workers)],
+        cwd=BACKEND_DIR, env=env
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server exited with code {proc.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError(f"Server did not start within {timeout}s")
+
+
+def run_load(port: int, fixtures: dict, mix: Dict[str, float], args) -> dict:
+    recorder = Recorder()
+    stop = threading.Event()
+    names = list(mix)
+    weights = [mix[name] for name in names]
+
+    def virtual_user(index: int) -> None:
+        rng = random.Random(args.seed * 1000 + index)
+        scenarios = Scenarios(fixtures, rng)
+        client = Client(port, recorder)
+        while not stop.is_set():
+            getattr(scenarios, rng.choices(names, weights)[0])(client)
+
+    threads = [threading.Thread(target=virtual_user, args=(i,), daemon=True) for i in range(args.users)]
+    for thread in threads:
+        thread.start()
+
+    time.sleep(args.warmup)
+    recorder.recording = True
+    started = time.perf_counter()
+    time.sleep(args.duration)
+    recorder.recording = False
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=30)
+
+    endpoints = {}
+    for endpoint, samples in sorted(recorder.latencies.items()):
+        queries = recorder.queries.get(endpoint)
+        endpoints[endpoint] = {
+            "requests": len(samples),
+            "errors": recorder.errors.get(endpoint, 0),
+            "rps": len(samples) / elapsed,
+            "p50_ms": percentile(samples, 50),
+            "p90_ms": percentile(samples, 90),
+            "p99_ms": percentile(samples, 99),
+            "max_ms": max(samples),
+            "mean_ms": statistics.fmean(samples),
+            "queries_per_request": statistics.fmean(queries) if queries else None,
+        }
+    total = sum(e["requests"] for e in endpoints.values())
+    return {
+        "duration_s": elapsed,
+        "requests": total,
+        "errors": sum(e["errors"] for e in endpoints.values()),
+        "rps": total / elapsed,
+        "endpoints": endpoints,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """Endpoints whose latency, throughput or query count regressed"""
+    regressions = []
+    for endpoint, now in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(endpoint)
+        if not before:
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            if now[key] > before[key] * (1 + threshold):
+                regressions.append(f"{endpoint}: {key} {before[key]:.1f} -> {now[key]:.1f}")
+        if now["rps"] < before["rps"] * (1 - threshold):
+            regressions.append(f"{endpoint}: rps {before['rps']:.1f} -> {now['rps']:.1f}")
+        if (now["queries_per_request"] or 0) > (before["queries_per_request"] or 0) + 0.01:
+            regressions.append(
+                f"{endpoint}: queries {before['queries_per_request']:.2f} -> {now['queries_per_request']:.2f}"
+            )
+    return regressions
+
+
+def print_report(result: dict) -> None:
+    print(f"\n{result['requests']} requests in {result['duration_s']:.1f}s "
+          f"({result['rps']:.1f} req/s, {result['errors']} errors)\n")
+    print(f"  {'endpoint':40} {'req/s':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'queries':>8} {'errors':>7}")
+    for endpoint, e in result["endpoints"].items():
+        queries = f"{e['queries_per_request']:.1f}" if e["queries_per_request"] is not None else "-"
+        print(f"  {endpoint:40} {e['rps']:8.1f} {e['p50_ms']:8.1f} {e['p90_ms']:8.1f} "
+              f"{e['p99_ms']:8.1f} {queries:>8} {e['errors']:7d}")
+
+
+def git_commit() -> Optional[str]:
+    proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True)
+    return proc.stdout.strip() or None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test the API with realistic scenario mixes")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed")
+    parser.add_argument("--users", type=int, default=16, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds before the run")
+    parser.add_argument("--workers", type=int, default=1, help="server worker processes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--database-url", help="defaults to a SQLite file in the temp directory")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--years", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the already seeded database")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON result to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{Path(tempfile.gettempdir()) / 'sms_loadtest.db'}"
+    if not args.skip_seed:
+        seed(database_url, args)
+    fixtures = load_fixtures(database_url)
+
+    server = start_server(database_url, args.port, args.workers)
+    try:
+        print(f"Running mix '{args.mix}' with {args.users} users for {args.duration}s...")
+        result = run_load(args.port, fixtures, MIXES[args.mix], args)
+    finally:
+        server.terminate()
+        server.wait()
+
+    result.update({
+        "benchmark": "load_test",
+        "commit": git_commit(),
+        "mix": args.mix,
+        "users": args.users,
+        "workers": args.workers,
+        "database": database_url.split(":", 1)[0],
+        "students": args.students,
+    })
+    print_report(result)
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if (baseline.get("mix"), baseline.get("users")) != (args.mix, args.users):
+            print(f"\nWarning: baseline ran mix '{baseline.get('mix')}' with {baseline.get('users')} users")
+        regressions = compare(result, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions vs {baseline.get('commit') or args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions vs {baseline.get('commit') or args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,7 @@
 
 import os
 import secrets
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -19,8 +20,13 @@ DATABASE_URL = os.getenv(
 SECRET_KEY_FILE = Path(__file__).parent / '.secret_key'
 
 
+@lru_cache(maxsize=None)
 def load_secret_key() -> str:
-    """Load secret key from environment, file, or generate new one"""
+    """Load secret key from environment, file, or generate new one
+    
+    Cached, and only called on first use, so importing this module does no
+    file I/O.
+    """
     # First, check environment variable
     env_key = os.getenv("SECRET_KEY")
     if env_key and env_key.strip():
@@ -40,10 +46,31 @@ def load_secret_key() -> str:
     return secret_key
 
 
-SECRET_KEY = load_secret_key()
+def __getattr__(name: str):
+    # SECRET_KEY is resolved lazily; see load_secret_key
+    if name == "SECRET_KEY":
+        return load_secret_key()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+# bcrypt work factor for new password hashes; each +1 doubles hashing and login time
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Token Revocation Configuration
+# Revoked token ids are kept in memory behind a Bloom filter sized for this
+# many entries; other workers' revocations are picked up every SYNC seconds.
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+REVOCATION_SYNC_SECONDS = int(os.getenv("REVOCATION_SYNC_SECONDS", "5"))
+
+# Token Version Configuration
+# Users whose token_version changed are re-read every SYNC seconds; the whole
+# in-memory map is dropped every FULL_SYNC seconds (catches deleted users).
+TOKEN_VERSION_SYNC_SECONDS = int(os.getenv("TOKEN_VERSION_SYNC_SECONDS", "5"))
+TOKEN_VERSION_FULL_SYNC_SECONDS = int(os.getenv("TOKEN_VERSION_FULL_SYNC_SECONDS", "300"))
 
 # CORS Configuration
 # In production, specify your frontend domain instead of "*"
@@ -56,6 +83,132 @@ ALLOWED_ORIGINS = [origin.strip() for origin in _origins.split(",") if origin.st
 # Server Configuration
 SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
 SERVER_PORT = int(os.getenv("SERVER_PORT", "8005"))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))
+SERVER_LOOP = os.getenv("SERVER_LOOP", "auto")  # auto uses uvloop when installed
+SERVER_HTTP = os.getenv("SERVER_HTTP", "auto")  # auto uses httptools when installed
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+SERVER_KEEPALIVE_SECONDS = int(os.getenv("SERVER_KEEPALIVE_SECONDS", "5"))
+# Time in-flight requests get to finish after SIGTERM
+SERVER_GRACEFUL_TIMEOUT_SECONDS = int(os.getenv("SERVER_GRACEFUL_TIMEOUT_SECONDS", "30"))
+
+# Database Pool Configuration
+# Each server worker gets an equal share of the database's max_connections,
+# minus connections reserved for job workers, migrations and admin sessions.
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "151"))
+DB_RESERVED_CONNECTIONS = int(os.getenv("DB_RESERVED_CONNECTIONS", "10"))
+DB_POOL_SIZE = max(1, (DB_MAX_CONNECTIONS - DB_RESERVED_CONNECTIONS) // max(1, SERVER_WORKERS))
+DB_POOL_TIMEOUT_SECONDS = int(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "3600"))
+
+# Background Job Configuration
+# JOB_WORKERS > 0 starts a worker pool inside each app process; otherwise run
+# the pool separately with `python -m jobs --workers N`.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "0"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1.0"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF_SECONDS = int(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "10"))
+JOB_LOCK_TIMEOUT_SECONDS = int(os.getenv("JOB_LOCK_TIMEOUT_SECONDS", "600"))
+# Per job type concurrency limits, e.g. "export_students=2,send_email=4"
+_job_concurrency = os.getenv("JOB_CONCURRENCY", "")
+JOB_CONCURRENCY = {
+    name.strip(): int(limit)
+    for name, _, limit in (item.partition("=") for item in _job_concurrency.split(","))
+    if name.strip() and limit.strip()
+}
+EXPORT_DIR = Path(os.getenv("EXPORT_DIR") or Path(__file__).parent / "exports")
+
+# Email Configuration (leave SMTP_HOST empty to only log outgoing email)
+SMTP_HOST = os.getenv("SMTP_HOST", "")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME", "")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
+SMTP_FROM = os.getenv("SMTP_FROM", "no-reply@example.com")
+PASSWORD_RESET_URL = os.getenv("PASSWORD_RESET_URL", "http://localhost:3000/reset-password")
+
+# Startup Configuration
+# create: run create_all on startup (development default)
+# verify: check the database is at the Alembic head revision
+# skip:   no schema work at all (fastest; use when migrations run at deploy)
+STARTUP_SCHEMA_MODE = os.getenv("STARTUP_SCHEMA_MODE", "create").lower()
+
+# Compression Configuration
+# Responses smaller than COMPRESSION_MIN_SIZE bytes or of other content types
+# are sent uncompressed; brotli is used when the brotli package is installed
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_CONTENT_TYPES = os.getenv(
+    "COMPRESSION_CONTENT_TYPES",
+    "application/json,text/html,text/css,text/javascript,application/javascript,text/plain,image/svg+xml"
+).split(",")
+
+# Stats Configuration
+# GET /stats/* results are cached this long; writes in the same worker clear
+# the cache immediately, other workers pick changes up on expiry (0 disables)
+STATS_CACHE_SECONDS = int(os.getenv("STATS_CACHE_SECONDS", "60"))
+
+# Request Coalescing Configuration
+# Concurrent identical GETs of the hot read endpoints (dashboard stats, today's
+# attendance stats, course list) share one computation per worker
+REQUEST_COALESCING = os.getenv("REQUEST_COALESCING", "true").lower() == "true"
+# Longest a request waits for the shared computation before running its own
+REQUEST_COALESCING_WAIT_SECONDS = float(os.getenv("REQUEST_COALESCING_WAIT_SECONDS", "10"))
+
+# Idempotency Configuration
+# POSTs under these path prefixes honour an Idempotency-Key header; responses
+# are kept per worker for IDEMPOTENCY_TTL_SECONDS (at most IDEMPOTENCY_MAX_ENTRIES)
+IDEMPOTENCY_PATHS = os.getenv("IDEMPOTENCY_PATHS", "/attendance,/enrollments,/students,/courses").split(",")
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+
+# Events Configuration (GET /events Server-Sent Events stream)
+# Per worker: queued events per subscriber before it is told to resync, and
+# the number of open streams
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_MAX_SUBSCRIBERS = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "5000"))
+EVENTS_MAX_CHANNELS = int(os.getenv("EVENTS_MAX_CHANNELS", "20"))
+EVENTS_KEEPALIVE_SECONDS = int(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+
+# Grades Configuration
+# Grade points used for GPAs; bulk grade imports only accept these grades
+_grade_points = os.getenv("GRADE_POINTS", "A+=4.0,A=4.0,B+=3.3,B=3.0,C+=2.3,C=2.0,D=1.0,F=0.0")
+GRADE_POINTS = {
+    grade.strip(): float(points)
+    for grade, _, points in (item.partition("=") for item in _grade_points.split(","))
+    if grade.strip() and points.strip()
+}
+GRADE_IMPORT_MAX_ROWS = int(os.getenv("GRADE_IMPORT_MAX_ROWS", "5000"))
+
+# Check-in Configuration (student self check-in, POST /attendance/checkin)
+# Check-ins are buffered per worker and written in batches every
+# CHECKIN_FLUSH_INTERVAL_MS or CHECKIN_FLUSH_ROWS rows; beyond CHECKIN_BUFFER_MAX
+# pending check-ins the endpoint answers 503. Buffered check-ins are also
+# appended to a log in CHECKIN_LOG_DIR and replayed after a crash.
+CHECKIN_BUFFER_MAX = int(os.getenv("CHECKIN_BUFFER_MAX", "50000"))
+CHECKIN_FLUSH_INTERVAL_MS = int(os.getenv("CHECKIN_FLUSH_INTERVAL_MS", "500"))
+CHECKIN_FLUSH_ROWS = int(os.getenv("CHECKIN_FLUSH_ROWS", "1000"))
+CHECKIN_LOG_DIR = Path(os.getenv("CHECKIN_LOG_DIR") or Path(__file__).parent / "checkin_log")
+# fsync the log on every check-in (survives power loss, not just process crashes)
+CHECKIN_LOG_FSYNC = os.getenv("CHECKIN_LOG_FSYNC", "false").lower() == "true"
+# Lifetime of the codes staff display for students to check in with
+CHECKIN_CODE_MINUTES = int(os.getenv("CHECKIN_CODE_MINUTES", "15"))
+
+# Frontend Configuration
+# Directory of the built frontend (frontend/dist) to serve from the API;
+# leave empty when the frontend is served separately
+FRONTEND_DIST_DIR = os.getenv("FRONTEND_DIST_DIR", "")
 
 # Logging Configuration
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# json (one object per line) or text
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Records are written by a background thread; beyond LOG_QUEUE_SIZE waiting
+# records new ones are dropped (and counted) instead of blocking requests
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# A repeated warning (same message template) is logged at most LOG_SAMPLE_BURST
+# times per LOG_SAMPLE_WINDOW_SECONDS; the rest are counted (0 disables sampling)
+LOG_SAMPLE_BURST = int(os.getenv("LOG_SAMPLE_BURST", "10"))
+LOG_SAMPLE_WINDOW_SECONDS = float(os.getenv("LOG_SAMPLE_WINDOW_SECONDS", "60"))
+# Adds an X-DB-Queries header (SQL statements per request); for benchmarks only
+QUERY_COUNT_HEADER = os.getenv("QUERY_COUNT_HEADER", "false").lower() == "true"
@@ -0,0 +1,97 @@
+"""Background jobs
+
+Work that should not hold an HTTP worker (emails, exports, bulk operations)
+is stored as a row in the ``jobs`` table and executed by a worker pool,
+either inside the app (``JOB_WORKERS``) or as a separate process::
+
+    python -m jobs --workers 4
+
+Handlers are registered with the ``job_handler`` decorator and receive a
+``JobContext`` plus the keyword arguments given to ``enqueue``.
+"""
+
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from models import Job, SessionLocal
+from config import JOB_MAX_ATTEMPTS, JOB_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+
+class JobType:
+    """A registered job handler and its limits"""
+
+    def __init__(self, name: str, handler: Callable, concurrency: Optional[int], max_attempts: int):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+
+
+# Registered job types by name
+registry: Dict[str, JobType] = {}
+
+
+def job_handler(name: str, concurrency: Optional[int] = None, max_attempts: int = JOB_MAX_ATTEMPTS):
+    """Register a function as the handler for a job type
+
+    ``concurrency`` caps how many jobs of this type run at once across all
+    workers; it can be overridden with the JOB_CONCURRENCY setting.
+    """
+    def decorator(func: Callable) -> Callable:
+        registry[name] = JobType(name, func, JOB_CONCURRENCY.get(name, concurrency), max_attempts)
+        return func
+    return decorator
+
+
+def concurrency_limits() -> Dict[str, int]:
+    """Concurrency limit per job type (types without a limit are omitted)"""
+    return {name: jt.concurrency for name, jt in registry.items() if jt.concurrency is not None}
+
+
+def enqueue(db: Session, job_type: str, created_by: Optional[int] = None, **payload) -> int:
+    """Queue a job and return its id"""
+    if job_type not in registry:
+        raise ValueError(f"Unknown job type: {job_type}")
+
+    job = Job(
+        job_type=job_type,
+        payload=json.dumps(payload),
+        max_attempts=registry[job_type].max_attempts,
+        created_by=created_by
+    )
+    db.add(job)
+    db.flush()
+    job_id = job.id
+    db.commit()
+    return job_id
+
+
+class JobContext:
+    """Handle passed to job handlers for reporting progress"""
+
+    def __init__(self, job_id: int, attempt: int):
+        self.job_id = job_id
+        self.attempt = attempt
+
+    def set_progress(self, progress: int, message: Optional[str] = None) -> None:
+        """Record progress (0-100); also refreshes the job's lock"""
+        db = SessionLocal()
+        try:
+            db.query(Job).filter(Job.id == self.job_id).update({
+                "progress": max(0, min(100, int(progress))),
+                "message": message[:200] if message else None,
+                "locked_at": datetime.now(timezone.utc)
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+
+# Register built-in handlers
+from . import tasks  # noqa: E402,F401
@@ -0,0 +1,30 @@
+"""Run the job worker pool: python -m jobs --workers N"""
+
+import argparse
+import signal
+
+from utils.logs import configure_logging
+from .worker import JobPool
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument("--workers", type=int, default=2, help="number of worker processes")
+    args = parser.parse_args()
+
+    configure_logging()
+
+    pool = JobPool(args.workers)
+    pool.start()
+
+    # SIGTERM/SIGINT: stop claiming new jobs and let running ones finish
+    def shutdown(signum, frame):
+        pool.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    pool.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Built-in job handlers"""
+
+import csv
+import logging
+from typing import Optional
+
+from models import Student, User, SessionLocal
+from config import (
+    EXPORT_DIR,
+    PASSWORD_RESET_URL,
+    SMTP_HOST,
+    SMTP_PORT,
+    SMTP_USERNAME,
+    SMTP_PASSWORD,
+    SMTP_FROM
+)
+from utils import create_access_token
+from . import JobContext, job_handler
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = 1000
+
+
+def _send(to: str, subject: str, body: str) -> dict:
+    """Send a plain-text email through the configured SMTP server"""
+    if not SMTP_HOST:
+        logger.info("SMTP_HOST not configured; email to %s not sent: %s", to, subject)
+        return {"sent": False}
+
+    # Imported here so app processes that only enqueue jobs do not load them
+    import smtplib
+    from email.message import EmailMessage
+
+    message = EmailMessage()
+    message["From"] = SMTP_FROM
+    message["To"] = to
+    message["Subject"] = subject
+    message.set_content(body)
+
+    with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30) as smtp:
+        smtp.starttls()
+        if SMTP_USERNAME:
+            smtp.login(SMTP_USERNAME, SMTP_PASSWORD)
+        smtp.send_message(message)
+    return {"sent": True}
+
+
+@job_handler("send_email", concurrency=4, max_attempts=5)
+def send_email(ctx: JobContext, to: str, subject: str, body: str) -> dict:
+    """Send a plain-text email through the configured SMTP server"""
+    return _send(to, subject, body)
+
+
+@job_handler("send_password_reset", concurrency=4, max_attempts=5)
+def send_password_reset(ctx: JobContext, user_id: int) -> dict:
+    """Email a user a password reset link
+
+    The reset token is created here rather than passed in, so it is never
+    stored in the job's payload.
+    """
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            return {"sent": False}
+        to = user.email
+        reset_token = create_access_token(
+            data={"sub": str(user.id), "ver": user.token_version, "type": "password_reset"},
+        )
+    finally:
+        db.close()
+
+    return _send(
+        to,
+        "Password reset",
+        f"Use this link to reset your password:\n\n{PASSWORD_RESET_URL}?token={reset_token}\n"
+    )
+
+
+@job_handler("export_students", concurrency=2)
+def export_students(ctx: JobContext, department: Optional[str] = None) -> dict:
+    """Write students (optionally one department) to a CSV file"""
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    path = EXPORT_DIR / f"students-{ctx.job_id}.csv"
+    columns = ["id", "roll_number", "full_name", "email", "phone_number", "department", "year_of_study"]
+
+    db = SessionLocal()
+    try:
+        query = db.query(*(getattr(Student, name) for name in columns))
+        if department:
+            query = query.filter(Student.department == department)
+        total = query.count()
+
+        # Keyset batches; the read transaction is ended before each progress
+        # update so the export never holds a long-running snapshot open
+        written = 0
+        last_id = 0
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            while True:
+                rows = query.filter(Student.id > last_id).order_by(Student.id).limit(EXPORT_BATCH_SIZE).all()
+                db.rollback()
+                if not rows:
+                    break
+                writer.writerows(rows)
+                written += len(rows)
+                last_id = rows[-1][0]
+                ctx.set_progress(written * 100 // max(total, 1), f"{written} of {total} students")
+    finally:
+        db.close()
+
+    return {"file": path.name, "rows": written}
@@ -0,0 +1,213 @@
+"""Job worker processes
+
+Each worker process polls the ``jobs`` table, claims one due job at a time
+with a conditional UPDATE (so two workers never run the same job), runs its
+handler and records the outcome. Failed jobs are retried with exponential
+backoff until ``max_attempts`` is reached.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import Job, SessionLocal, engine
+from config import (
+    JOB_POLL_INTERVAL_SECONDS,
+    JOB_RETRY_BACKOFF_SECONDS,
+    JOB_LOCK_TIMEOUT_SECONDS
+)
+from . import JobContext, registry, concurrency_limits
+
+logger = logging.getLogger(__name__)
+
+# Number of due jobs considered per claim attempt
+CLAIM_BATCH = 10
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _running_count(db: Session, job_type: str) -> int:
+    return db.query(func.count(Job.id)).filter(Job.job_type == job_type, Job.status == "running").scalar()
+
+
+def claim_next(db: Session, worker_id: str) -> Optional[Job]:
+    """Claim the next due job whose type is below its concurrency limit"""
+    limits = concurrency_limits()
+    running = dict(
+        db.query(Job.job_type, func.count(Job.id))
+        .filter(Job.status == "running")
+        .group_by(Job.job_type)
+        .all()
+    )
+    saturated = [name for name, limit in limits.items() if running.get(name, 0) >= limit]
+
+    query = db.query(Job.id, Job.job_type).filter(Job.status == "queued", Job.run_after <= _utcnow())
+    if saturated:
+        query = query.filter(Job.job_type.notin_(saturated))
+    candidates = query.order_by(Job.run_after, Job.id).limit(CLAIM_BATCH).all()
+
+    for job_id, job_type in candidates:
+        claimed = db.query(Job).filter(Job.id == job_id, Job.status == "queued").update({
+            "status": "running",
+            "locked_by": worker_id,
+            "locked_at": _utcnow(),
+            "attempts": Job.attempts + 1
+        }, synchronize_session=False)
+        db.commit()
+        if not claimed:
+            continue  # Another worker got it first
+
+        limit = limits.get(job_type)
+        if limit is not None and _running_count(db, job_type) > limit:
+            # Lost the race for the last slot of this type; put the job back
+            db.query(Job).filter(Job.id == job_id, Job.locked_by == worker_id).update({
+                "status": "queued",
+                "locked_by": None,
+                "locked_at": None,
+                "attempts": Job.attempts - 1
+            }, synchronize_session=False)
+            db.commit()
+            continue
+
+        return db.query(Job).filter(Job.id == job_id).first()
+    return None
+
+
+def execute(db: Session, job: Job) -> None:
+    """Run a claimed job and record success, retry or failure"""
+    job_type = registry.get(job.job_type)
+    try:
+        if job_type is None:
+            raise LookupError(f"No handler registered for job type {job.job_type!r}")
+        payload = json.loads(job.payload) if job.payload else {}
+        result = job_type.handler(JobContext(job.id, job.attempts), **payload)
+    except Exception:
+        error = traceback.format_exc(limit=5)
+        logger.exception("Job %s (%s) failed on attempt %s", job.id, job.job_type, job.attempts)
+        if job.attempts < job.max_attempts:
+            delay = JOB_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+            job.status = "queued"
+            job.run_after = _utcnow() + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+        else:
+            job.status = "failed"
+            job.finished_at = _utcnow()
+        job.error = error
+        job.locked_by = None
+        job.locked_at = None
+        db.commit()
+        return
+
+    job.status = "succeeded"
+    job.progress = 100
+    job.result = json.dumps(result) if result is not None else None
+    job.error = None
+    job.locked_by = None
+    job.locked_at = None
+    job.finished_at = _utcnow()
+    db.commit()
+
+
+def recover_stale(db: Session) -> None:
+    """Requeue (or fail) running jobs whose worker stopped reporting"""
+    cutoff = _utcnow() - timedelta(seconds=JOB_LOCK_TIMEOUT_SECONDS)
+    stale = db.query(Job).filter(Job.status == "running", Job.locked_at < cutoff)
+    stale.filter(Job.attempts >= Job.max_attempts).update({
+        "status": "failed",
+        "error": "Worker lock expired",
+        "locked_by": None,
+        "finished_at": _utcnow()
+    }, synchronize_session=False)
+    stale.filter(Job.attempts < Job.max_attempts).update({
+        "status": "queued",
+        "locked_by": None,
+        "locked_at": None
+    }, synchronize_session=False)
+    db.commit()
+
+
+def run_worker(stop_event, worker_id: str) -> None:
+    """Worker process main loop"""
+    # The parent coordinates shutdown through stop_event; drop any signal
+    # handlers inherited from it (e.g. the app server's)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # Connections inherited from the parent process must not be reused
+    engine.dispose(close=False)
+    logger.info("Job worker %s started", worker_id)
+
+    recovered_at = 0.0
+    while not stop_event.is_set():
+        db = SessionLocal()
+        try:
+            if time.monotonic() - recovered_at > JOB_LOCK_TIMEOUT_SECONDS / 10:
+                recover_stale(db)
+                recovered_at = time.monotonic()
+
+            job = claim_next(db, worker_id)
+            if job is None:
+                stop_event.wait(JOB_POLL_INTERVAL_SECONDS)
+                continue
+            execute(db, job)
+        except Exception:
+            db.rollback()
+            logger.exception("Job worker %s error", worker_id)
+            stop_event.wait(JOB_POLL_INTERVAL_SECONDS)
+        finally:
+            db.close()
+
+    logger.info("Job worker %s stopped", worker_id)
+
+
+class JobPool:
+    """A fixed number of job worker processes"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        # fork keeps the parent's sys.path and imports; spawn is the fallback
+        method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        self._context = multiprocessing.get_context(method)
+        self._stop_event = self._context.Event()
+        self._processes: List[multiprocessing.Process] = []
+
+    def start(self) -> None:
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        for i in range(self.workers):
+            process = self._context.Process(
+                target=run_worker,
+                args=(self._stop_event, f"{prefix}:{i}"),
+                name=f"job-worker-{i}",
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+        logger.info("Started %d job workers", self.workers)
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Let workers finish their current job, then terminate stragglers"""
+        self._stop_event.set()
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning("Terminating job worker %s", process.name)
+                process.terminate()
+                process.join()
+        self._processes = []
+
+    def join(self) -> None:
+        for process in self._processes:
+            process.join()
+
@@ -12,12 +12,21 @@ from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
-from models import create_tables
+from models import SessionLocal, engine, create_tables, verify_schema
 from config import (
     ALLOWED_ORIGINS,
-    LOG_LEVEL,
-    SERVER_HOST,
-    SERVER_PORT
+    COMPRESSION_ENABLED,
+    COMPRESSION_MIN_SIZE,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_BROTLI_QUALITY,
+    COMPRESSION_CONTENT_TYPES,
+    FRONTEND_DIST_DIR,
+    IDEMPOTENCY_PATHS,
+    IDEMPOTENCY_TTL_SECONDS,
+    IDEMPOTENCY_MAX_ENTRIES,
+    JOB_WORKERS,
+    QUERY_COUNT_HEADER,
+    STARTUP_SCHEMA_MODE
 )
 from routers import (
     auth_router,
@@ -25,14 +34,18 @@ from routers import (
     courses_router,
     attendance_router,
     admin_router,
-    enrollments_router
+    enrollments_router,
+    jobs_router,
+    stats_router,
+    events_router,
+    me_router
 )
+from utils.checkin_buffer import checkin_buffer
+from utils.logs import RequestIdMiddleware, configure_logging
+from utils.revocation import revocation_store
 
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL.upper(), logging.INFO),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging (written from a background thread, see utils/logs.py)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Rate limiter setup
@@ -44,14 +57,37 @@ limiter = Limiter(key_func=get_remote_address)
 async def lifespan(app: FastAPI):
     """Handle startup and shutdown events"""
     # Startup
-    logger.info("Creating database tables...")
-    create_tables()
-    logger.info("Database tables created successfully")
+    if STARTUP_SCHEMA_MODE == "create":
+        logger.info("Creating database tables...")
+        create_tables()
+        logger.info("Database tables created successfully")
+    elif STARTUP_SCHEMA_MODE == "verify":
+        verify_schema()
+        logger.info("Database schema is up to date")
+    
+    db = SessionLocal()
+    try:
+        revocation_store.load(db)
+    finally:
+        db.close()
+    
+    job_pool = None
+    if JOB_WORKERS > 0:
+        from jobs.worker import JobPool
+        job_pool = JobPool(JOB_WORKERS)
+        job_pool.start()
+    
+    checkin_buffer.start()
     
     yield
     
     # Shutdown
     logger.info("Shutting down...")
+    # Buffered check-ins are written before the connections are closed
+    checkin_buffer.stop()
+    if job_pool is not None:
+        job_pool.stop()
+    engine.dispose()
 
 
 # Create FastAPI app
@@ -68,6 +104,15 @@ app = FastAPI(
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+# Innermost, so replayed responses still get CORS headers and compression
+if any(path.strip() for path in IDEMPOTENCY_PATHS):
+    from utils.idempotency import IdempotencyMiddleware, IdempotencyStore
+    app.add_middleware(
+        IdempotencyMiddleware,
+        store=IdempotencyStore(IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_MAX_ENTRIES),
+        paths=IDEMPOTENCY_PATHS
+    )
+
 # Add CORS middleware with configured origins
 app.add_middleware(
     CORSMiddleware,
@@ -75,17 +120,40 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Idempotent-Replayed", "ETag", "X-Request-ID"],
 )
 
+if QUERY_COUNT_HEADER:
+    from utils import query_stats
+    query_stats.install(engine)
+    app.add_middleware(query_stats.QueryCountMiddleware)
+
+if COMPRESSION_ENABLED:
+    from utils.compression import CompressionMiddleware
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=COMPRESSION_MIN_SIZE,
+        content_types=COMPRESSION_CONTENT_TYPES,
+        gzip_level=COMPRESSION_GZIP_LEVEL,
+        brotli_quality=COMPRESSION_BROTLI_QUALITY
+    )
+
+# Outermost, so everything logged for a request carries its id
+app.add_middleware(RequestIdMiddleware)
+
 
 # ============== Root Endpoints ==============
 
-@app.get("/")
 async def root():
     """API root endpoint"""
     return {"message": "Student Management System API", "version": "1.0.0"}
 
 
+# When the API serves the frontend, "/" is its index.html instead
+if not FRONTEND_DIST_DIR:
+    app.add_api_route("/", root, methods=["GET"])
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -98,14 +166,20 @@ app.include_router(courses_router)
 app.include_router(attendance_router)
 app.include_router(admin_router)
 app.include_router(enrollments_router)
+app.include_router(jobs_router)
+app.include_router(stats_router)
+app.include_router(events_router)
+app.include_router(me_router)
+
+if FRONTEND_DIST_DIR:
+    from utils.compression import PrecompressedStaticFiles
+    # Mounted last so API routes take precedence
+    app.mount("/", PrecompressedStaticFiles(directory=FRONTEND_DIST_DIR, html=True), name="frontend")
 
 
 # ============== Main Entry Point ==============
 
 if __name__ == "__main__":
-    import uvicorn
-    
-    logger.info(f"Starting server on {SERVER_HOST}:{SERVER_PORT}")
-    
-    # Run the server
-    uvicorn.run(app, host=SERVER_HOST, port=SERVER_PORT)
+    # See serve.py for the server options
+    from serve import main
+    main()
@@ -1,13 +1,39 @@
-from sqlalchemy import Column, Integer, String, Boolean, Enum, create_engine, ForeignKey, DateTime, Index
+from sqlalchemy import Column, Integer, String, Text, Boolean, Enum, create_engine, event, ForeignKey, Date, DateTime, Index, Computed, text
+from sqlalchemy.dialects import mysql
+from sqlalchemy.exc import OperationalError, ProgrammingError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship, backref
 from datetime import datetime, timezone
 import enum
+from pathlib import Path
 
-from config import DATABASE_URL, LOG_LEVEL
+from config import (
+    DATABASE_URL,
+    LOG_LEVEL,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT_SECONDS,
+    DB_POOL_RECYCLE_SECONDS
+)
+
+# Pool sized so that all server workers together stay within the database's
+# max_connections (SQLite uses its own pooling and ignores these)
+_pool_options = {} if DATABASE_URL.startswith("sqlite") else {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": 0,
+    "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+    "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+}
 
 # Create engine (disable echo in production)
-engine = create_engine(DATABASE_URL, echo=(LOG_LEVEL == "DEBUG"))
+engine = create_engine(DATABASE_URL, echo=(LOG_LEVEL == "DEBUG"), **_pool_options)
+
+if DATABASE_URL.startswith("sqlite"):
+    # SQLite only enforces foreign keys (and ON DELETE actions) when asked to
+    @event.listens_for(engine, "connect")
+    def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -15,6 +41,16 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Create Base class
 Base = declarative_base()
 
+# Microsecond precision on MySQL (plain DATETIME keeps whole seconds), so
+# updated_at can serve as an ETag: two edits in the same second still differ
+PreciseDateTime = DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql")
+
+
+def utc_now() -> datetime:
+    """Current UTC time without tzinfo, as DATETIME columns store and return it"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 # User roles enum
 class UserRole(enum.Enum):
     ADMIN = "admin"
@@ -26,7 +62,7 @@ class Student(Base):
     __tablename__ = "students"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=True, unique=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, unique=True)
     full_name = Column(String(100), nullable=False)
     roll_number = Column(String(20), unique=True, nullable=False)
     email = Column(String(100), unique=True, nullable=False)
@@ -34,10 +70,10 @@ class Student(Base):
     department = Column(String(50), nullable=False)
     year_of_study = Column(String(20), nullable=False)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    updated_at = Column(PreciseDateTime, default=utc_now, onupdate=utc_now)
 
     # Relationship to User
-    user = relationship("User", backref=backref("student_profile", uselist=False))
+    user = relationship("User", backref=backref("student_profile", uselist=False, passive_deletes=True))
 
     # Indexes for frequently queried columns
     __table_args__ = (
@@ -70,9 +106,16 @@ class User(Base):
     full_name = Column(String(100), nullable=False)
     role = Column(String(20), nullable=False, default=UserRole.STUDENT.value)
     is_active = Column(Boolean, default=True)
+    # Embedded in issued tokens; bumping it invalidates all existing sessions
+    token_version = Column(Integer, nullable=False, default=0, server_default='0')
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
+    # Index for incremental token version sync
+    __table_args__ = (
+        Index('ix_users_updated_at', 'updated_at'),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -95,11 +138,20 @@ class Course(Base):
     description = Column(String(500), nullable=True)
     credits = Column(Integer, nullable=False, default=3)
     department = Column(String(50), nullable=False)
-    instructor_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    instructor_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    # Seat limit (None: unlimited) and enrolled students counted against it;
+    # see utils/seats.py
+    capacity = Column(Integer, nullable=True)
+    seats_taken = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    updated_at = Column(PreciseDateTime, default=utc_now, onupdate=utc_now)
 
-    instructor = relationship("User", backref="courses_taught")
+    instructor = relationship("User", backref=backref("courses_taught", passive_deletes=True))
+
+    # Index for per-department filtering and aggregates
+    __table_args__ = (
+        Index('ix_courses_department', 'department'),
+    )
 
     def to_dict(self):
         return {
@@ -110,6 +162,8 @@ class Course(Base):
             "credits": self.credits,
             "department": self.department,
             "instructor_id": self.instructor_id,
+            "capacity": self.capacity,
+            "seats_taken": self.seats_taken,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
@@ -119,13 +173,26 @@ class Enrollment(Base):
     __tablename__ = "enrollments"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
-    course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), nullable=False)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), nullable=False)
     enrolled_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     grade = Column(String(5), nullable=True)
+    # Waitlisted enrollments hold no seat; the oldest is enrolled when one frees up
+    status = Column(
+        Enum("enrolled", "waitlisted", name="enrollment_status"),
+        nullable=False, default="enrolled", server_default="enrolled"
+    )
+    updated_at = Column(PreciseDateTime, default=utc_now, onupdate=utc_now)
+
+    __table_args__ = (
+        Index('uq_enrollments_student_course', 'student_id', 'course_id', unique=True),
+        # Oldest waitlisted enrollment of a course (InnoDB appends the id)
+        Index('ix_enrollments_course_status', 'course_id', 'status'),
+    )
 
-    student = relationship("Student", backref=backref("enrollments", cascade="all, delete-orphan"))
-    course = relationship("Course", backref="enrollments")
+    # Child rows are removed by ON DELETE CASCADE, not loaded and deleted one by one
+    student = relationship("Student", backref=backref("enrollments", cascade="all, delete-orphan", passive_deletes=True))
+    course = relationship("Course", backref=backref("enrollments", cascade="all, delete-orphan", passive_deletes=True))
 
     def to_dict(self):
         return {
@@ -133,7 +200,8 @@ class Enrollment(Base):
             "student_id": self.student_id,
             "course_id": self.course_id,
             "enrolled_at": self.enrolled_at.isoformat() if self.enrolled_at else None,
-            "grade": self.grade
+            "grade": self.grade,
+            "status": self.status
         }
 
 # Attendance model
@@ -141,18 +209,21 @@ class Attendance(Base):
     __tablename__ = "attendance"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), nullable=False)
     date = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     status = Column(Enum("Present", "Absent", "Late", "Excused", name="attendance_status"), default="Present")
     remarks = Column(String(200), nullable=True)
+    # Calendar day of ``date``; one record per student and day
+    day = Column(Date, Computed("date(date)", persisted=True))
 
     # Index for date queries
     __table_args__ = (
         Index('ix_attendance_date', 'date'),
         Index('ix_attendance_student_date', 'student_id', 'date'),
+        Index('uq_attendance_student_day', 'student_id', 'day', unique=True),
     )
 
-    student = relationship("Student", backref=backref("attendance_records", cascade="all, delete-orphan"))
+    student = relationship("Student", backref=backref("attendance_records", cascade="all, delete-orphan", passive_deletes=True))
 
     @property
     def student_name(self):
@@ -168,10 +239,87 @@ class Attendance(Base):
             "remarks": self.remarks
         }
 
+# Revoked token model (logout and refresh token rotation)
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(36), primary_key=True)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    # expires_at for purging, revoked_at for incremental sync between workers
+    __table_args__ = (
+        Index('ix_revoked_tokens_expires_at', 'expires_at'),
+        Index('ix_revoked_tokens_revoked_at', 'revoked_at'),
+    )
+
+# Background job model (see the jobs package)
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_type = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=True)  # JSON-encoded handler arguments
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, succeeded, failed
+    progress = Column(Integer, nullable=False, default=0)
+    message = Column(String(200), nullable=True)
+    result = Column(Text, nullable=True)  # JSON-encoded handler return value
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    locked_by = Column(String(100), nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    finished_at = Column(DateTime, nullable=True)
+
+    # Indexes for claiming the next due job and per-type concurrency counts
+    __table_args__ = (
+        Index('ix_jobs_status_run_after', 'status', 'run_after'),
+        Index('ix_jobs_type_status', 'job_type', 'status'),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "job_type": self.job_type,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
 # Function to create tables
 def create_tables():
     Base.metadata.create_all(bind=engine)
 
+# Function to check the database is migrated to the latest Alembic revision
+def verify_schema():
+    # Alembic is only needed here, so it is not imported at module load
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    backend_dir = Path(__file__).parent
+    alembic_cfg = Config(str(backend_dir / "alembic.ini"))
+    alembic_cfg.set_main_option("script_location", str(backend_dir / "alembic"))
+    head = ScriptDirectory.from_config(alembic_cfg).get_current_head()
+
+    with engine.connect() as conn:
+        try:
+            current = conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+        except (OperationalError, ProgrammingError):
+            current = None  # Database was never migrated
+
+    if current != head:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, expected {head}; run `alembic upgrade head`"
+        )
+
 # Function to get database session
 def get_db():
     db = SessionLocal()
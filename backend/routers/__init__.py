@@ -6,6 +6,10 @@ from .courses import router as courses_router
 from .attendance import router as attendance_router
 from .admin import router as admin_router
 from .enrollments import router as enrollments_router
+from .jobs import router as jobs_router
+from .stats import router as stats_router
+from .events import router as events_router
+from .me import router as me_router
 
 __all__ = [
     "auth_router",
@@ -13,5 +17,9 @@ __all__ = [
     "courses_router",
     "attendance_router",
     "admin_router",
-    "enrollments_router"
+    "enrollments_router",
+    "jobs_router",
+    "stats_router",
+    "events_router",
+    "me_router"
 ]
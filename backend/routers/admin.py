@@ -3,13 +3,15 @@
 import logging
 from fastapi import APIRouter, Depends, HTTPException, status #fastapi is a web framework for building APIs
 from sqlalchemy.orm import Session #sqlalchemy is a library for interacting with databases
-from sqlalchemy import func # 
 from datetime import datetime, timezone
 from typing import List, Optional 
 
 from models import User, Student, Course, Attendance, get_db  
-from schemas import UserResponse 
-from utils import get_current_user, require_role 
+from schemas import UserResponse, OrNotFound
+from utils import AuthenticatedUser, get_current_user, require_role 
+from utils.batch import fetch_by_ids
+from utils.singleflight import singleflight
+from utils.token_versions import token_versions
 
 logger = logging.getLogger(__name__) 
 
@@ -18,13 +20,20 @@ router = APIRouter(tags=["Admin"])
 
 # ============== User Management ==============
 
-@router.get("/users", response_model=List[UserResponse])
+@router.get("/users", response_model=List[OrNotFound(UserResponse)])
 async def get_users( 
     role: Optional[str] = None,
+    ids: Optional[str] = None,
     db: Session = Depends(get_db), 
-    current_user: User = Depends(require_role(["admin"]))
+    current_user: AuthenticatedUser = Depends(require_role(["admin"]))
 ):
-    """Get all users (Admin only), optionally filtered by role"""
+    """Get all users (Admin only), optionally filtered by role
+
+    With ``ids=1,2,3`` returns exactly those users in the given order;
+    missing ids come back as ``{"id": ..., "found": false}``.
+    """
+    if ids is not None:
+        return fetch_by_ids(db, User, ids)
     query = db.query(User) 
     if role:
         query = query.filter(User.role == role) 
@@ -35,21 +44,25 @@ async def get_users(
 async def delete_user( 
     user_id: int, 
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(["admin"]))
+    current_user: AuthenticatedUser = Depends(require_role(["admin"]))
 ):
-    """Delete a user (Admin only)"""
+    """Delete a user (Admin only)
+
+    A linked student profile and taught courses are kept and unlinked by the
+    database (ON DELETE SET NULL).
+    """
     if user_id == current_user.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You cannot delete your own account"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()  
-    if not user: 
+    deleted = db.query(User).filter(User.id == user_id).delete(synchronize_session=False)
+    if not deleted: 
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
-    db.delete(user) 
     db.commit() 
+    token_versions.discard(user_id)
     return None 
 
 
@@ -58,14 +71,14 @@ async def get_admin_users(
     skip: int = 0,
     limit: int = 100, 
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(["admin"])) 
+    current_user: AuthenticatedUser = Depends(require_role(["admin"])) 
 ):
     """Get all users with pagination (Admin only)"""
     try:
         users = db.query(User).offset(skip).limit(limit).all() 
         return users
     except Exception as e:
-        logger.exception(f"Error fetching users: {e}")
+        logger.exception("Error fetching users: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error fetching users"
@@ -76,7 +89,7 @@ async def get_admin_users(
 async def activate_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(["admin"]))
+    current_user: AuthenticatedUser = Depends(require_role(["admin"]))
 ):
     """Activate a user account (Admin only)"""
     try:
@@ -96,7 +109,7 @@ async def activate_user(
         raise
     except Exception as e:
         db.rollback()
-        logger.exception(f"Error activating user: {e}")
+        logger.exception("Error activating user: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error activating user"
@@ -107,7 +120,7 @@ async def activate_user(
 async def deactivate_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(["admin"]))
+    current_user: AuthenticatedUser = Depends(require_role(["admin"]))
 ):
     """Deactivate a user account (Admin only)"""
     try:
@@ -124,8 +137,12 @@ async def deactivate_user(
                 detail="You cannot deactivate your own account"
             )
         
+        # Bump the token version so existing sessions stop working at once
         user.is_active = False
+        user.token_version += 1
+        new_version = user.token_version
         db.commit()
+        token_versions.set(user_id, new_version)
         
         return {"message": f"User {user.username} deactivated successfully"}
         
@@ -133,7 +150,7 @@ async def deactivate_user(
         raise
     except Exception as e:
         db.rollback()
-        logger.exception(f"Error deactivating user: {e}")
+        logger.exception("Error deactivating user: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error deactivating user"
@@ -145,7 +162,7 @@ async def update_user_role(
     user_id: int,
     role: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(["admin"])) 
+    current_user: AuthenticatedUser = Depends(require_role(["admin"])) 
 ):
     """Update user role (Admin only)"""
     try:
@@ -168,8 +185,12 @@ async def update_user_role(
                 detail="You cannot change your own role"
             )
         
+        # Tokens carry the role claim, so sessions issued under the old role are invalidated
         user.role = role
+        user.token_version += 1
+        new_version = user.token_version
         db.commit()
+        token_versions.set(user_id, new_version)
         
         return {"message": f"User {user.username} role updated to {role}"}
         
@@ -177,7 +198,7 @@ async def update_user_role(
         raise
     except Exception as e:
         db.rollback()
-        logger.exception(f"Error updating user role: {e}")
+        logger.exception("Error updating user role: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error updating user role"
@@ -187,18 +208,19 @@ async def update_user_role(
 # ============== Dashboard ==============
 
 @router.get("/dashboard/stats")
-async def get_dashboard_stats(
+@singleflight("dashboard_stats")
+def get_dashboard_stats(
     db: Session = Depends(get_db),  
-    current_user: User = Depends(get_current_user)
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
-    """Get dashboard statistics"""
+    """Get dashboard statistics (concurrent identical requests share one computation)"""
     try:
         total_students = db.query(Student).count()
         total_courses = db.query(Course).count()
         
         today = datetime.now(timezone.utc).date()
         present_count = db.query(Attendance).filter(
-            func.date(Attendance.date) == today,
+            Attendance.day == today,
             Attendance.status == 'Present'
         ).count()
         
@@ -212,8 +234,16 @@ async def get_dashboard_stats(
         }
         return stats
     except Exception as e:
-        logger.exception(f"Error fetching dashboard stats: {e}")
+        logger.exception("Error fetching dashboard stats: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error fetching dashboard stats"
         )
+
+
+@router.get("/admin/coalescing")
+async def get_coalescing_stats(
+    current_user: AuthenticatedUser = Depends(require_role(["admin"]))
+):
+    """Request coalescing counters of this worker per endpoint (Admin only)"""
+    return {"enabled": singleflight.enabled, "endpoints": singleflight.stats()}
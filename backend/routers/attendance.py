@@ -1,26 +1,71 @@
 """Attendance management endpoints"""
 
+import base64
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, timezone
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import and_, or_
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 
-from models import Attendance, Student, User, get_db
-from schemas import AttendanceCreate, AttendanceResponse
-from utils import get_current_user, require_role
+from config import CHECKIN_CODE_MINUTES, CHECKIN_FLUSH_INTERVAL_MS
+from models import Attendance, Student, get_db
+from schemas import AttendanceCreate, AttendanceResponse, CheckinCode, CheckinRequest, CheckinResponse
+from utils import AuthenticatedUser, create_access_token, decode_token, get_current_user, require_role
+from utils.checkin_buffer import BufferFull, checkin_buffer
+from utils.events import broadcaster
+from utils.singleflight import singleflight
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/attendance", tags=["Attendance"])
 
+# Page size of GET /attendance (default and upper bound)
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _serialize_attendance(record: Attendance, student_name: Optional[str] = None) -> dict:
+    """Response dict for an attendance record; the name defaults to the related student's"""
+    if student_name is None:
+        student_name = record.student.full_name if record.student else "Unknown"
+    return {
+        "id": record.id,
+        "student_id": record.student_id,
+        "student_name": student_name,
+        "date": record.date,
+        "status": record.status,
+        "remarks": record.remarks
+    }
+
+
+def _publish_attendance(record: Attendance, student: Student, previous_status: Optional[str]) -> None:
+    """Push a marked record to the day's and department's sheets and the dashboard's present count"""
+    broadcaster.publish("attendance", {
+        "id": record.id,
+        "student_id": record.student_id,
+        "status": record.status,
+        "remarks": record.remarks,
+        "date": record.date
+    }, [f"date:{record.date.date().isoformat()}", f"department:{student.department}"])
+    present = (record.status == "Present") - (previous_status == "Present")
+    if present:
+        broadcaster.publish("dashboard", {"present": present}, ["dashboard"])
+
+
+def _todays_record(db: Session, student_id: int, today) -> Optional[Attendance]:
+    return db.query(Attendance).filter(
+        Attendance.student_id == student_id,
+        Attendance.day == today
+    ).first()
+
 
 @router.post("", response_model=AttendanceResponse)
 async def mark_attendance(
     attendance: AttendanceCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(["admin", "faculty"]))
+    current_user: AuthenticatedUser = Depends(require_role(["admin", "faculty"]))
 ):
     """Mark attendance for a student (Admin/Faculty only)"""
     # Check if student exists
@@ -30,124 +75,198 @@ async def mark_attendance(
 
     # Check if already marked for today
     today = datetime.now(timezone.utc).date()
-    existing = db.query(Attendance).filter(
-        Attendance.student_id == attendance.student_id,
-        func.date(Attendance.date) == today
-    ).first()
+    existing = _todays_record(db, attendance.student_id, today)
     
-    if existing:
-        existing.status = attendance.status
-        existing.remarks = attendance.remarks
-        db.commit()
-        db.refresh(existing)
-        return {
-            "id": existing.id,
-            "student_id": existing.student_id,
-            "student_name": student.full_name,
-            "date": existing.date,
-            "status": existing.status,
-            "remarks": existing.remarks
-        }
-
-    new_attendance = Attendance(
-        student_id=attendance.student_id,
-        status=attendance.status,
-        remarks=attendance.remarks,
-        date=datetime.now(timezone.utc)
-    )
-    db.add(new_attendance)
-    db.commit()
-    db.refresh(new_attendance)
+    if existing is None:
+        new_attendance = Attendance(
+            student_id=attendance.student_id,
+            status=attendance.status,
+            remarks=attendance.remarks,
+            date=datetime.now(timezone.utc)
+        )
+        db.add(new_attendance)
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent request marked the student first
+            # (uq_attendance_student_day); update that record instead
+            db.rollback()
+            existing = _todays_record(db, attendance.student_id, today)
+            if existing is None:
+                raise HTTPException(status_code=404, detail="Student not found")
+        else:
+            db.refresh(new_attendance)
+            _publish_attendance(new_attendance, student, None)
+            return _serialize_attendance(new_attendance, student.full_name)
     
-    return {
-        "id": new_attendance.id,
-        "student_id": new_attendance.student_id,
-        "student_name": student.full_name,
-        "date": new_attendance.date,
-        "status": new_attendance.status,
-        "remarks": new_attendance.remarks
-    }
+    previous_status = existing.status
+    existing.status = attendance.status
+    existing.remarks = attendance.remarks
+    db.commit()
+    db.refresh(existing)
+    _publish_attendance(existing, student, previous_status)
+    return _serialize_attendance(existing, student.full_name)
+
+
+@router.post("/checkin-code", response_model=CheckinCode)
+async def create_checkin_code(
+    current_user: AuthenticatedUser = Depends(require_role(["admin", "faculty"]))
+):
+    """Issue a short-lived code (e.g. shown as a QR code in class) students check in with (Admin/Faculty only)"""
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=CHECKIN_CODE_MINUTES)
+    code = create_access_token(
+        data={"sub": str(current_user.id), "type": "checkin"},
+        expires_delta=timedelta(minutes=CHECKIN_CODE_MINUTES)
+    )
+    return {"code": code, "expires_at": expires_at}
+
+
+@router.post("/checkin", response_model=CheckinResponse, status_code=status.HTTP_202_ACCEPTED)
+async def check_in(
+    checkin: CheckinRequest,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(require_role(["student"]))
+):
+    """Mark yourself present for today with a check-in code (Students only)
+
+    The check-in is written within a second or so; it does not change a
+    record staff already made for the day.
+    """
+    try:
+        payload = decode_token(checkin.code)
+    except HTTPException:
+        payload = {}
+    if payload.get("type") != "checkin":
+        raise HTTPException(status_code=400, detail="Invalid or expired check-in code")
+
+    student_id = current_user.student_id
+    if student_id is None:
+        student_id = db.query(Student.id).filter(Student.user_id == current_user.id).scalar()
+        if student_id is None:
+            raise HTTPException(status_code=404, detail="Student profile not found")
+
+    checked_in_at = datetime.now(timezone.utc)
+    try:
+        checkin_buffer.add(student_id, checked_in_at)
+    except BufferFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many check-ins in progress, try again shortly",
+            headers={"Retry-After": str(max(1, CHECKIN_FLUSH_INTERVAL_MS // 1000))}
+        )
+    return {"student_id": student_id, "checked_in_at": checked_in_at}
+
+
+def _parse_day(value: str, name: str) -> datetime:
+    """Midnight of a YYYY-MM-DD query parameter"""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} format. Use YYYY-MM-DD")
+
+
+def _encode_cursor(marked_at: datetime, record_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{marked_at.isoformat()}|{record_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        marked_at, record_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(marked_at), int(record_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _attendance_rows_query(db: Session):
+    """Attendance response rows: one query joining in the student name
+
+    ``row._asdict()`` of each result row is the response dict.
+    """
+    return db.query(
+        Attendance.id,
+        Attendance.student_id,
+        Student.full_name.label("student_name"),
+        Attendance.date,
+        Attendance.status,
+        Attendance.remarks
+    ).join(Student, Student.id == Attendance.student_id)
 
 
 @router.get("", response_model=List[AttendanceResponse])
 async def get_attendance(
+    response: Response,
     date: Optional[str] = None,
+    from_date: Optional[str] = Query(None, alias="from"),
+    to_date: Optional[str] = Query(None, alias="to"),
     student_id: Optional[int] = None,
     user_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     """Get attendance records, optionally filtered by date (YYYY-MM-DD), student_id, or user_id
     
+    ``from``/``to`` (YYYY-MM-DD, inclusive) select a date range. Results are
+    ordered by date and id, at most ``limit`` per page; when more remain the
+    ``X-Next-Cursor`` response header holds the ``cursor`` for the next page.
     If user_id is provided, it will be converted to student_id automatically.
     Students can only view their own attendance.
     """
-    query = db.query(Attendance)
-    
-    # Handle user_id -> student_id conversion
-    if user_id:
-        student = db.query(Student).filter(Student.user_id == user_id).first()
-        if not student:
+    # Students can only view their own attendance. Their profile id comes
+    # from the token; tokens issued before the profile was linked fall back
+    # to a lookup by user_id.
+    if current_user.role == "student":
+        student_id = current_user.student_id
+        if student_id is None:
+            student_id = db.query(Student.id).filter(Student.user_id == current_user.id).scalar()
+            if student_id is None:
+                return []
+    elif user_id:
+        # Handle user_id -> student_id conversion
+        student_id = db.query(Student.id).filter(Student.user_id == user_id).scalar()
+        if student_id is None:
             # Return empty list instead of error - student may not have a profile yet
             return []
-        student_id = student.id
     
-    # Students can only view their own attendance
-    if current_user.role == "student":
-        # Get this student's student_id. If the user was recreated and the
-        # Student.profile isn't linked by user_id, try to find by email and
-        # link the records so the student can see their attendance.
-        student = db.query(Student).filter(Student.user_id == current_user.id).first()
-        if not student:
-            # Try to find a student profile by email and link it
-            student = db.query(Student).filter(Student.email == current_user.email.lower()).first()
-            if student:
-                try:
-                    student.user_id = current_user.id
-                    db.add(student)
-                    db.commit()
-                    db.refresh(student)
-                except Exception:
-                    db.rollback()
-            else:
-                return []
-        student_id = student.id
+    query = _attendance_rows_query(db)
     
     if student_id:
         query = query.filter(Attendance.student_id == student_id)
     
+    # Day filters are half-open ranges on the raw column so the date indexes apply
     if date:
-        try:
-            query_date = datetime.strptime(date, "%Y-%m-%d").date()
-            query = query.filter(func.date(Attendance.date) == query_date)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-        
-    records = query.all()
+        from_date = to_date = date
+    if from_date:
+        query = query.filter(Attendance.date >= _parse_day(from_date, "from"))
+    if to_date:
+        query = query.filter(Attendance.date < _parse_day(to_date, "to") + timedelta(days=1))
+    
+    if cursor:
+        after_date, after_id = _decode_cursor(cursor)
+        query = query.filter(or_(
+            Attendance.date > after_date,
+            and_(Attendance.date == after_date, Attendance.id > after_id)
+        ))
     
-    response = []
-    for record in records:
-        response.append({
-            "id": record.id,
-            "student_id": record.student_id,
-            "student_name": record.student.full_name if record.student else "Unknown",
-            "date": record.date,
-            "status": record.status,
-            "remarks": record.remarks
-        })
-    return response
+    rows = query.order_by(Attendance.date, Attendance.id).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(rows[-1].date, rows[-1].id)
+    return [row._asdict() for row in rows]
 
 
 @router.get("/today/stats")
-async def get_today_stats(
+@singleflight("attendance_today_stats")
+def get_today_stats(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
-    """Get summarized stats for today"""
+    """Get summarized stats for today (concurrent identical requests share one computation)"""
     today = datetime.now(timezone.utc).date()
     total_students = db.query(Student).count()
     present_count = db.query(Attendance).filter(
-        func.date(Attendance.date) == today,
+        Attendance.day == today,
         Attendance.status == 'Present'
     ).count()
     
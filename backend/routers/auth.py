@@ -8,40 +8,39 @@ from jose import JWTError
 from typing import List, Optional
 
 from models import User, Student, get_db
+from jobs import enqueue
 from schemas import (
     UserCreate, UserLogin, UserResponse, TokenResponse, 
     RefreshTokenRequest, PasswordResetRequest, PasswordResetConfirm
 )
 from utils import (
-    get_password_hash, verify_password, create_access_token, 
-    create_refresh_token, decode_token, get_current_user, require_role
+    AuthenticatedUser, get_password_hash, verify_password, create_access_token, 
+    create_refresh_token, decode_token, get_current_user, get_token_payload,
+    require_role, token_claims, link_student_profile
 )
+from utils.db_errors import raise_for_unique_violation
+from utils.revocation import revocation_store
+from utils.token_versions import token_versions
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+# Unique columns -> message when registration would duplicate them
+DUPLICATE_DETAILS = {
+    "email": "Email already registered",
+    "username": "Username already taken",
+}
+
 
 @router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
 async def register(user_data: UserCreate, db: Session = Depends(get_db)):
-    """Register a new user"""
+    """Register a new user
+
+    Taken emails and usernames are rejected by the unique constraints rather
+    than checked for first.
+    """
     try:
-        # Check if email already exists
-        existing_email = db.query(User).filter(User.email == user_data.email.lower()).first()
-        if existing_email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
-            )
-        
-        # Check if username already exists
-        existing_username = db.query(User).filter(User.username == user_data.username).first()
-        if existing_username:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username already taken"
-            )
-        
         # Create new user
         hashed_password = get_password_hash(user_data.password)
         db_user = User(
@@ -53,49 +52,29 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
         
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
-        # If the new user is a student, try to link to an existing Student
-        # profile by email; otherwise create a minimal Student profile so
-        # the student can immediately see attendance and related data.
-        try:
-            if db_user.role == "student":
-                existing_student = db.query(Student).filter(Student.email == db_user.email.lower()).first()
-                if existing_student:
-                    # Link existing profile
-                    existing_student.user_id = db_user.id
-                    db.add(existing_student)
-                    db.commit()
-                else:
-                    # Create a minimal student profile with placeholders
-                    placeholder_roll = f"AUTO{db_user.id}"
-                    minimal_student = Student(
-                        user_id=db_user.id,
-                        full_name=db_user.full_name,
-                        roll_number=placeholder_roll,
-                        email=db_user.email.lower(),
-                        phone_number="0000000000",
-                        department="Not Specified",
-                        year_of_study="Not Specified"
-                    )
-                    db.add(minimal_student)
-                    db.commit()
-        except IntegrityError:
-            db.rollback()
-            logger.exception("Failed to create/link student profile for new user")
+        db.flush()
         
-        # Generate tokens
-        access_token = create_access_token(data={"sub": str(db_user.id), "role": db_user.role})
-        refresh_token = create_refresh_token(data={"sub": str(db_user.id)})
+        # Link a student to the profile an admin already created for their
+        # email, so the profile id can go into the token. Without one the
+        # student has no profile until an admin creates it (POST /students
+        # links it to this account).
+        student_id = link_student_profile(db, db_user)
         
-        return {
-            "access_token": access_token,
-            "refresh_token": refresh_token,
+        # Generate tokens (before the commit expires db_user, so it is not reloaded)
+        claims = token_claims(db_user, student_id)
+        result = {
+            "access_token": create_access_token(data=claims),
+            "refresh_token": create_refresh_token(data=claims),
             "user": UserResponse.model_validate(db_user)
         }
         
-    except IntegrityError:
+        db.commit()
+        
+        return result
+        
+    except IntegrityError as e:
         db.rollback()
+        raise_for_unique_violation(e, DUPLICATE_DETAILS)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User with this email or username already exists"
@@ -104,7 +83,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         raise
     except Exception as e:
         db.rollback()
-        logger.exception(f"Error in register: {e}")
+        logger.exception("Error in register: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error creating user"
@@ -134,15 +113,16 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
             detail="User account is disabled"
         )
     
-    # Generate tokens
-    access_token = create_access_token(data={"sub": str(user.id), "role": user.role})
-    refresh_token = create_refresh_token(data={"sub": str(user.id)})
-    
-    return {
-        "access_token": access_token,
-        "refresh_token": refresh_token,
+    # Generate tokens (linking a profile created since the last login)
+    student_id = link_student_profile(db, user)
+    result = {
+        "access_token": create_access_token(data=token_claims(user, student_id)),
+        "refresh_token": create_refresh_token(data=token_claims(user, student_id)),
         "user": UserResponse.model_validate(user)
     }
+    db.commit()
+    
+    return result
 
 
 @router.post("/refresh", response_model=TokenResponse)
@@ -156,6 +136,13 @@ async def refresh_token(token_request: RefreshTokenRequest, db: Session = Depend
                 detail="Invalid refresh token"
             )
         
+        revocation_store.sync(db)
+        if revocation_store.is_revoked(payload.get("jti")):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid refresh token"
+            )
+        
         user_id: int = payload.get("sub")
         user = db.query(User).filter(User.id == user_id).first()
         
@@ -165,16 +152,29 @@ async def refresh_token(token_request: RefreshTokenRequest, db: Session = Depend
                 detail="User not found or inactive"
             )
         
-        # Generate new tokens
-        access_token = create_access_token(data={"sub": str(user.id), "role": user.role})
-        new_refresh_token = create_refresh_token(data={"sub": str(user.id)})
+        if payload.get("ver") != user.token_version:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid refresh token"
+            )
         
-        return {
-            "access_token": access_token,
-            "refresh_token": new_refresh_token,
+        # Generate new tokens (re-resolving the profile picks up late links)
+        student_id = link_student_profile(db, user)
+        result = {
+            "access_token": create_access_token(data=token_claims(user, student_id)),
+            "refresh_token": create_refresh_token(data=token_claims(user, student_id)),
             "user": UserResponse.model_validate(user)
         }
         
+        # Rotate: the presented refresh token cannot be used again (this
+        # also commits a new profile link)
+        if payload.get("jti"):
+            revocation_store.revoke(db, payload["jti"], payload["exp"])
+        else:
+            db.commit()
+        
+        return result
+        
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -183,30 +183,65 @@ async def refresh_token(token_request: RefreshTokenRequest, db: Session = Depend
 
 
 @router.post("/logout")
-async def logout(current_user: User = Depends(get_current_user)):
-    """Logout user (client should discard tokens)"""
+async def logout(
+    token_request: Optional[RefreshTokenRequest] = None,
+    payload: dict = Depends(get_token_payload),
+    db: Session = Depends(get_db)
+):
+    """Logout user by revoking the access token and, if given, the refresh token"""
+    if payload.get("jti"):
+        revocation_store.revoke(db, payload["jti"], payload["exp"])
+    
+    if token_request:
+        try:
+            refresh_payload = decode_token(token_request.refresh_token)
+        except HTTPException:
+            refresh_payload = {}
+        if (
+            refresh_payload.get("type") == "refresh"
+            and refresh_payload.get("sub") == payload.get("sub")
+            and refresh_payload.get("jti")
+        ):
+            revocation_store.revoke(db, refresh_payload["jti"], refresh_payload["exp"])
+    
     return {"message": "Successfully logged out"}
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """Get current user information"""
-    return current_user
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return user
 
 
 @router.put("/me", response_model=UserResponse)
 async def update_current_user(
     full_name: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Update current user profile"""
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
     if full_name:
-        current_user.full_name = full_name.strip()
+        user.full_name = full_name.strip()
     
     db.commit()
-    db.refresh(current_user)
-    return current_user
+    db.refresh(user)
+    return user
 
 
 @router.post("/forgot-password")
@@ -218,14 +253,10 @@ async def forgot_password(reset_request: PasswordResetRequest, db: Session = Dep
     if not user:
         return {"message": "If an account with this email exists, a password reset link has been sent."}
     
-    # Generate password reset token
-    reset_token = create_access_token(
-        data={"sub": str(user.id), "type": "password_reset"},
-    )
-    
-    # TODO: Send email with reset token
-    # For now, just log it (in production, send email)
-    logger.info(f"Password reset requested for {user.email}")
+    # Email is sent by a job worker instead of inside the request; the job
+    # creates the reset token, so it is not stored in the jobs table
+    enqueue(db, "send_password_reset", created_by=user.id, user_id=user.id)
+    logger.info("Password reset requested for %s", user.email)
     
     return {"message": "If an account with this email exists, a password reset link has been sent."}
 
@@ -250,9 +281,19 @@ async def reset_password(reset_confirm: PasswordResetConfirm, db: Session = Depe
                 detail="User not found"
             )
         
-        # Update password
+        # A reset token is only valid for the sessions it was issued against
+        if payload.get("ver") != user.token_version:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid or expired reset token"
+            )
+        
+        # Update password and invalidate all existing sessions
         user.hashed_password = get_password_hash(reset_confirm.new_password)
+        user.token_version += 1
+        new_version = user.token_version
         db.commit()
+        token_versions.set(int(user_id), new_version)
         
         return {"message": "Password has been reset successfully"}
         
@@ -1,55 +1,111 @@
 """Course management endpoints"""
 
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from sqlalchemy import case, func, update
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 
-from models import Course, User, get_db
-from schemas import CourseCreate, CourseResponse
-from utils import get_current_user, require_role
+from models import Course, Enrollment, Student, get_db, utc_now
+from schemas import CourseCreate, CourseResponse, CourseGrades, GradeImportResult, OrNotFound
+from utils import AuthenticatedUser, get_current_user, require_role
+from utils.batch import fetch_by_ids
+from utils.db_errors import raise_for_unique_violation
+from utils.etags import etag, missing_or_modified, parse_if_match
+from utils.fieldsets import FieldSet, sparse_response
+from utils.grades import parse_grades, summarize
+from utils.events import broadcaster
+from utils.seats import promote_waitlisted
+from utils.singleflight import singleflight
+from utils.stats_cache import stats_cache
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/courses", tags=["Courses"])
 
+course_fields = FieldSet(Course, CourseResponse)
 
-@router.get("", response_model=List[CourseResponse])
-async def get_all_courses(
-    skip: int = 0,
-    limit: int = 100,
-    department: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Get all courses (Authenticated users only)"""
+# Unique columns -> message when a write would duplicate them
+DUPLICATE_DETAILS = {
+    "course_code": "Course code already exists",
+}
+
+
+@singleflight("courses")
+def _list_courses(
+    skip: int,
+    limit: int,
+    department: Optional[str],
+    ids: Optional[str],
+    fields: Optional[str],
+    db: Session,
+    current_user: AuthenticatedUser
+) -> list:
+    """Courses as plain items (response models, dicts), safe to share between coalesced requests"""
+    selected = course_fields.parse(fields)
+    if ids is not None:
+        if selected:
+            return [row if isinstance(row, dict) else dict(row._mapping)
+                    for row in fetch_by_ids(db, Course, ids, query=course_fields.query(db, selected))]
+        return [row if isinstance(row, dict) else CourseResponse.model_validate(row)
+                for row in fetch_by_ids(db, Course, ids)]
     try:
-        query = db.query(Course)
+        query = db.query(Course) if selected is None else course_fields.query(db, selected)
         if department:
             query = query.filter(Course.department == department)
         courses = query.offset(skip).limit(limit).all()
-        return courses
+        if selected is None:
+            return [CourseResponse.model_validate(course) for course in courses]
+        return [dict(row._mapping) for row in courses]
     except Exception as e:
-        logger.exception(f"Error fetching courses: {e}")
+        logger.exception("Error fetching courses: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error fetching courses"
         )
 
 
+@router.get("", response_model=List[OrNotFound(CourseResponse)])
+def get_all_courses(
+    skip: int = 0,
+    limit: int = 100,
+    department: Optional[str] = None,
+    ids: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """Get all courses (Authenticated users only)
+
+    With ``ids=1,2,3`` returns exactly those courses in the given order
+    (other filters are ignored); missing ids come back as ``{"id": ..., "found": false}``.
+    With ``fields=id,course_name`` only those fields are selected and returned.
+    Concurrent identical requests share one computation; each builds its own response.
+    """
+    courses = _list_courses(
+        skip=skip, limit=limit, department=department, ids=ids, fields=fields,
+        db=db, current_user=current_user
+    )
+    return courses if fields is None else sparse_response(courses)
+
+
 @router.get("/{course_id}", response_model=CourseResponse)
 async def get_course(
     course_id: int,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
-    """Get a course by ID"""
+    """Get a course by ID (with an ETag for If-Match on PUT)"""
     course = db.query(Course).filter(Course.id == course_id).first()
     if course is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
+    if course.updated_at is not None:
+        response.headers["ETag"] = etag(course.updated_at)
     return course
 
 
@@ -57,38 +113,47 @@ async def get_course(
 async def create_course(
     course: CourseCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(["admin", "faculty"]))
+    current_user: AuthenticatedUser = Depends(require_role(["admin", "faculty"]))
 ):
-    """Create a new course (Admin/Faculty only)"""
+    """Create a new course (Admin/Faculty only)
+
+    A duplicate course code is rejected by the unique constraint rather than
+    checked for first.
+    """
     try:
-        # Check if course code already exists
-        existing = db.query(Course).filter(Course.course_code == course.course_code.upper()).first()
-        if existing:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Course code already exists"
-            )
-        
         db_course = Course(
             course_code=course.course_code.upper(),
             course_name=course.course_name,
             description=course.description,
             credits=course.credits,
             department=course.department,
+            capacity=course.capacity,
             instructor_id=current_user.id if current_user.role == "faculty" else None
         )
         
         db.add(db_course)
+        db.flush()
+        # Built before the commit expires the instance, so it is not reloaded
+        created = CourseResponse.model_validate(db_course)
         db.commit()
-        db.refresh(db_course)
+        stats_cache.invalidate()
+        broadcaster.publish("dashboard", {"courses": 1}, ["dashboard"])
         
-        return db_course
+        return created
         
+    except IntegrityError as e:
+        db.rollback()
+        raise_for_unique_violation(e, DUPLICATE_DETAILS)
+        logger.exception("Error creating course: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error creating course"
+        )
     except HTTPException:
         raise
     except Exception as e:
         db.rollback()
-        logger.exception(f"Error creating course: {e}")
+        logger.exception("Error creating course: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error creating course"
@@ -99,68 +164,169 @@ async def create_course(
 async def update_course(
     course_id: int,
     course_update: CourseCreate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(["admin"]))
+    current_user: AuthenticatedUser = Depends(require_role(["admin"]))
 ):
-    """Update a course (Admin only)"""
+    """Update a course (Admin only)
+
+    A single UPDATE; a duplicate course code is rejected by the unique
+    constraint. With ``If-Match`` set to the course's ETag the update only
+    applies if the course was not changed since (412 otherwise). ``capacity``
+    is only changed when sent (``null`` for unlimited); omitting it keeps the
+    current limit. Seats added by raising it go to waitlisted students;
+    lowering it below ``seats_taken`` unenrolls nobody.
+    """
+    expected = parse_if_match(if_match)
+    values = {
+        "course_code": course_update.course_code.upper(),
+        "course_name": course_update.course_name,
+        "description": course_update.description,
+        "credits": course_update.credits,
+        "department": course_update.department,
+        "updated_at": utc_now()
+    }
+    if "capacity" in course_update.model_fields_set:
+        values["capacity"] = course_update.capacity
     try:
-        db_course = db.query(Course).filter(Course.id == course_id).first()
-        if db_course is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Course not found"
-            )
+        row = course_fields.update(db, course_id, values, updated_at=expected)
+        if row is None:
+            raise missing_or_modified(db, Course, course_id, expected, "Course not found")
+        updated = row._asdict()
+        updated["seats_taken"] += len(promote_waitlisted(db, course_id))
+        db.commit()
+        stats_cache.invalidate()
+        
+        response.headers["ETag"] = etag(row.updated_at)
+        return updated
         
-        # Check for duplicate course code
-        existing = db.query(Course).filter(
-            Course.course_code == course_update.course_code.upper(),
-            Course.id != course_id
-        ).first()
-        if existing:
+    except IntegrityError as e:
+        db.rollback()
+        raise_for_unique_violation(e, DUPLICATE_DETAILS)
+        logger.exception("Error updating course: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error updating course"
+        )
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.exception("Error updating course: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error updating course"
+        )
+
+
+@router.post("/{course_id}/grades", response_model=GradeImportResult)
+async def import_grades(
+    course_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(require_role(["admin", "faculty"]))
+):
+    """Set the grades of a course's students from CSV or JSON keyed by roll number (Admin/Faculty only)
+
+    Send ``text/csv`` with a ``roll_number,grade`` header, a JSON list of
+    ``{"roll_number", "grade"}`` objects, or either as the ``file`` field of a
+    form upload. All grades are applied with one UPDATE joined to students,
+    or none are if any roll number is not enrolled in the course.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        upload = (await request.form()).get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload the grades as 'file'")
+        body = await upload.read()
+        content_type = "application/json" if (upload.filename or "").lower().endswith(".json") else "text/csv"
+    else:
+        body = await request.body()
+    grades = parse_grades(body, content_type)
+
+    try:
+        updated = db.execute(
+            update(Enrollment)
+            .where(
+                Enrollment.course_id == course_id,
+                Enrollment.status == "enrolled",
+                Enrollment.student_id == Student.id,
+                Student.roll_number.in_(grades)
+            )
+            .values(grade=case(grades, value=Student.roll_number), updated_at=utc_now())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if updated != len(grades):
+            enrolled = {
+                roll_number for (roll_number,) in db.query(Student.roll_number)
+                .join(Enrollment, Enrollment.student_id == Student.id)
+                .filter(Enrollment.course_id == course_id, Enrollment.status == "enrolled", Student.roll_number.in_(grades))
+            }
+            db.rollback()
+            if db.query(Course.id).filter(Course.id == course_id).first() is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found")
+            missing = sorted(set(grades) - enrolled)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Course code already exists"
+                detail=f"Not enrolled in this course: {', '.join(missing[:20])}" + (" ..." if len(missing) > 20 else "")
             )
-        
-        db_course.course_code = course_update.course_code.upper()
-        db_course.course_name = course_update.course_name
-        db_course.description = course_update.description
-        db_course.credits = course_update.credits
-        db_course.department = course_update.department
-        
         db.commit()
-        db.refresh(db_course)
+        stats_cache.invalidate()
+        broadcaster.publish("grades", {"course_id": course_id, "updated": updated}, [f"course:{course_id}"])
+        logger.info("User %s imported %s grades for course %s", current_user.id, updated, course_id)
         
-        return db_course
+        return {"course_id": course_id, "updated": updated}
         
     except HTTPException:
         raise
     except Exception as e:
         db.rollback()
-        logger.exception(f"Error updating course: {e}")
+        logger.exception("Error importing grades: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error updating course"
+            detail="Error importing grades"
         )
 
 
+@router.get("/{course_id}/grades", response_model=CourseGrades)
+async def get_course_grades(
+    course_id: int,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(require_role(["admin", "faculty"]))
+):
+    """Grade distribution and GPA of a course's enrolled students (Admin/Faculty only)"""
+    rows = (
+        db.query(Enrollment.grade, func.count(Enrollment.id), func.sum(Course.credits))
+        .join(Course, Course.id == Enrollment.course_id)
+        .filter(Enrollment.course_id == course_id, Enrollment.status == "enrolled")
+        .group_by(Enrollment.grade)
+        .all()
+    )
+    if not rows and db.query(Course.id).filter(Course.id == course_id).first() is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found")
+    return {"course_id": course_id, **summarize(rows)}
+
+
 @router.delete("/{course_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_course(
     course_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(["admin"]))
+    current_user: AuthenticatedUser = Depends(require_role(["admin"]))
 ):
-    """Delete a course (Admin only)"""
+    """Delete a course and its enrollments (Admin only)"""
     try:
-        db_course = db.query(Course).filter(Course.id == course_id).first()
-        if db_course is None:
+        deleted = db.query(Course).filter(Course.id == course_id).delete(synchronize_session=False)
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Course not found"
             )
         
-        db.delete(db_course)
         db.commit()
+        stats_cache.invalidate()
+        broadcaster.publish("dashboard", {"courses": -1}, ["dashboard"])
         
         return None
         
@@ -168,7 +334,7 @@ async def delete_course(
         raise
     except Exception as e:
         db.rollback()
-        logger.exception(f"Error deleting course: {e}")
+        logger.exception("Error deleting course: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error deleting course"
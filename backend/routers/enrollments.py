@@ -1,19 +1,80 @@
 """Enrollment management endpoints"""
 
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 
-from models import Enrollment, Student, Course, User, get_db
+from models import Enrollment, Student, Course, get_db, utc_now
 from schemas import EnrollmentCreate, EnrollmentUpdate, EnrollmentResponse
-from utils import get_current_user, require_role
+from utils import AuthenticatedUser, get_current_user, require_role
+from utils.etags import etag, missing_or_modified, parse_if_match
+from utils.fieldsets import FieldSet, sparse_response
+from utils.events import broadcaster
+from utils.seats import release_seats, take_seat
+from utils.stats_cache import stats_cache
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/enrollments", tags=["Enrollments"])
 
+enrollment_fields = FieldSet(Enrollment, EnrollmentResponse, joined={
+    "student_name": (Student.full_name, Student, Student.id == Enrollment.student_id),
+    "course_name": (Course.course_name, Course, Course.id == Enrollment.course_id),
+})
+
+
+def _enrollment_event(op: str, enrollment: Enrollment) -> tuple:
+    """broadcaster.publish() arguments telling the course's subscribers about a change"""
+    return "enrollment", {
+        "op": op,
+        "id": enrollment.id,
+        "student_id": enrollment.student_id,
+        "course_id": enrollment.course_id,
+        "grade": enrollment.grade,
+        "status": enrollment.status
+    }, [f"course:{enrollment.course_id}"]
+
+
+def _own_student_id(db: Session, current_user: AuthenticatedUser) -> Optional[int]:
+    """Student profile id of a student user (from the token, else looked up)"""
+    if current_user.student_id is not None:
+        return current_user.student_id
+    return db.query(Student.id).filter(Student.user_id == current_user.id).scalar()
+
+
+def _forbid_other_students(db: Session, current_user: AuthenticatedUser, student_id: int) -> None:
+    """Students may only enroll or drop themselves"""
+    if current_user.role == "student" and _own_student_id(db, current_user) != student_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to access this resource"
+        )
+
+
+def _serialize_enrollment(
+    enrollment: Enrollment,
+    student_name: Optional[str] = None,
+    course_name: Optional[str] = None
+) -> dict:
+    """Response dict for an enrollment; names default to the related rows'"""
+    if student_name is None and enrollment.student is not None:
+        student_name = enrollment.student.full_name
+    if course_name is None and enrollment.course is not None:
+        course_name = enrollment.course.course_name
+    return {
+        "id": enrollment.id,
+        "student_id": enrollment.student_id,
+        "course_id": enrollment.course_id,
+        "enrolled_at": enrollment.enrolled_at,
+        "grade": enrollment.grade,
+        "status": enrollment.status,
+        "student_name": student_name,
+        "course_name": course_name,
+        "updated_at": enrollment.updated_at
+    }
+
 
 @router.get("", response_model=List[EnrollmentResponse])
 async def get_enrollments(
@@ -21,11 +82,25 @@ async def get_enrollments(
     course_id: Optional[int] = None,
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
-    """Get all enrollments with optional filters"""
+    """Get all enrollments with optional filters
+
+    With ``fields=id,course_name`` only those fields are selected and returned
+    (student and course names are joined in only when requested).
+    """
+    selected = enrollment_fields.parse(fields)
     try:
+        if selected is not None:
+            query = enrollment_fields.query(db, selected)
+            if student_id:
+                query = query.filter(Enrollment.student_id == student_id)
+            if course_id:
+                query = query.filter(Enrollment.course_id == course_id)
+            return sparse_response(query.offset(skip).limit(limit).all())
+
         query = db.query(Enrollment)
         
         if student_id:
@@ -35,21 +110,10 @@ async def get_enrollments(
             
         enrollments = query.offset(skip).limit(limit).all()
         
-        response = []
-        for enrollment in enrollments:
-            response.append({
-                "id": enrollment.id,
-                "student_id": enrollment.student_id,
-                "course_id": enrollment.course_id,
-                "enrolled_at": enrollment.enrolled_at,
-                "grade": enrollment.grade,
-                "student_name": enrollment.student.full_name if enrollment.student else None,
-                "course_name": enrollment.course.course_name if enrollment.course else None
-            })
-        return response
+        return [_serialize_enrollment(enrollment) for enrollment in enrollments]
         
     except Exception as e:
-        logger.exception(f"Error fetching enrollments: {e}")
+        logger.exception("Error fetching enrollments: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error fetching enrollments"
@@ -59,35 +123,38 @@ async def get_enrollments(
 @router.get("/{enrollment_id}", response_model=EnrollmentResponse)
 async def get_enrollment(
     enrollment_id: int,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
-    """Get a single enrollment by ID"""
+    """Get a single enrollment by ID (with an ETag for If-Match on PUT)"""
     enrollment = db.query(Enrollment).filter(Enrollment.id == enrollment_id).first()
     if enrollment is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Enrollment not found"
         )
+    if enrollment.updated_at is not None:
+        response.headers["ETag"] = etag(enrollment.updated_at)
     
-    return {
-        "id": enrollment.id,
-        "student_id": enrollment.student_id,
-        "course_id": enrollment.course_id,
-        "enrolled_at": enrollment.enrolled_at,
-        "grade": enrollment.grade,
-        "student_name": enrollment.student.full_name if enrollment.student else None,
-        "course_name": enrollment.course.course_name if enrollment.course else None
-    }
+    return _serialize_enrollment(enrollment)
 
 
 @router.post("", response_model=EnrollmentResponse, status_code=status.HTTP_201_CREATED)
 async def create_enrollment(
     enrollment: EnrollmentCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(["admin", "faculty"]))
+    current_user: AuthenticatedUser = Depends(require_role(["admin", "faculty", "student"]))
 ):
-    """Enroll a student in a course (Admin/Faculty only)"""
+    """Enroll a student in a course (Admin/Faculty, or a student enrolling themselves)
+
+    If the course is at capacity the enrollment is created with status
+    ``waitlisted`` and becomes ``enrolled`` when a seat frees up. Seats are
+    taken with one conditional UPDATE of the course's seat counter, and a
+    duplicate enrollment is rejected by the unique constraint (which also
+    gives the seat back).
+    """
+    _forbid_other_students(db, current_user, enrollment.student_id)
     try:
         # Check if student exists
         student = db.query(Student).filter(Student.id == enrollment.student_id).first()
@@ -105,47 +172,34 @@ async def create_enrollment(
                 detail="Course not found"
             )
         
-        # Check if already enrolled
-        existing = db.query(Enrollment).filter(
-            Enrollment.student_id == enrollment.student_id,
-            Enrollment.course_id == enrollment.course_id
-        ).first()
-        if existing:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Student is already enrolled in this course"
-            )
-        
+        # The course row stays locked from here to the commit, so nothing
+        # slow happens in between
+        seated = take_seat(db, enrollment.course_id)
         db_enrollment = Enrollment(
             student_id=enrollment.student_id,
-            course_id=enrollment.course_id
+            course_id=enrollment.course_id,
+            status="enrolled" if seated else "waitlisted"
         )
         
         db.add(db_enrollment)
         db.commit()
+        stats_cache.invalidate()
         db.refresh(db_enrollment)
+        broadcaster.publish(*_enrollment_event("created", db_enrollment))
         
-        return {
-            "id": db_enrollment.id,
-            "student_id": db_enrollment.student_id,
-            "course_id": db_enrollment.course_id,
-            "enrolled_at": db_enrollment.enrolled_at,
-            "grade": db_enrollment.grade,
-            "student_name": student.full_name,
-            "course_name": course.course_name
-        }
+        return _serialize_enrollment(db_enrollment, student.full_name, course.course_name)
         
     except IntegrityError:
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Enrollment already exists"
+            detail="Student is already enrolled in this course"
         )
     except HTTPException:
         raise
     except Exception as e:
         db.rollback()
-        logger.exception(f"Error creating enrollment: {e}")
+        logger.exception("Error creating enrollment: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error creating enrollment"
@@ -156,39 +210,38 @@ async def create_enrollment(
 async def update_enrollment(
     enrollment_id: int,
     enrollment_update: EnrollmentUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(["admin", "faculty"]))
+    current_user: AuthenticatedUser = Depends(require_role(["admin", "faculty"]))
 ):
-    """Update an enrollment (e.g., add grade) (Admin/Faculty only)"""
+    """Update an enrollment (e.g., add grade) (Admin/Faculty only)
+
+    A single UPDATE, then one SELECT for the student and course names. With
+    ``If-Match`` set to the enrollment's ETag the update only applies if the
+    enrollment was not changed since (412 otherwise).
+    """
+    expected = parse_if_match(if_match)
+    values = {"updated_at": utc_now()}
+    if enrollment_update.grade is not None:
+        values["grade"] = enrollment_update.grade
     try:
-        db_enrollment = db.query(Enrollment).filter(Enrollment.id == enrollment_id).first()
-        if db_enrollment is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Enrollment not found"
-            )
-        
-        if enrollment_update.grade is not None:
-            db_enrollment.grade = enrollment_update.grade
-        
+        row = enrollment_fields.update(db, enrollment_id, values, updated_at=expected)
+        if row is None:
+            raise missing_or_modified(db, Enrollment, enrollment_id, expected, "Enrollment not found")
         db.commit()
-        db.refresh(db_enrollment)
+        stats_cache.invalidate()
+        broadcaster.publish(*_enrollment_event("updated", row))
         
-        return {
-            "id": db_enrollment.id,
-            "student_id": db_enrollment.student_id,
-            "course_id": db_enrollment.course_id,
-            "enrolled_at": db_enrollment.enrolled_at,
-            "grade": db_enrollment.grade,
-            "student_name": db_enrollment.student.full_name if db_enrollment.student else None,
-            "course_name": db_enrollment.course.course_name if db_enrollment.course else None
-        }
+        response.headers["ETag"] = etag(row.updated_at)
+        return row._asdict()
         
     except HTTPException:
+        db.rollback()
         raise
     except Exception as e:
         db.rollback()
-        logger.exception(f"Error updating enrollment: {e}")
+        logger.exception("Error updating enrollment: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error updating enrollment"
@@ -199,9 +252,12 @@ async def update_enrollment(
 async def delete_enrollment(
     enrollment_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(["admin"]))
+    current_user: AuthenticatedUser = Depends(require_role(["admin", "student"]))
 ):
-    """Remove a student from a course (Admin only)"""
+    """Remove a student from a course (Admin, or a student dropping themselves)
+
+    A dropped seat goes to the oldest waitlisted student in the same transaction.
+    """
     try:
         db_enrollment = db.query(Enrollment).filter(Enrollment.id == enrollment_id).first()
         if db_enrollment is None:
@@ -209,9 +265,18 @@ async def delete_enrollment(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Enrollment not found"
             )
+        _forbid_other_students(db, current_user, db_enrollment.student_id)
         
+        # Captured before the commit expires the rows
+        events = [_enrollment_event("deleted", db_enrollment)]
         db.delete(db_enrollment)
+        if db_enrollment.status == "enrolled":
+            promoted = release_seats(db, {db_enrollment.course_id: 1})
+            events += [_enrollment_event("promoted", row) for rows in promoted.values() for row in rows]
         db.commit()
+        stats_cache.invalidate()
+        for event in events:
+            broadcaster.publish(*event)
         
         return None
         
@@ -219,7 +284,7 @@ async def delete_enrollment(
         raise
     except Exception as e:
         db.rollback()
-        logger.exception(f"Error deleting enrollment: {e}")
+        logger.exception("Error deleting enrollment: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error deleting enrollment"
@@ -230,7 +295,7 @@ async def delete_enrollment(
 async def get_student_courses(
     student_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     """Get all courses a student is enrolled in"""
     student = db.query(Student).filter(Student.id == student_id).first()
@@ -242,25 +307,14 @@ async def get_student_courses(
     
     enrollments = db.query(Enrollment).filter(Enrollment.student_id == student_id).all()
     
-    response = []
-    for enrollment in enrollments:
-        response.append({
-            "id": enrollment.id,
-            "student_id": enrollment.student_id,
-            "course_id": enrollment.course_id,
-            "enrolled_at": enrollment.enrolled_at,
-            "grade": enrollment.grade,
-            "student_name": student.full_name,
-            "course_name": enrollment.course.course_name if enrollment.course else None
-        })
-    return response
+    return [_serialize_enrollment(enrollment, student_name=student.full_name) for enrollment in enrollments]
 
 
 @router.get("/course/{course_id}/students", response_model=List[EnrollmentResponse])
 async def get_course_students(
     course_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     """Get all students enrolled in a course"""
     course = db.query(Course).filter(Course.id == course_id).first()
@@ -272,15 +326,4 @@ async def get_course_students(
     
     enrollments = db.query(Enrollment).filter(Enrollment.course_id == course_id).all()
     
-    response = []
-    for enrollment in enrollments:
-        response.append({
-            "id": enrollment.id,
-            "student_id": enrollment.student_id,
-            "course_id": enrollment.course_id,
-            "enrolled_at": enrollment.enrolled_at,
-            "grade": enrollment.grade,
-            "student_name": enrollment.student.full_name if enrollment.student else None,
-            "course_name": course.course_name
-        })
-    return response
+    return [_serialize_enrollment(enrollment, course_name=course.course_name) for enrollment in enrollments]
@@ -0,0 +1,125 @@
+"""Server-Sent Events stream of live changes"""
+
+import asyncio
+import logging
+import re
+import time
+from datetime import timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from config import EVENTS_KEEPALIVE_SECONDS, EVENTS_MAX_CHANNELS, EVENTS_MAX_SUBSCRIBERS
+from models import SessionLocal
+from schemas import EventsTicket
+from utils import AuthenticatedUser, create_access_token, decode_token, get_token_payload
+from utils.events import broadcaster
+from utils.revocation import revocation_store
+from utils.token_versions import token_versions
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+# dashboard: count deltas (any user)
+# date:YYYY-MM-DD, course:<id>, department:<name>: record deltas (Admin/Faculty)
+CHANNEL = re.compile(r"^(dashboard|date:\d{4}-\d{2}-\d{2}|course:\d+|department:.{1,50})$")
+
+
+# Lifetime of a stream ticket; it only has to last until the stream opens
+TICKET_SECONDS = 60
+
+
+def _authorize(ticket: dict) -> Optional[AuthenticatedUser]:
+    """The ticket's user, or None once its access token is revoked or its user's tokens are invalidated"""
+    db = SessionLocal()
+    try:
+        revocation_store.sync(db)
+        if revocation_store.is_revoked(ticket.get("tok")):
+            return None
+        user_id = int(ticket["sub"])
+        version = token_versions.get(db, user_id)
+        if version is None or ticket.get("ver") != version:
+            return None
+        return AuthenticatedUser(id=user_id, role=ticket.get("role"), student_id=ticket.get("sid"))
+    finally:
+        db.close()
+
+
+@router.post("/ticket", response_model=EventsTicket)
+async def create_ticket(payload: dict = Depends(get_token_payload)):
+    """Short-lived ticket for opening a stream (Authenticated users)
+
+    EventSource cannot send headers, so the stream is authorized by a query
+    parameter. A ticket instead of the access token keeps the token out of
+    access logs; a logged ticket expires within TICKET_SECONDS and only opens
+    streams for as long as the access token it was issued for is valid.
+    """
+    claims = {name: payload[name] for name in ("sub", "role", "ver", "sid") if name in payload}
+    claims.update({"type": "events", "tok": payload.get("jti"), "texp": payload.get("exp")})
+    ticket = create_access_token(data=claims, expires_delta=timedelta(seconds=TICKET_SECONDS))
+    return {"ticket": ticket, "expires_in": TICKET_SECONDS}
+
+
+@router.get("")
+async def stream_events(
+    channels: str = Query(..., description="Comma-separated channels, e.g. dashboard,date:2024-01-15"),
+    ticket: str = Query(..., description="Ticket from POST /events/ticket (EventSource cannot send headers)")
+):
+    """Stream change events for the given channels as text/event-stream
+
+    The stream ends when the access token the ticket was issued for expires,
+    is revoked (logout) or is invalidated (password reset, deactivation, role
+    change); checked every EVENTS_KEEPALIVE_SECONDS. Reconnect with a new ticket.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials"
+    )
+    claims = decode_token(ticket)
+    if claims.get("type") != "events" or claims.get("sub") is None:
+        raise credentials_exception
+    current_user = await run_in_threadpool(_authorize, claims)
+    if current_user is None:
+        raise credentials_exception
+    expires_at = claims.get("texp")
+
+    names = list(dict.fromkeys(name.strip() for name in channels.split(",") if name.strip()))
+    invalid = [name for name in names if not CHANNEL.match(name)]
+    if not names or invalid or len(names) > EVENTS_MAX_CHANNELS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid channels: {', '.join(invalid) or channels}"
+        )
+    if current_user.role not in ("admin", "faculty") and names != ["dashboard"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to access this resource"
+        )
+    if broadcaster.subscribers >= EVENTS_MAX_SUBSCRIBERS:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many event subscribers"
+        )
+
+    async def stream():
+        with broadcaster.subscribe(names) as queue:
+            yield "retry: 5000\n\n"
+            checked_at = time.monotonic()
+            while expires_at is None or time.time() < expires_at:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing idle connections
+                    yield ": keepalive\n\n"
+                if time.monotonic() - checked_at >= EVENTS_KEEPALIVE_SECONDS:
+                    if await run_in_threadpool(_authorize, claims) is None:
+                        return
+                    checked_at = time.monotonic()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
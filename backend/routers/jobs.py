@@ -0,0 +1,80 @@
+"""Background job status endpoints"""
+
+import json
+import logging
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from models import Job, get_db
+from schemas import JobResponse
+from utils import AuthenticatedUser, get_current_user, require_role
+from config import EXPORT_DIR
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+def _get_visible_job(db: Session, job_id: int, current_user: AuthenticatedUser) -> Job:
+    """Fetch a job the current user may see (their own, or any for admins)"""
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if job is None or (current_user.role != "admin" and job.created_by != current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+
+@router.get("", response_model=List[JobResponse])
+async def get_jobs(
+    job_status: Optional[str] = None,
+    job_type: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(require_role(["admin"]))
+):
+    """List jobs, newest first (Admin only)"""
+    query = db.query(Job)
+    if job_status:
+        query = query.filter(Job.status == job_status)
+    if job_type:
+        query = query.filter(Job.job_type == job_type)
+    return query.order_by(Job.id.desc()).offset(skip).limit(limit).all()
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """Get status and progress of a job"""
+    return _get_visible_job(db, job_id, current_user)
+
+
+@router.get("/{job_id}/download")
+async def download_job_result(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """Download the file produced by a finished export job"""
+    job = _get_visible_job(db, job_id, current_user)
+    result = json.loads(job.result) if job.status == "succeeded" and job.result else {}
+    if not result.get("file"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job has no downloadable result"
+        )
+    
+    path = EXPORT_DIR / result["file"]
+    if not path.is_file():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export file no longer exists"
+        )
+    return FileResponse(path, filename=result["file"])
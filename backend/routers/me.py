@@ -0,0 +1,122 @@
+"""Composite endpoints for the signed-in user's own pages"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from models import Attendance, Course, Enrollment, Student, User, get_db
+from schemas import MeOverview, StudentResponse, UserResponse
+from utils import AuthenticatedUser, get_current_user
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/me", tags=["Me"])
+
+# Newest attendance records included in the overview
+RECENT_ATTENDANCE = 30
+
+ATTENDANCE_STATUSES = ("Present", "Absent", "Late", "Excused")
+
+
+def _attendance_summary(db: Session, student_id: Optional[int]) -> dict:
+    """Counts per status and today's status, from one GROUP BY query"""
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+    counts = {name: 0 for name in ATTENDANCE_STATUSES}
+    today_status = None
+    rows = [] if student_id is None else (
+        db.query(Attendance.status, func.count(Attendance.id), func.max(Attendance.date))
+        .filter(Attendance.student_id == student_id)
+        .group_by(Attendance.status)
+        .all()
+    )
+    for status_name, count, last_marked in rows:
+        counts[status_name] = count
+        # One record per student and day, so at most one status has today's date
+        if last_marked is not None and today <= last_marked < today + timedelta(days=1):
+            today_status = status_name
+    total = sum(counts.values())
+    return {
+        "present": counts["Present"],
+        "absent": counts["Absent"],
+        "late": counts["Late"],
+        "excused": counts["Excused"],
+        "total": total,
+        "percent": round(counts["Present"] * 100 / total) if total else 0,
+        "today": today_status
+    }
+
+
+@router.get("/overview", response_model=MeOverview)
+async def get_overview(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Profile, enrollments, attendance summary and recent attendance in one response
+
+    Everything the student landing pages need, from four indexed queries in
+    one session. Users without a student profile get empty enrollments and
+    attendance.
+    """
+    try:
+        row = (
+            db.query(User, Student)
+            .outerjoin(Student, Student.user_id == User.id)
+            .filter(User.id == current_user.id)
+            .first()
+        )
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        user, student = row
+
+        summary = _attendance_summary(db, student.id if student is not None else None)
+        enrollments = []
+        recent = []
+        if student is not None:
+            enrollments = [
+                {**enrollment._asdict(), "student_name": student.full_name}
+                for enrollment in db.query(
+                    Enrollment.id,
+                    Enrollment.student_id,
+                    Enrollment.course_id,
+                    Enrollment.enrolled_at,
+                    Enrollment.grade,
+                    Enrollment.status,
+                    Enrollment.updated_at,
+                    Course.course_name
+                )
+                .join(Course, Course.id == Enrollment.course_id)
+                .filter(Enrollment.student_id == student.id)
+                .order_by(Enrollment.enrolled_at, Enrollment.id)
+                .all()
+            ]
+            recent = [
+                record._asdict()
+                for record in db.query(Attendance.date, Attendance.status, Attendance.remarks)
+                .filter(Attendance.student_id == student.id)
+                .order_by(Attendance.date.desc(), Attendance.id.desc())
+                .limit(RECENT_ATTENDANCE)
+                .all()
+            ]
+
+        return {
+            "user": UserResponse.model_validate(user),
+            "student": StudentResponse.model_validate(student) if student is not None else None,
+            "enrollments": enrollments,
+            "attendance": summary,
+            "recent_attendance": recent
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error loading overview: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error loading overview"
+        )
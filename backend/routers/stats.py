@@ -0,0 +1,124 @@
+"""Aggregate statistics endpoints"""
+
+import logging
+from collections import defaultdict
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from models import Student, Course, Enrollment, get_db
+from schemas import DepartmentGrades, DepartmentStats
+from utils import AuthenticatedUser, require_role
+from utils.grades import summarize
+from utils.stats_cache import stats_cache
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/stats", tags=["Stats"])
+
+
+def _department_stats(db: Session, department: Optional[str]) -> List[dict]:
+    """Per-department counts from two GROUP BY queries"""
+    students = db.query(
+        Student.department, Student.year_of_study, func.count(Student.id)
+    )
+    if department:
+        students = students.filter(Student.department == department)
+    students = students.group_by(Student.department, Student.year_of_study)
+
+    # Grouped by every selected column for ONLY_FULL_GROUP_BY; waitlisted
+    # enrollments are not counted (in the join, so empty courses stay listed)
+    courses = db.query(
+        Course.department, Course.id, Course.course_code, Course.course_name, Course.credits,
+        func.count(Enrollment.id)
+    ).outerjoin(Enrollment, and_(Enrollment.course_id == Course.id, Enrollment.status == "enrolled"))
+    if department:
+        courses = courses.filter(Course.department == department)
+    courses = courses.group_by(
+        Course.department, Course.id, Course.course_code, Course.course_name, Course.credits
+    )
+
+    departments = defaultdict(lambda: {
+        "students": 0, "students_by_year": {}, "courses": 0, "credits": 0, "enrollments": 0, "course_load": []
+    })
+    for dept, year, count in students.all():
+        entry = departments[dept]
+        entry["students"] += count
+        entry["students_by_year"][year] = count
+    for dept, course_id, code, name, credits, enrollments in courses.all():
+        entry = departments[dept]
+        entry["courses"] += 1
+        entry["credits"] += credits
+        entry["enrollments"] += enrollments
+        entry["course_load"].append({
+            "course_id": course_id,
+            "course_code": code,
+            "course_name": name,
+            "credits": credits,
+            "enrollments": enrollments
+        })
+
+    result = []
+    for dept in sorted(departments):
+        entry = departments[dept]
+        entry["course_load"].sort(key=lambda c: (-c["enrollments"], c["course_code"]))
+        result.append({"department": dept, **entry})
+    return result
+
+
+@router.get("/departments", response_model=List[DepartmentStats])
+async def get_department_stats(
+    department: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(require_role(["admin", "faculty"]))
+):
+    """Students by year, courses, credits and enrollment load per department (Admin/Faculty only)
+
+    Results are cached for STATS_CACHE_SECONDS and cleared by student,
+    course and enrollment writes.
+    """
+    try:
+        return stats_cache.get(("departments", department), lambda: _department_stats(db, department))
+    except Exception as e:
+        logger.exception("Error computing department stats: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error computing department stats"
+        )
+
+
+def _grade_stats(db: Session, department: Optional[str]) -> List[dict]:
+    """Per-department grade distributions and GPAs from one GROUP BY query"""
+    query = (
+        db.query(Student.department, Enrollment.grade, func.count(Enrollment.id), func.sum(Course.credits))
+        .join(Student, Student.id == Enrollment.student_id)
+        .join(Course, Course.id == Enrollment.course_id)
+        .filter(Enrollment.status == "enrolled")
+    )
+    if department:
+        query = query.filter(Student.department == department)
+    rows = defaultdict(list)
+    for dept, grade, count, credits in query.group_by(Student.department, Enrollment.grade).all():
+        rows[dept].append((grade, count, credits))
+    return [{"department": dept, **summarize(rows[dept])} for dept in sorted(rows)]
+
+
+@router.get("/grades", response_model=List[DepartmentGrades])
+async def get_grade_stats(
+    department: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(require_role(["admin", "faculty"]))
+):
+    """Grade distribution and credit-weighted GPA per student department (Admin/Faculty only)
+
+    Cached like /stats/departments; grade imports and enrollment writes clear it.
+    """
+    try:
+        return stats_cache.get(("grades", department), lambda: _grade_stats(db, department))
+    except Exception as e:
+        logger.exception("Error computing grade stats: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error computing grade stats"
+        )
@@ -1,56 +1,99 @@
 """Student management endpoints"""
 
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from typing import List
+from typing import List, Optional
 
-from models import Student, User, get_db
-from schemas import StudentCreate, StudentResponse
-from utils import get_current_user, require_role
+from models import Enrollment, Student, User, get_db, utc_now
+from schemas import StudentCreate, StudentResponse, StudentPurge, PurgeResult, JobAccepted, OrNotFound
+from utils import AuthenticatedUser, get_current_user, require_role
+from utils.batch import fetch_by_ids
+from utils.db_errors import raise_for_unique_violation
+from utils.etags import etag, missing_or_modified, parse_if_match
+from utils.fieldsets import FieldSet, sparse_response
+from utils.events import broadcaster
+from utils.seats import enrolled_counts, release_seats
+from utils.stats_cache import stats_cache
+from jobs import enqueue
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/students", tags=["Students"])
 
+student_fields = FieldSet(Student, StudentResponse)
 
-@router.get("", response_model=List[StudentResponse])
+# Unique columns -> message when a write would duplicate them
+DUPLICATE_DETAILS = {
+    "roll_number": "Roll number already exists",
+    "email": "Email already exists",
+    "user_id": "User account is already linked to a student",
+}
+
+
+@router.get("", response_model=List[OrNotFound(StudentResponse)])
 async def get_all_students(
     skip: int = 0,
     limit: int = 100,
     department: str = None,
+    ids: Optional[str] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
-    """Get all students with pagination"""
+    """Get all students with pagination
+
+    With ``ids=1,2,3`` returns exactly those students in the given order
+    (other filters are ignored); missing ids come back as ``{"id": ..., "found": false}``.
+    With ``fields=id,full_name`` only those fields are selected and returned.
+    """
+    selected = student_fields.parse(fields)
+    if ids is not None:
+        if selected:
+            return sparse_response(fetch_by_ids(db, Student, ids, query=student_fields.query(db, selected)))
+        return fetch_by_ids(db, Student, ids)
     try:
-        query = db.query(Student)
+        query = db.query(Student) if selected is None else student_fields.query(db, selected)
         if department:
             query = query.filter(Student.department == department)
         students = query.offset(skip).limit(limit).all()
-        return students
+        return students if selected is None else sparse_response(students)
     except Exception as e:
-        logger.exception(f"Error fetching students: {e}")
+        logger.exception("Error fetching students: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error fetching students"
         )
 
 
+@router.post("/export", response_model=JobAccepted, status_code=status.HTTP_202_ACCEPTED)
+async def export_students(
+    department: str = None,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(require_role(["admin", "faculty"]))
+):
+    """Start a CSV export of students as a background job (Admin/Faculty only)"""
+    job_id = enqueue(db, "export_students", created_by=current_user.id, department=department)
+    return {"job_id": job_id, "status_url": f"/jobs/{job_id}"}
+
+
 @router.get("/{student_id}", response_model=StudentResponse)
 async def get_student(
     student_id: int, 
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
-    """Get a single student by ID"""
+    """Get a single student by ID (with an ETag for If-Match on PUT)"""
     db_student = db.query(Student).filter(Student.id == student_id).first()
     if db_student is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Student not found"
         )
+    if db_student.updated_at is not None:
+        response.headers["ETag"] = etag(db_student.updated_at)
     return db_student
 
 
@@ -58,29 +101,27 @@ async def get_student(
 async def create_student(
     student: StudentCreate, 
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(["admin", "faculty"]))
+    current_user: AuthenticatedUser = Depends(require_role(["admin", "faculty"]))
 ):
-    """Create a new student (Admin/Faculty only)"""
+    """Create a new student (Admin/Faculty only)
+
+    Duplicate roll numbers and emails are rejected by the unique constraints
+    rather than checked for first.
+    """
     try:
-        # Check if roll number already exists
-        existing_student = db.query(Student).filter(Student.roll_number == student.roll_number.upper()).first()
-        if existing_student:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Roll number already exists"
-            )
-        
-        # Check if email already exists
-        existing_email = db.query(Student).filter(Student.email == student.email.lower()).first()
-        if existing_email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already exists"
-            )
+        # Link to the given user account, or to an unlinked student account
+        # registered with the same email
+        user_id = student.user_id
+        if user_id is None:
+            user_id = db.query(User.id).outerjoin(Student, Student.user_id == User.id).filter(
+                User.email == student.email.lower(),
+                User.role == "student",
+                Student.id.is_(None)
+            ).scalar()
         
         # Create new student
         db_student = Student(
-            user_id=student.user_id,  # Link to user account if provided
+            user_id=user_id,
             full_name=student.full_name,
             roll_number=student.roll_number.upper(),
             email=student.email.lower(),
@@ -90,13 +131,19 @@ async def create_student(
         )
         
         db.add(db_student)
+        db.flush()
+        # Built before the commit expires the instance, so it is not reloaded
+        created = StudentResponse.model_validate(db_student)
         db.commit()
-        db.refresh(db_student)
+        stats_cache.invalidate()
+        broadcaster.publish("student", {"op": "created", "id": created.id}, [f"department:{created.department}"])
+        broadcaster.publish("dashboard", {"students": 1}, ["dashboard"])
         
-        return db_student
+        return created
         
-    except IntegrityError:
+    except IntegrityError as e:
         db.rollback()
+        raise_for_unique_violation(e, DUPLICATE_DETAILS)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Student with this roll number or email already exists"
@@ -105,7 +152,7 @@ async def create_student(
         raise
     except Exception as e:
         db.rollback()
-        logger.exception(f"Error creating student: {e}")
+        logger.exception("Error creating student: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error creating student"
@@ -116,58 +163,52 @@ async def create_student(
 async def update_student(
     student_id: int,
     student_update: StudentCreate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(["admin", "faculty"]))
+    current_user: AuthenticatedUser = Depends(require_role(["admin", "faculty"]))
 ):
-    """Update a student (Admin/Faculty only)"""
+    """Update a student (Admin/Faculty only)
+
+    A single UPDATE; duplicate roll numbers and emails are rejected by the
+    unique constraints. With ``If-Match`` set to the student's ETag the update
+    only applies if the student was not changed since (412 otherwise).
+    """
+    expected = parse_if_match(if_match)
     try:
-        db_student = db.query(Student).filter(Student.id == student_id).first()
-        if db_student is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Student not found"
-            )
-        
-        # Check for duplicate roll number
-        existing_roll = db.query(Student).filter(
-            Student.roll_number == student_update.roll_number.upper(),
-            Student.id != student_id
-        ).first()
-        if existing_roll:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Roll number already exists"
-            )
-        
-        # Check for duplicate email
-        existing_email = db.query(Student).filter(
-            Student.email == student_update.email.lower(),
-            Student.id != student_id
-        ).first()
-        if existing_email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already exists"
-            )
-        
-        # Update fields
-        db_student.full_name = student_update.full_name
-        db_student.roll_number = student_update.roll_number.upper()
-        db_student.email = student_update.email.lower()
-        db_student.phone_number = student_update.phone_number
-        db_student.department = student_update.department
-        db_student.year_of_study = student_update.year_of_study
-        
+        row = student_fields.update(db, student_id, {
+            "full_name": student_update.full_name,
+            "roll_number": student_update.roll_number.upper(),
+            "email": student_update.email.lower(),
+            "phone_number": student_update.phone_number,
+            "department": student_update.department,
+            "year_of_study": student_update.year_of_study,
+            "updated_at": utc_now()
+        }, updated_at=expected)
+        if row is None:
+            raise missing_or_modified(db, Student, student_id, expected, "Student not found")
         db.commit()
-        db.refresh(db_student)
+        stats_cache.invalidate()
+        # The previous department is not read back, so only the new one is told
+        broadcaster.publish("student", {"op": "updated", "id": row.id}, [f"department:{row.department}"])
         
-        return db_student
+        response.headers["ETag"] = etag(row.updated_at)
+        return row._asdict()
         
+    except IntegrityError as e:
+        db.rollback()
+        raise_for_unique_violation(e, DUPLICATE_DETAILS)
+        logger.exception("Error updating student: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error updating student"
+        )
     except HTTPException:
+        db.rollback()
         raise
     except Exception as e:
         db.rollback()
-        logger.exception(f"Error updating student: {e}")
+        logger.exception("Error updating student: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error updating student"
@@ -178,19 +219,27 @@ async def update_student(
 async def delete_student(
     student_id: int, 
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(["admin", "faculty"]))
+    current_user: AuthenticatedUser = Depends(require_role(["admin", "faculty"]))
 ):
-    """Delete a student (Admin/Faculty only)"""
+    """Delete a student (Admin/Faculty only)
+
+    Enrollments and attendance go with it via ON DELETE CASCADE, so this is
+    one statement however long the student's history is (plus giving the
+    student's course seats to waitlisted students).
+    """
     try:
-        db_student = db.query(Student).filter(Student.id == student_id).first()
-        if db_student is None:
+        seats = enrolled_counts(db, Enrollment.student_id == student_id)
+        deleted = db.query(Student).filter(Student.id == student_id).delete(synchronize_session=False)
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Student not found"
             )
+        release_seats(db, seats)
         
-        db.delete(db_student)
         db.commit()
+        stats_cache.invalidate()
+        broadcaster.publish("dashboard", {"students": -1}, ["dashboard"])
         
         return None
         
@@ -198,8 +247,40 @@ async def delete_student(
         raise
     except Exception as e:
         db.rollback()
-        logger.exception(f"Error deleting student: {e}")
+        logger.exception("Error deleting student: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error deleting student"
         )
+
+
+@router.post("/purge", response_model=PurgeResult)
+async def purge_students(
+    cohort: StudentPurge,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(require_role(["admin"]))
+):
+    """Delete a departing cohort with its enrollments and attendance (Admin only)"""
+    try:
+        query = db.query(Student).filter(Student.year_of_study == cohort.year_of_study)
+        if cohort.department:
+            query = query.filter(Student.department == cohort.department)
+        seats = enrolled_counts(db, Enrollment.student_id.in_(query.with_entities(Student.id).statement))
+        deleted = query.delete(synchronize_session=False)
+        release_seats(db, seats)
+        db.commit()
+        stats_cache.invalidate()
+        if deleted:
+            broadcaster.publish("dashboard", {"students": -deleted}, ["dashboard"])
+        logger.info(
+            "User %s purged %s students (year_of_study=%r, department=%r)",
+            current_user.id, deleted, cohort.year_of_study, cohort.department
+        )
+        return {"deleted": deleted}
+    except Exception as e:
+        db.rollback()
+        logger.exception("Error purging students: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error purging students"
+        )
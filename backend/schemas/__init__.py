@@ -2,7 +2,8 @@
 
 from pydantic import BaseModel, EmailStr, field_validator, Field
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, Any, Dict, List, Optional, Union
+import json
 import re
 
 
@@ -134,6 +135,16 @@ class StudentCreate(BaseModel):
         return v.strip()
 
 
+class StudentPurge(BaseModel):
+    """Selects a departing cohort; department narrows it further"""
+    year_of_study: str
+    department: Optional[str] = None
+
+
+class PurgeResult(BaseModel):
+    deleted: int
+
+
 class StudentResponse(BaseModel):
     id: int
     user_id: Optional[int] = None
@@ -143,6 +154,7 @@ class StudentResponse(BaseModel):
     phone_number: str
     department: str
     year_of_study: str
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -156,6 +168,8 @@ class CourseCreate(BaseModel):
     description: Optional[str] = None
     credits: int = Field(default=3, ge=1, le=6)
     department: str
+    # Seat limit; students beyond it are waitlisted (None: unlimited)
+    capacity: Optional[int] = Field(None, ge=1)
 
     @field_validator('course_code')
     @classmethod
@@ -187,6 +201,9 @@ class CourseResponse(BaseModel):
     credits: int
     department: str
     instructor_id: Optional[int]
+    capacity: Optional[int] = None
+    seats_taken: int = 0
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -213,6 +230,20 @@ class AttendanceResponse(AttendanceBase):
         from_attributes = True
 
 
+class CheckinCode(BaseModel):
+    code: str
+    expires_at: datetime
+
+
+class CheckinRequest(BaseModel):
+    code: str = Field(..., max_length=1000)
+
+
+class CheckinResponse(BaseModel):
+    student_id: int
+    checked_in_at: datetime
+
+
 # ============== Enrollment Schemas ==============
 
 class EnrollmentCreate(BaseModel):
@@ -230,8 +261,139 @@ class EnrollmentResponse(BaseModel):
     course_id: int
     enrolled_at: datetime
     grade: Optional[str]
+    status: str = "enrolled"
     student_name: Optional[str] = None
     course_name: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+# ============== Overview Schemas ==============
+
+class AttendanceSummary(BaseModel):
+    present: int
+    absent: int
+    late: int
+    excused: int
+    total: int
+    # Share of days present, in percent
+    percent: int
+    # Today's status, if marked
+    today: Optional[str] = None
+
+
+class AttendanceDay(BaseModel):
+    date: datetime
+    status: str
+    remarks: Optional[str] = None
+
+
+class MeOverview(BaseModel):
+    user: UserResponse
+    student: Optional[StudentResponse] = None
+    enrollments: List[EnrollmentResponse]
+    attendance: AttendanceSummary
+    recent_attendance: List[AttendanceDay]
+
+
+# ============== Grade Schemas ==============
+
+class GradeEntry(BaseModel):
+    roll_number: str = Field(..., min_length=1, max_length=20)
+    grade: str = Field(..., min_length=1, max_length=5)
+
+
+class GradeImportResult(BaseModel):
+    course_id: int
+    updated: int
+
+
+class GradeSummary(BaseModel):
+    graded: int
+    ungraded: int
+    distribution: Dict[str, int]
+    # Credit-weighted, over grades with grade points
+    gpa: Optional[float] = None
+
+
+class CourseGrades(GradeSummary):
+    course_id: int
+
+
+class DepartmentGrades(GradeSummary):
+    department: str
+
+
+# ============== Stats Schemas ==============
+
+class CourseLoad(BaseModel):
+    course_id: int
+    course_code: str
+    course_name: str
+    credits: int
+    enrollments: int
+
+
+class DepartmentStats(BaseModel):
+    department: str
+    students: int
+    students_by_year: Dict[str, int]
+    courses: int
+    credits: int
+    enrollments: int
+    course_load: List[CourseLoad]
+
+
+# ============== Events Schemas ==============
+
+class EventsTicket(BaseModel):
+    ticket: str
+    expires_in: int
+
+
+# ============== Job Schemas ==============
+
+class JobResponse(BaseModel):
+    id: int
+    job_type: str
+    status: str
+    progress: int
+    message: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    error: Optional[str] = None
+    result: Optional[Any] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
+
+    @field_validator('result', mode='before')
+    @classmethod
+    def parse_result(cls, v):
+        return json.loads(v) if isinstance(v, str) else v
+
+
+class JobAccepted(BaseModel):
+    job_id: int
+    status: str = "queued"
+    status_url: str
+
+
+# ============== Batch Schemas ==============
+
+class NotFoundItem(BaseModel):
+    """Placeholder for a requested id with no matching record (``?ids=`` lookups)"""
+    id: int
+    found: bool = False
+
+
+def OrNotFound(model):
+    """List item type for endpoints supporting ``?ids=``
+
+    ``model`` is tried first, so ordinary rows are validated once.
+    """
+    return Annotated[Union[model, NotFoundItem], Field(union_mode="left_to_right")]
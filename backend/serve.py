@@ -0,0 +1,154 @@
+"""Production server entry point
+
+Runs the API under uvicorn with pre-forked worker processes::
+
+    python serve.py --workers 4
+
+Defaults come from the SERVER_* settings. With several workers the schema
+check (STARTUP_SCHEMA_MODE) runs once here in the master process and is
+skipped in the workers; a single worker runs in this process and does it
+at startup as usual. On SIGTERM every worker stops accepting connections, lets
+in-flight requests finish (up to SERVER_GRACEFUL_TIMEOUT_SECONDS) and then
+runs the app's shutdown, which closes its database connections.
+"""
+
+import argparse
+import logging
+import os
+import sys
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def use_worker_count(argv: List[str]) -> None:
+    """Put ``--workers`` in the environment before config is first imported
+
+    Settings are read once per process, when config is imported, and the
+    connection pool (DB_POOL_SIZE) is sized by SERVER_WORKERS.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--workers", type=int)
+    workers = parser.parse_known_args(argv)[0].workers
+    if workers is not None:
+        os.environ["SERVER_WORKERS"] = str(max(1, workers))
+
+
+def prepare_schema() -> None:
+    """Apply STARTUP_SCHEMA_MODE once before any worker starts"""
+    from config import STARTUP_SCHEMA_MODE
+    from models import create_tables, verify_schema, engine
+
+    if STARTUP_SCHEMA_MODE == "create":
+        create_tables()
+    elif STARTUP_SCHEMA_MODE == "verify":
+        verify_schema()
+    # Workers open their own connections
+    engine.dispose()
+
+
+def serve(
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    workers: Optional[int] = None,
+    loop: Optional[str] = None,
+    http: Optional[str] = None,
+    backlog: Optional[int] = None,
+    keepalive: Optional[int] = None,
+    graceful_timeout: Optional[int] = None
+) -> None:
+    """Run the API server; options left out come from the SERVER_* settings
+
+    Call use_worker_count (or set SERVER_WORKERS) before config is imported
+    so this process's connection pool matches ``workers``.
+    """
+    import uvicorn
+    import config
+
+    host = config.SERVER_HOST if host is None else host
+    port = config.SERVER_PORT if port is None else port
+    workers = max(1, config.SERVER_WORKERS if workers is None else workers)
+    loop = config.SERVER_LOOP if loop is None else loop
+    http = config.SERVER_HTTP if http is None else http
+    backlog = config.SERVER_BACKLOG if backlog is None else backlog
+    keepalive = config.SERVER_KEEPALIVE_SECONDS if keepalive is None else keepalive
+    if graceful_timeout is None:
+        graceful_timeout = config.SERVER_GRACEFUL_TIMEOUT_SECONDS
+
+    if workers > 1:
+        prepare_schema()
+        # Workers are separate interpreters that read their settings from
+        # the environment: they size their connection pools by the worker
+        # count and must not repeat the schema check
+        os.environ["SERVER_WORKERS"] = str(workers)
+        os.environ["STARTUP_SCHEMA_MODE"] = "skip"
+
+    logger.info("Starting server on %s:%s with %d worker(s)", host, port, workers)
+    uvicorn.run(
+        "main:app",
+        host=host,
+        port=port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        backlog=backlog,
+        timeout_keep_alive=keepalive,
+        timeout_graceful_shutdown=graceful_timeout,
+        log_level=config.LOG_LEVEL.lower(),
+        # Keep uvicorn's loggers on the app's queue handler (utils/logs.py)
+        log_config=None
+    )
+
+
+def main() -> None:
+    use_worker_count(sys.argv[1:])
+    from config import (
+        SERVER_HOST,
+        SERVER_PORT,
+        SERVER_WORKERS,
+        SERVER_LOOP,
+        SERVER_HTTP,
+        SERVER_BACKLOG,
+        SERVER_KEEPALIVE_SECONDS,
+        SERVER_GRACEFUL_TIMEOUT_SECONDS
+    )
+
+    parser = argparse.ArgumentParser(description="Student Management System API")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    parser.add_argument("--loop", default=SERVER_LOOP, help="auto, asyncio or uvloop")
+    parser.add_argument("--http", default=SERVER_HTTP, help="auto, h11 or httptools")
+    parser.add_argument("--backlog", type=int, default=SERVER_BACKLOG)
+    parser.add_argument("--keepalive", type=int, default=SERVER_KEEPALIVE_SECONDS,
+                        help="seconds an idle keep-alive connection is held open")
+    parser.add_argument("--graceful-timeout", type=int, default=SERVER_GRACEFUL_TIMEOUT_SECONDS,
+                        help="seconds in-flight requests get to finish on shutdown")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="report import and startup timings instead of serving"
+    )
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        from startup_profile import profile_startup
+        profile_startup()
+        return
+
+    from utils.logs import configure_logging
+    configure_logging()
+    serve(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=args.loop,
+        http=args.http,
+        backlog=args.backlog,
+        keepalive=args.keepalive,
+        graceful_timeout=args.graceful_timeout
+    )
+
+
+if __name__ == "__main__":
+    main()
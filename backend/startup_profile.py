@@ -0,0 +1,78 @@
+"""Startup profiling for ``python main.py --profile-startup``
+
+Runs the app's import and lifespan startup in fresh interpreters (so nothing
+is already cached in ``sys.modules``) and reports where the time goes.
+"""
+
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+BACKEND_DIR = Path(__file__).parent
+
+# Number of slowest modules listed in the report
+TOP_IMPORTS = 25
+
+_PHASES_SCRIPT = """
+import asyncio, json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+
+async def startup():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+t2 = asyncio.run(startup())
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "lifespan_ms": (t2 - t1) * 1000}))
+"""
+
+
+def import_times() -> List[Tuple[int, int, str]]:
+    """(self us, cumulative us, module) for every module imported by main"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), module.strip()))
+    return rows
+
+
+def phase_times() -> dict:
+    """Wall-clock milliseconds for interpreter start, import and lifespan startup"""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", _PHASES_SCRIPT],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    total_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"Startup failed:\n{proc.stderr}")
+    phases = json.loads(proc.stdout.strip().splitlines()[-1])
+    phases["total_ms"] = total_ms
+    phases["interpreter_ms"] = total_ms - phases["import_ms"] - phases["lifespan_ms"]
+    return phases
+
+
+def profile_startup() -> None:
+    """Print a startup timing report"""
+    phases = phase_times()
+    print("Startup phases (ms)")
+    print(f"  interpreter   {phases['interpreter_ms']:8.1f}")
+    print(f"  import main   {phases['import_ms']:8.1f}")
+    print(f"  lifespan      {phases['lifespan_ms']:8.1f}")
+    print(f"  total         {phases['total_ms']:8.1f}")
+
+    rows = import_times()
+    print(f"\nSlowest imports by cumulative time (top {TOP_IMPORTS})")
+    print(f"  {'cumulative ms':>13}  {'self ms':>8}  module")
+    for self_us, cumulative_us, module in sorted(rows, key=lambda r: r[1], reverse=True)[:TOP_IMPORTS]:
+        print(f"  {cumulative_us / 1000:13.1f}  {self_us / 1000:8.1f}  {module}")
@@ -1,6 +1,7 @@
 """Utility functions for security and authentication"""
 
 import logging
+import uuid
 from fastapi import Depends, HTTPException, status, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
@@ -9,8 +10,16 @@ from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 import bcrypt
 
-from models import User, get_db
-from config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS
+from models import User, Student, get_db
+from config import (
+    load_secret_key,
+    ALGORITHM,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    REFRESH_TOKEN_EXPIRE_DAYS,
+    BCRYPT_ROUNDS
+)
+from .revocation import revocation_store
+from .token_versions import token_versions
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +27,21 @@ logger = logging.getLogger(__name__)
 security = HTTPBearer()
 
 
+class AuthenticatedUser:
+    """The caller of a request, as described by its verified access token
+
+    ``student_id`` is the linked student profile of a student user, or None
+    (other roles, or a token issued before the profile was linked).
+    """
+
+    __slots__ = ("id", "role", "student_id")
+
+    def __init__(self, id: int, role: str, student_id: Optional[int] = None):
+        self.id = id
+        self.role = role
+        self.student_id = student_id
+
+
 def get_password_hash(password: str) -> str:
     """Hash a password using bcrypt"""
     if isinstance(password, bytes):
@@ -26,7 +50,7 @@ def get_password_hash(password: str) -> str:
     password = str(password)
     password_bytes = password.encode('utf-8')[:72]
     
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
@@ -44,6 +68,42 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
+def link_student_profile(db: Session, user: User) -> Optional[int]:
+    """Id of the student profile linked to a student user
+
+    A profile created by an admin before the account existed (same email,
+    not linked to anyone yet) is linked to the user here; the caller commits.
+    """
+    if user.role != "student":
+        return None
+    student_id = db.query(Student.id).filter(Student.user_id == user.id).scalar()
+    if student_id is not None:
+        return student_id
+    student_id = db.query(Student.id).filter(
+        Student.email == user.email.lower(),
+        Student.user_id.is_(None)
+    ).scalar()
+    if student_id is None:
+        return None
+    # Conditional, so a concurrent link to another user is not overwritten
+    linked = db.query(Student).filter(Student.id == student_id, Student.user_id.is_(None)).update(
+        {"user_id": user.id}, synchronize_session=False
+    )
+    return student_id if linked else None
+
+
+def token_claims(user: User, student_id: Optional[int] = None) -> dict:
+    """Claims identifying a user in issued tokens
+
+    ``sid`` carries a student's profile id so self-service requests do not
+    have to look it up.
+    """
+    claims = {"sub": str(user.id), "role": user.role, "ver": user.token_version or 0}
+    if student_id is not None:
+        claims["sid"] = student_id
+    return claims
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -51,8 +111,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
+    encoded_jwt = jwt.encode(to_encode, load_secret_key(), algorithm=ALGORITHM)
     return encoded_jwt
 
 
@@ -60,18 +120,18 @@ def create_refresh_token(data: dict) -> str:
     """Create a JWT refresh token"""
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
+    encoded_jwt = jwt.encode(to_encode, load_secret_key(), algorithm=ALGORITHM)
     return encoded_jwt
 
 
 def decode_token(token: str) -> dict:
     """Decode and validate a JWT token"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, load_secret_key(), algorithms=[ALGORITHM])
         return payload
     except JWTError as e:
-        logger.warning(f"JWT Decode Error: {e}")
+        logger.warning("JWT Decode Error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
@@ -79,11 +139,38 @@ def decode_token(token: str) -> dict:
         )
 
 
-def get_current_user(
+def get_token_payload(
     credentials: HTTPAuthorizationCredentials = Security(security),
     db: Session = Depends(get_db)
-) -> User:
-    """Dependency to get the current authenticated user"""
+) -> dict:
+    """Dependency to get the claims of a valid, unrevoked access token"""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    payload = decode_token(credentials.credentials)
+    # Refresh and password reset tokens carry a type and are not access tokens
+    if payload.get("sub") is None or payload.get("type") is not None:
+        raise credentials_exception
+    
+    revocation_store.sync(db)
+    if revocation_store.is_revoked(payload.get("jti")):
+        raise credentials_exception
+    return payload
+
+
+def get_current_user(
+    payload: dict = Depends(get_token_payload),
+    db: Session = Depends(get_db)
+) -> AuthenticatedUser:
+    """Dependency to get the current authenticated user
+    
+    The user row is not fetched: the token's version claim is checked against
+    the in-memory token version map, so deactivation and role changes (which
+    bump the version) take effect immediately.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -91,28 +178,19 @@ def get_current_user(
     )
     
     try:
-        token = credentials.credentials
-        payload = decode_token(token)
-        user_id: int = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
+        user_id = int(payload.get("sub"))
+    except (TypeError, ValueError):
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
+    version = token_versions.get(db, user_id)
+    if version is None or payload.get("ver") != version:
         raise credentials_exception
-    if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="User account is disabled"
-        )
-    return user
+    return AuthenticatedUser(id=user_id, role=payload.get("role"), student_id=payload.get("sid"))
 
 
 def require_role(allowed_roles: List[str]):
     """Dependency factory to require specific roles"""
-    def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    def role_checker(current_user: AuthenticatedUser = Depends(get_current_user)) -> AuthenticatedUser:
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,40 @@
+"""Batch lookups by id (``?ids=1,2,3`` on list endpoints)"""
+
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+# Most ids accepted in one request; the lookup is a single IN query
+MAX_BATCH_IDS = 5000
+
+
+def parse_ids(ids: str) -> List[int]:
+    """Parse a comma-separated id list, keeping order and duplicates"""
+    try:
+        parsed = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
+        )
+    if not parsed:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids must not be empty")
+    if len(parsed) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_IDS} ids can be requested at once"
+        )
+    return parsed
+
+
+def fetch_by_ids(db: Session, model, ids: str, query=None) -> list:
+    """Rows for the given ids in request order, with a not-found marker for missing ones
+
+    ``query`` may narrow the lookup (e.g. to rows the caller can see); rows it
+    excludes are reported as not found.
+    """
+    requested = parse_ids(ids)
+    query = query if query is not None else db.query(model)
+    rows = {row.id: row for row in query.filter(model.id.in_(set(requested))).all()}
+    return [rows.get(i) or {"id": i, "found": False} for i in requested]
@@ -0,0 +1,253 @@
+"""Write-behind buffer for student self check-ins
+
+A class's worth of students checking in within a minute would be as many
+single-row transactions. Instead ``POST /attendance/checkin`` records the
+check-in here and returns; a background thread writes everything pending
+every CHECKIN_FLUSH_INTERVAL_MS (sooner once CHECKIN_FLUSH_ROWS are waiting)
+as batched inserts that skip students already marked that day.
+
+Pending check-ins are keyed by (student, day), so repeated scans cost
+nothing. Each new one is appended to a log file before it is acknowledged;
+a flush moves the log aside and deletes it once the batch is committed. On
+startup, logs left behind by a crashed worker are replayed. Each worker
+holds an exclusive lock on its own log files, which is how a starting
+worker tells them apart from a crashed worker's.
+
+When CHECKIN_BUFFER_MAX check-ins are pending (the database is down or
+falling behind), ``add`` raises ``BufferFull`` and the endpoint answers 503.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, IO, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from config import (
+    CHECKIN_BUFFER_MAX,
+    CHECKIN_FLUSH_INTERVAL_MS,
+    CHECKIN_FLUSH_ROWS,
+    CHECKIN_LOG_DIR,
+    CHECKIN_LOG_FSYNC
+)
+from models import Attendance, Student, engine
+
+try:
+    import fcntl
+except ImportError:  # Windows: no locks, so run a single worker there
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+REMARKS = "Self check-in"
+
+
+class BufferFull(Exception):
+    """Too many check-ins are waiting to be written"""
+
+
+def _lock(log: IO) -> bool:
+    """Take the exclusive lock on a log file; False if another live worker holds it"""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(log.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _upsert_statement(dialect: str):
+    """INSERT into attendance that leaves an existing record for the student and day alone"""
+    table = Attendance.__table__
+    if dialect == "mysql":
+        return mysql.insert(table).on_duplicate_key_update(id=table.c.id)
+    if dialect == "postgresql":
+        return postgresql.insert(table).on_conflict_do_nothing(index_elements=["student_id", "day"])
+    if dialect == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing(index_elements=["student_id", "day"])
+    raise NotImplementedError(f"Check-ins are not supported on {dialect}")
+
+
+class CheckinBuffer:
+    """Pending check-ins of this worker, flushed to the attendance table in batches"""
+
+    def __init__(self, log_dir: Path, max_pending: int, flush_rows: int, flush_interval_ms: int, fsync: bool = False):
+        self.log_dir = Path(log_dir)
+        self.max_pending = max_pending
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval_ms / 1000
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        # One flush at a time, whether from the thread or stop()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._statement = None
+        # (student_id, day) -> time of the first check-in
+        self._pending: Dict[Tuple[int, date], datetime] = {}
+        self._log = None
+        self._sequence = 0
+        # Set-aside logs whose check-ins are being written (or pending again
+        # after a failed flush); deleted after the next successful flush
+        self._segments: List[Tuple[Path, IO]] = []
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        """Replay logs of crashed workers, open this worker's log and start flushing
+
+        Raises NotImplementedError on a database without an upsert, so the app
+        fails to start instead of acknowledging check-ins it cannot write.
+        """
+        self._statement = _upsert_statement(engine.dialect.name)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        recovered = self._recover()
+        if recovered:
+            logger.warning("Replaying %s buffered check-ins from a previous run", recovered)
+        self._log = self._open_log()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="checkin-flush", daemon=True)
+        self._thread.start()
+        if recovered:
+            self._wake.set()
+
+    def stop(self) -> None:
+        """Stop the flush thread and write what is still pending"""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                if not self._pending and not self._segments:
+                    os.unlink(self._log.name)
+                self._log = None
+
+    def add(self, student_id: int, checked_in_at: datetime) -> bool:
+        """Record a check-in; False if one for the student and day is already pending
+
+        Raises BufferFull when CHECKIN_BUFFER_MAX check-ins are pending.
+        """
+        key = (student_id, checked_in_at.date())
+        with self._lock:
+            if key in self._pending:
+                return False
+            if len(self._pending) >= self.max_pending:
+                raise BufferFull()
+            self._log.write(json.dumps([student_id, checked_in_at.isoformat()]) + "\n")
+            self._log.flush()
+            if self.fsync:
+                os.fsync(self._log.fileno())
+            self._pending[key] = checked_in_at
+            if len(self._pending) >= self.flush_rows:
+                self._wake.set()
+        return True
+
+    def flush(self) -> int:
+        """Write pending check-ins; returns how many were written
+
+        On failure they are pending again and the next flush retries them.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, {}
+                if self._log is not None:
+                    # New check-ins go to a fresh log while this one is written
+                    self._segments.append((Path(self._log.name), self._log))
+                    self._log = self._open_log()
+            rows = [
+                {
+                    "student_id": student_id,
+                    "date": checked_in_at.replace(tzinfo=None),
+                    "status": "Present",
+                    "remarks": REMARKS
+                }
+                for (student_id, _), checked_in_at in batch.items()
+            ]
+            try:
+                self._write(rows)
+            except Exception:
+                logger.exception("Error writing %s buffered check-ins", len(rows))
+                with self._lock:
+                    for key, checked_in_at in batch.items():
+                        self._pending.setdefault(key, checked_in_at)
+                return 0
+            # Every check-in in the set-aside logs was part of this batch;
+            # ones added since are in the current log
+            segments, self._segments = self._segments, []
+            for path, log in segments:
+                os.unlink(path)
+                log.close()
+            return len(rows)
+
+    def _write(self, rows: List[dict]) -> None:
+        statement = self._statement
+        with engine.begin() as conn:
+            for start in range(0, len(rows), self.flush_rows):
+                chunk = rows[start:start + self.flush_rows]
+                # A student deleted since checking in would fail the whole batch
+                existing = set(conn.execute(
+                    select(Student.id).where(Student.id.in_({row["student_id"] for row in chunk}))
+                ).scalars())
+                chunk = [row for row in chunk if row["student_id"] in existing]
+                if chunk:
+                    conn.execute(statement, chunk)
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stopping:
+                break
+            started = time.monotonic()
+            written = self.flush()
+            if written:
+                logger.debug("Flushed %s check-ins in %.3fs", written, time.monotonic() - started)
+
+    def _open_log(self) -> IO:
+        self._sequence += 1
+        path = self.log_dir / f"checkins-{os.getpid()}-{time.time_ns()}-{self._sequence}.log"
+        log = open(path, "a", encoding="utf-8")
+        _lock(log)
+        return log
+
+    def _recover(self) -> int:
+        """Load the logs no live worker holds into pending; returns how many check-ins they had"""
+        for path in sorted(self.log_dir.glob("checkins-*.log")):
+            log = open(path, "r+", encoding="utf-8")
+            if not _lock(log):
+                log.close()
+                continue  # Belongs to a running worker
+            for line in log:
+                try:
+                    student_id, checked_in_at = json.loads(line)
+                    checked_in_at = datetime.fromisoformat(checked_in_at)
+                except ValueError:
+                    continue  # Torn last line of a crashed write
+                self._pending.setdefault((student_id, checked_in_at.date()), checked_in_at)
+            self._segments.append((path, log))
+        return len(self._pending)
+
+
+checkin_buffer = CheckinBuffer(
+    CHECKIN_LOG_DIR,
+    CHECKIN_BUFFER_MAX,
+    CHECKIN_FLUSH_ROWS,
+    CHECKIN_FLUSH_INTERVAL_MS,
+    CHECKIN_LOG_FSYNC
+)
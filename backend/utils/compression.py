@@ -0,0 +1,143 @@
+"""Response compression and precompressed static files
+
+``CompressionMiddleware`` compresses complete (non-streaming) responses
+with brotli when the client accepts it and the ``brotli`` package is
+installed, and with gzip otherwise. Small bodies, content types outside
+the allowlist and responses that are already encoded are sent as-is.
+
+``PrecompressedStaticFiles`` serves a built frontend, preferring the
+``.br``/``.gz`` files written next to each asset at build time.
+"""
+
+import gzip
+import os
+import re
+from typing import Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse
+from starlette.staticfiles import StaticFiles
+
+try:
+    import brotli
+except ImportError:  # Optional; gzip only
+    brotli = None
+
+# Vite's hashed output names, e.g. assets/index-BQ3d8f_x.js
+HASHED_ASSET = re.compile(r"^/?assets/.+-[A-Za-z0-9_-]{8}\.[a-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def _accepted(accept_encoding: str) -> set:
+    """Encodings the client accepts (q=0 excluded)"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if name:
+            accepted.add(name)
+    return accepted
+
+
+def choose_encoding(accept_encoding: str, available: Iterable[str] = ("br", "gzip")) -> Optional[str]:
+    accepted = _accepted(accept_encoding)
+    for encoding in available:
+        if encoding in accepted and (encoding != "br" or brotli is not None):
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing eligible responses"""
+
+    def __init__(self, app, minimum_size: int = 1024, content_types: Iterable[str] = (),
+                 gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = {t.strip().lower() for t in content_types if t.strip()}
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # Held back until the body shows whether to compress
+                start_message = message
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            if message.get("more_body", False) or not self._eligible(start_message["status"], headers, body):
+                # Streaming, small, partial, already encoded or not a compressible type
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if encoding == "br":
+                compressed = brotli.compress(body, quality=self.brotli_quality)
+            else:
+                compressed = gzip.compress(body, compresslevel=self.gzip_level)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _eligible(self, status_code: int, headers: MutableHeaders, body: bytes) -> bool:
+        if status_code in (204, 206, 304) or len(body) < self.minimum_size:
+            return False
+        if "content-encoding" in headers or "content-range" in headers:
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return content_type in self.content_types
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """Static files with precompressed variants and long-lived caching of hashed assets"""
+
+    async def get_response(self, path: str, scope):
+        response = await super().get_response(path, scope)
+        if not isinstance(response, FileResponse) or response.status_code != 200:
+            return response
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is not None:
+            # response.path is the resolved file (index.html for directories)
+            full_path = f"{response.path}.{'br' if encoding == 'br' else 'gz'}"
+            try:
+                stat_result = os.stat(full_path)
+            except OSError:
+                stat_result = None
+            if stat_result is not None:
+                response = FileResponse(
+                    full_path,
+                    stat_result=stat_result,
+                    media_type=response.media_type,
+                    headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+                )
+
+        if HASHED_ASSET.search(path):
+            response.headers["Cache-Control"] = IMMUTABLE
+        else:
+            # index.html and unhashed files must be revalidated to pick up new builds
+            response.headers["Cache-Control"] = "no-cache"
+        return response
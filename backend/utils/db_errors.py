@@ -0,0 +1,63 @@
+"""Translating constraint violations into API errors
+
+Writes rely on the database's unique constraints instead of checking for
+duplicates with a SELECT first. When an INSERT or UPDATE violates one, the
+IntegrityError is parsed for the column involved, and the route turns that
+into a field-specific 400.
+"""
+
+import re
+from typing import Dict, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+
+from models import Base
+
+# MySQL:      Duplicate entry 'CS101' for key 'courses.course_code'  (5.7: key 'course_code')
+# SQLite:     UNIQUE constraint failed: courses.course_code
+# PostgreSQL: duplicate key value violates unique constraint "courses_course_code_key"
+_MYSQL = re.compile(r"Duplicate entry .* for key '(?:(\w+)\.)?(\w+)'")
+_SQLITE = re.compile(r"UNIQUE constraint failed: (\w+)\.(\w+)")
+_POSTGRES = re.compile(r'unique constraint "(\w+)"')
+
+
+def _column_from_constraint(name: str, table: Optional[str] = None) -> Optional[str]:
+    """Column of a unique constraint or index named after it
+
+    Covers ix_<table>_<column>, uq_<table>_<column>, <table>_<column>_key and
+    MySQL's default of naming an unnamed unique constraint after its column.
+    """
+    tables = [Base.metadata.tables[table]] if table in Base.metadata.tables else Base.metadata.tables.values()
+    for candidate in tables:
+        for prefix in (f"ix_{candidate.name}_", f"uq_{candidate.name}_", f"{candidate.name}_", ""):
+            if not name.startswith(prefix):
+                continue
+            column = name[len(prefix):]
+            if column.endswith("_key") and column[:-4] in candidate.columns:
+                column = column[:-4]
+            if column in candidate.columns:
+                return column
+    return None
+
+
+def unique_violation_column(exc: IntegrityError) -> Optional[str]:
+    """Column whose unique constraint the statement violated, if that is what failed"""
+    message = str(exc.orig)
+    match = _SQLITE.search(message)
+    if match:
+        return match.group(2)
+    match = _MYSQL.search(message)
+    if match:
+        return _column_from_constraint(match.group(2), match.group(1))
+    match = _POSTGRES.search(message)
+    if match:
+        return _column_from_constraint(match.group(1))
+    return None
+
+
+def raise_for_unique_violation(exc: IntegrityError, details: Dict[str, str]) -> None:
+    """Raise a 400 with the message for the violated column, if it is one of ``details``"""
+    column = unique_violation_column(exc)
+    if column in details:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=details[column])
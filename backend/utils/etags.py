@@ -0,0 +1,48 @@
+"""ETags from updated_at, for If-Match on PUT
+
+GET and PUT responses of a single student, course or enrollment carry an
+``ETag`` derived from the row's ``updated_at``. A client sending that value
+back as ``If-Match`` only updates the row if nobody changed it in between;
+otherwise it gets 412 and can refetch instead of overwriting the other edit.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+ETAG_FORMAT = "%Y%m%dT%H%M%S.%f"
+
+
+def etag(updated_at: Optional[datetime]) -> Optional[str]:
+    if updated_at is None:
+        return None
+    return f'"{updated_at.strftime(ETAG_FORMAT)}"'
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[datetime]:
+    """updated_at the client expects, or None for no precondition (absent or ``*``)"""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return datetime.strptime(value.strip('"'), ETAG_FORMAT)
+    except ValueError:
+        # Not an ETag this API issued, so it cannot match
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="If-Match does not match the current version"
+        )
+
+
+def missing_or_modified(db: Session, model, row_id: int, expected: Optional[datetime], detail: str) -> HTTPException:
+    """Error for an UPDATE that matched no row: 404 if it is gone, 412 if If-Match failed"""
+    if expected is not None and db.query(model.id).filter(model.id == row_id).first() is not None:
+        return HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="If-Match does not match the current version"
+        )
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
@@ -0,0 +1,105 @@
+"""In-process fan-out of change events to Server-Sent Events subscribers
+
+Routes publish small deltas after their commit::
+
+    broadcaster.publish("attendance", {...}, ["date:2024-01-15", "dashboard"])
+
+Each ``GET /events`` connection subscribes to a few channels and gets an
+``asyncio.Queue``. A message is encoded once and put on the queue of every
+subscriber of its channels, so an idle connection costs a queue and a
+suspended coroutine, not a thread or a database session.
+
+Events only reach clients connected to the worker that published them. With
+several server workers a client sees the changes made through its own
+worker, and refetches when the stream tells it to resync.
+"""
+
+import asyncio
+import json
+import logging
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, Optional, Set
+
+from config import EVENTS_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Sent instead of the missed events when a subscriber falls behind
+RESYNC = "event: resync\ndata: {}\n\n"
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class Broadcaster:
+    """Channel name -> subscriber queues"""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._channels: Dict[str, Set[asyncio.Queue]] = {}
+        self._subscribers = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def subscribers(self) -> int:
+        return self._subscribers
+
+    @contextmanager
+    def subscribe(self, channels: Iterable[str]) -> Iterator[asyncio.Queue]:
+        """Queue receiving the encoded events of the given channels"""
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        channels = set(channels)
+        for channel in channels:
+            self._channels.setdefault(channel, set()).add(queue)
+        self._subscribers += 1
+        try:
+            yield queue
+        finally:
+            self._subscribers -= 1
+            for channel in channels:
+                queues = self._channels.get(channel)
+                if queues is not None:
+                    queues.discard(queue)
+                    if not queues:
+                        del self._channels[channel]
+
+    def publish(self, event: str, data: dict, channels: Iterable[str]) -> None:
+        """Send an event to the subscribers of any of the channels
+
+        Safe to call from a worker thread; delivery then happens on the loop.
+        """
+        if not self._subscribers or self._loop is None:
+            return
+        message = f"event: {event}\ndata: {json.dumps(data, default=_encode, separators=(',', ':'))}\n\n"
+        channels = list(channels)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._deliver(message, channels)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._deliver, message, channels)
+
+    def _deliver(self, message: str, channels: list) -> None:
+        delivered = set()
+        for channel in channels:
+            for queue in self._channels.get(channel, ()):
+                if queue in delivered:
+                    continue
+                delivered.add(queue)
+                try:
+                    queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    # Slow client: drop its backlog and have it refetch
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(RESYNC)
+
+
+broadcaster = Broadcaster(EVENTS_QUEUE_SIZE)
@@ -0,0 +1,104 @@
+"""Sparse fieldsets (``?fields=id,full_name`` on list endpoints)
+
+A ``FieldSet`` maps a response model's field names to columns. Requested
+fields are checked against that allowlist, only their columns are
+selected, and rows are serialized straight from the result tuples without
+building ORM objects or running response model validation.
+
+``FieldSet.update`` applies a single-row UPDATE and returns the response
+fields of the updated row without loading it first.
+"""
+
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Query, Session
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FieldSet:
+    """Selectable fields of one resource
+
+    ``joined`` maps extra fields (e.g. a related row's name) to the column
+    and the outer join needed to select it.
+    """
+
+    def __init__(self, model, schema, joined: Optional[Dict[str, Tuple[Any, Any, Any]]] = None):
+        self.model = model
+        self.names = list(schema.model_fields)
+        self.joined = joined or {}
+        self.columns = {
+            name: getattr(model, name)
+            for name in schema.model_fields
+            if name not in self.joined
+        }
+        self.allowed = set(self.columns) | set(self.joined)
+
+    def parse(self, fields: Optional[str]) -> Optional[List[str]]:
+        """Requested field names (id always included), or None for all fields"""
+        if fields is None:
+            return None
+        names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+        unknown = [name for name in names if name not in self.allowed]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(sorted(self.allowed))}"
+            )
+        if "id" not in names:
+            names.insert(0, "id")
+        return names
+
+    def query(self, db: Session, names: List[str]) -> Query:
+        """Query selecting only the named fields, labelled by name"""
+        query = db.query(*(
+            (self.joined[name][0] if name in self.joined else self.columns[name]).label(name)
+            for name in names
+        )).select_from(self.model)
+        for name in names:
+            if name in self.joined:
+                _, target, onclause = self.joined[name]
+                query = query.outerjoin(target, onclause)
+        return query
+
+    def update(self, db: Session, row_id: int, values: Dict[str, Any],
+               updated_at: Optional[datetime] = None) -> Optional[Row]:
+        """UPDATE one row by id and return all its fields, or None if no row matched
+
+        With ``updated_at`` the row only matches if it still has that value
+        (optimistic concurrency). Uses UPDATE ... RETURNING where the dialect
+        supports it and no joined fields are needed; otherwise the row is read
+        back with one SELECT in the same transaction.
+        """
+        statement = (
+            update(self.model)
+            .where(self.model.id == row_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if updated_at is not None:
+            statement = statement.where(self.model.updated_at == updated_at)
+
+        if not self.joined and db.get_bind().dialect.update_returning:
+            return db.execute(statement.returning(*(self.columns[name].label(name) for name in self.names))).first()
+        if db.execute(statement).rowcount == 0:
+            return None
+        return self.query(db, self.names).filter(self.model.id == row_id).first()
+
+
+def sparse_response(rows: Iterable[Any]) -> Response:
+    """JSON list response from labelled result rows (dicts are passed through)"""
+    items = [row if isinstance(row, dict) else dict(row._mapping) for row in rows]
+    return Response(
+        content=json.dumps(items, default=_encode, ensure_ascii=False, separators=(",", ":")),
+        media_type="application/json"
+    )
@@ -0,0 +1,81 @@
+"""Bulk grade imports and grade statistics
+
+An import is CSV with a ``roll_number,grade`` header row, or a JSON list of
+``{"roll_number": ..., "grade": ...}`` objects. ``parse_grades`` turns either
+into a roll number -> grade map, accepting only the grades in GRADE_POINTS.
+
+``summarize`` turns the (grade, count, credits) rows of one GROUP BY grade
+query into a distribution and a credit-weighted GPA.
+"""
+
+import csv
+import io
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import TypeAdapter, ValidationError
+
+from config import GRADE_IMPORT_MAX_ROWS, GRADE_POINTS
+from schemas import GradeEntry
+
+_entries = TypeAdapter(List[GradeEntry])
+
+
+def _bad_request(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def parse_grades(body: bytes, content_type: str) -> Dict[str, str]:
+    """Roll number -> grade from a CSV or JSON upload"""
+    try:
+        if "json" in content_type:
+            entries = _entries.validate_json(body)
+        else:
+            reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+            if reader.fieldnames is None or not {"roll_number", "grade"} <= {name.strip() for name in reader.fieldnames}:
+                raise _bad_request("CSV needs a header row with roll_number and grade columns")
+            entries = _entries.validate_python([
+                {name.strip(): value for name, value in row.items() if name is not None} for row in reader
+            ])
+    except UnicodeDecodeError:
+        raise _bad_request("CSV must be UTF-8")
+    except (ValidationError, csv.Error) as e:
+        raise _bad_request(f"Invalid grades: {e}")
+
+    if not entries:
+        raise _bad_request("No grades given")
+    if len(entries) > GRADE_IMPORT_MAX_ROWS:
+        raise _bad_request(f"At most {GRADE_IMPORT_MAX_ROWS} grades per import")
+
+    grades: Dict[str, str] = {}
+    for entry in entries:
+        roll_number = entry.roll_number.strip().upper()
+        grade = entry.grade.strip().upper()
+        if grade not in GRADE_POINTS:
+            raise _bad_request(f"Unknown grade {grade!r} for {roll_number}. Allowed: {', '.join(GRADE_POINTS)}")
+        if roll_number in grades:
+            raise _bad_request(f"Roll number {roll_number} appears more than once")
+        grades[roll_number] = grade
+    return grades
+
+
+def summarize(rows: Iterable[Tuple[Optional[str], int, Optional[int]]]) -> dict:
+    """Distribution, counts and GPA from (grade, enrollments, credits) rows grouped by grade"""
+    distribution = {grade: 0 for grade in GRADE_POINTS}
+    graded = ungraded = 0
+    points = credits = 0.0
+    for grade, count, credit_sum in rows:
+        if grade is None:
+            ungraded += count
+            continue
+        graded += count
+        distribution[grade] = distribution.get(grade, 0) + count
+        if grade in GRADE_POINTS and credit_sum:
+            points += GRADE_POINTS[grade] * credit_sum
+            credits += credit_sum
+    return {
+        "graded": graded,
+        "ungraded": ungraded,
+        "distribution": distribution,
+        "gpa": round(points / credits, 2) if credits else None
+    }
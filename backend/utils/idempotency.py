@@ -0,0 +1,164 @@
+"""Idempotency-Key support for retried POST requests
+
+A client that may retry a POST sends a unique ``Idempotency-Key`` header.
+The first request with a key runs normally and its response is kept for
+IDEMPOTENCY_TTL_SECONDS. A retry with the same key and the same request is
+answered from the store, with an ``Idempotent-Replayed: true`` header,
+without reaching the routers. A duplicate that arrives while the first is
+still running waits for it and gets the same response, so the handler runs
+once.
+
+Keys are scoped to the Authorization header and bound to a fingerprint of
+the method, path, query string and body. Reusing a key for a different
+request is rejected with 422. Server errors (5xx) and 429s are not stored,
+so those can be retried.
+
+The store is per worker process. A retry that lands on another worker runs
+again and is handled by the endpoint's own duplicate checks.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+from starlette.datastructures import Headers
+
+MAX_KEY_LENGTH = 255
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "expires_at", "done", "response")
+
+    def __init__(self, fingerprint: str, expires_at: float):
+        self.fingerprint = fingerprint
+        self.expires_at = expires_at
+        self.done = asyncio.Event()
+        # (status, headers, body) once stored; None while running or if not stored
+        self.response: Optional[Tuple[int, list, bytes]] = None
+
+
+class IdempotencyStore:
+    """Bounded, TTL-expiring map of scoped keys to responses"""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return entry
+
+    def start(self, key: str, fingerprint: str) -> _Entry:
+        """Register a request that is about to run"""
+        entry = _Entry(fingerprint, time.monotonic() + self.ttl_seconds)
+        self._entries[key] = entry
+        # Oldest first; in-flight entries are evicted too but still finish
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def discard(self, key: str, entry: _Entry) -> None:
+        if self._entries.get(key) is entry:
+            del self._entries[key]
+
+
+def _json_response(status_code: int, detail: str) -> Tuple[int, list, bytes]:
+    body = json.dumps({"detail": detail}).encode()
+    return status_code, [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())], body
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware honouring Idempotency-Key on POST requests under the given path prefixes"""
+
+    def __init__(self, app, store: IdempotencyStore, paths: Iterable[str] = ()):
+        self.app = app
+        self.store = store
+        self.paths = tuple(p.strip() for p in paths if p.strip())
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get("idempotency-key")
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await self._send(send, _json_response(400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"))
+            return
+
+        # The body is needed for the fingerprint, then replayed to the app
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return  # Client went away
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+
+        scope_hash = hashlib.sha256(headers.get("authorization", "").encode()).hexdigest()
+        store_key = f"{scope_hash}:{key}"
+        fingerprint = hashlib.sha256(
+            b"\0".join((scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body))
+        ).hexdigest()
+
+        entry = self.store.get(store_key)
+        if entry is not None:
+            if entry.fingerprint != fingerprint:
+                await self._send(send, _json_response(422, "Idempotency-Key was already used for a different request"))
+                return
+            # Coalesce with a duplicate that is still running
+            await entry.done.wait()
+            if entry.response is not None:
+                await self._send(send, entry.response, replayed=True)
+                return
+            # The first attempt was not stored (server error); run again below
+
+        entry = self.store.start(store_key, fingerprint)
+        start = None
+        parts = []
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def send_and_capture(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Copy before outer middleware (CORS, query counts) add their headers
+                start = {**message, "headers": list(message.get("headers", []))}
+            elif message["type"] == "http.response.body":
+                parts.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, send_and_capture)
+        finally:
+            status_code = start["status"] if start is not None else 500
+            if status_code < 500 and status_code != 429:
+                entry.response = (status_code, start["headers"], b"".join(parts))
+            else:
+                self.store.discard(store_key, entry)
+            entry.done.set()
+
+    @staticmethod
+    async def _send(send, response: Tuple[int, list, bytes], replayed: bool = False) -> None:
+        status_code, headers, body = response
+        if replayed:
+            headers = headers + [(b"idempotent-replayed", b"true")]
+        await send({"type": "http.response.start", "status": status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
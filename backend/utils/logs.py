@@ -0,0 +1,250 @@
+"""Logging that never blocks request handling
+
+``configure_logging`` puts a single queue handler on the root logger. Code
+logging from the event loop or a threadpool thread only appends the record
+to a bounded queue; a listener thread formats it (as one JSON object per
+line by default) and writes it to stderr. When the writer falls behind and
+LOG_QUEUE_SIZE records are waiting, new records are dropped and counted
+rather than waited for; the next record written carries the count.
+
+Messages are only interpolated for records that pass the level check and
+sampling, and tracebacks are formatted on the listener thread, so log calls
+should use %-style arguments (``logger.warning("Bad token: %s", e)``)
+rather than f-strings.
+
+Repeated warnings (same logger and message template, e.g. a flood of
+invalid tokens) are sampled: at most LOG_SAMPLE_BURST per
+LOG_SAMPLE_WINDOW_SECONDS get through, and the first one after a quiet
+spell reports how many were suppressed.
+
+``RequestIdMiddleware`` gives each request an id (the client's
+``X-Request-ID`` or a new one), returns it in the response header and adds
+it to every record logged while handling the request.
+"""
+
+import copy
+import json
+import logging
+import multiprocessing.util
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Hashable, Optional, Tuple
+
+from config import (
+    LOG_FORMAT,
+    LOG_LEVEL,
+    LOG_QUEUE_SIZE,
+    LOG_SAMPLE_BURST,
+    LOG_SAMPLE_WINDOW_SECONDS
+)
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Longest client-supplied X-Request-ID kept; longer ones are replaced
+MAX_REQUEST_ID_LENGTH = 128
+
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+_handler: Optional["BoundedQueueHandler"] = None
+_listener: Optional[QueueListener] = None
+
+
+class BoundedQueueHandler(QueueHandler):
+    """Queue handler that drops records instead of waiting when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        # Only touched in emit(), which runs under the handler lock
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike QueueHandler.prepare, leave exc_info for the listener to format
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.request_id = request_id.get()
+        if self.dropped:
+            record.dropped = self.dropped
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        else:
+            self.dropped = 0
+
+
+class SampleRepeats(logging.Filter):
+    """Let through at most ``burst`` records per message template and window
+
+    Only records of exactly ``level`` are sampled; errors always get through.
+    """
+
+    # Templates tracked before the table is cleared (guards against f-string messages)
+    MAX_TEMPLATES = 1024
+
+    def __init__(self, burst: int, window_seconds: float, level: int = logging.WARNING):
+        super().__init__()
+        self.burst = burst
+        self.window_seconds = window_seconds
+        self.level = level
+        self._lock = threading.Lock()
+        # (logger, template) -> (window start, records let through, records suppressed)
+        self._seen: Dict[Tuple[str, Hashable], Tuple[float, int, int]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != self.level or self.burst <= 0:
+            return True
+        key = (record.name, record.msg if isinstance(record.msg, str) else type(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            started, passed, suppressed = self._seen.get(key, (now, 0, 0))
+            if now - started >= self.window_seconds:
+                started, passed = now, 0
+            if passed >= self.burst:
+                self._seen[key] = (started, passed, suppressed + 1)
+                return False
+            if len(self._seen) >= self.MAX_TEMPLATES and key not in self._seen:
+                self._seen.clear()
+            self._seen[key] = (started, passed + 1, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for name in ("request_id", "suppressed", "dropped"):
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _TextFormatter(logging.Formatter):
+    """TEXT_FORMAT with the request id, sampling and drop counts appended"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        notes = [
+            f"{name}={getattr(record, name)}"
+            for name in ("request_id", "suppressed", "dropped")
+            if getattr(record, name, None) is not None
+        ]
+        return f"{line} [{' '.join(notes)}]" if notes else line
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Wait for room: the queue may be full when stopping
+        self.queue.put(self._sentinel)
+
+
+def _start_listener() -> None:
+    global _listener
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else _TextFormatter(TEXT_FORMAT))
+    _handler.queue = queue.Queue(LOG_QUEUE_SIZE)
+    _listener = _Listener(_handler.queue, output)
+    _listener.start()
+
+
+def _stop_at_exit(*_) -> None:
+    # Runs at interpreter exit and also when a multiprocessing child (server
+    # or job worker) leaves through os._exit, which skips atexit
+    multiprocessing.util.Finalize(None, stop_logging, exitpriority=0)
+
+
+def _restart_in_child() -> None:
+    """A forked process (job workers) has the queue handler but not the listener thread"""
+    if _handler is not None:
+        _start_listener()
+
+
+def stop_logging() -> None:
+    """Write out queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_logging() -> None:
+    """Route all logging through the queue (once per process)"""
+    global _handler
+    if _handler is not None:
+        return
+    _handler = BoundedQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    _handler.addFilter(SampleRepeats(LOG_SAMPLE_BURST, LOG_SAMPLE_WINDOW_SECONDS))
+    _start_listener()
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(getattr(logging, LOG_LEVEL.upper(), logging.INFO))
+    # uvicorn's loggers write through the queue too (serve.py passes log_config=None)
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        logger = logging.getLogger(name)
+        logger.handlers = []
+        logger.propagate = True
+
+    _stop_at_exit()
+    os.register_at_fork(after_in_child=_restart_in_child)
+    # multiprocessing clears the exit callbacks of a new child
+    multiprocessing.util.register_after_fork(_handler, _stop_at_exit)
+
+
+class RequestIdMiddleware:
+    """ASGI middleware tagging each request and its log records with an id"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        value = None
+        for name, header in scope.get("headers", ()):
+            if name == b"x-request-id":
+                value = header.decode("latin-1").strip()
+                break
+        if not value or len(value) > MAX_REQUEST_ID_LENGTH or not value.isprintable():
+            value = uuid.uuid4().hex
+        token = request_id.set(value)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", value.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id.reset(token)
@@ -0,0 +1,62 @@
+"""Per-request SQL statement counting
+
+When enabled (QUERY_COUNT_HEADER), every response carries an
+``X-DB-Queries`` header with the number of statements the request ran.
+The load-testing harness uses it to report queries per endpoint.
+"""
+
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class _Counter:
+    __slots__ = ("count",)
+
+    def __init__(self):
+        self.count = 0
+
+
+# A mutable counter, so statements run in threadpool copies of the request's
+# context are still counted against the request
+_current: ContextVar[Optional[_Counter]] = ContextVar("query_counter", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = _current.get()
+    if counter is not None:
+        counter.count += 1
+
+
+def install(engine: Engine) -> None:
+    """Start counting statements executed on this engine"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+class QueryCountMiddleware:
+    """ASGI middleware adding the X-DB-Queries response header"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counter = _Counter()
+        token = _current.set(counter)
+
+        async def send_with_count(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(counter.count).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_count)
+        finally:
+            _current.reset(token)
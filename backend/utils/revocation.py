@@ -0,0 +1,153 @@
+"""Revocation list for logged-out tokens
+
+Revoked token ids (``jti``) are persisted in the ``revoked_tokens`` table and
+mirrored in memory. Lookups go through a Bloom filter first, so a token that
+was never revoked is rejected by a few bit probes without touching the
+exact set or the database.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import RevokedToken
+from config import REVOCATION_BLOOM_CAPACITY, REVOCATION_BLOOM_ERROR_RATE, REVOCATION_SYNC_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Rows are re-read this far behind the newest revoked_at seen, so revocations
+# committed slightly out of order by other workers are not missed.
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+def _utcnow() -> datetime:
+    """Current UTC time as a naive datetime (as stored in DateTime columns)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> List[int]:
+        # Double hashing: derive all probe positions from one 128-bit digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class RevocationStore:
+    """In-memory view of the revoked_tokens table"""
+
+    def __init__(self, capacity: int, error_rate: float, sync_seconds: int):
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._sync_seconds = sync_seconds
+        self._lock = threading.Lock()
+        self._revoked: Dict[str, float] = {}  # jti -> expiry (epoch seconds)
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._watermark: Optional[datetime] = None
+        self._synced_at = 0.0
+
+    def _rebuild(self) -> None:
+        """Rebuild the Bloom filter from the exact set (caller holds the lock)"""
+        while len(self._revoked) > self._capacity:
+            self._capacity *= 2
+        bloom = BloomFilter(self._capacity, self._error_rate)
+        for jti in self._revoked:
+            bloom.add(jti)
+        self._bloom = bloom
+
+    def _remember(self, rows) -> None:
+        """Add (jti, expires_at, revoked_at) rows to the exact set and filter"""
+        with self._lock:
+            for jti, expires_at, revoked_at in rows:
+                self._revoked[jti] = expires_at.replace(tzinfo=timezone.utc).timestamp()
+                self._bloom.add(jti)
+                if self._watermark is None or revoked_at > self._watermark:
+                    self._watermark = revoked_at
+            if len(self._revoked) > self._capacity:
+                self._rebuild()
+
+    def _purge_expired(self) -> None:
+        """Drop entries whose tokens have expired anyway"""
+        now = time.time()
+        with self._lock:
+            expired = [jti for jti, exp in self._revoked.items() if exp <= now]
+            if expired:
+                for jti in expired:
+                    del self._revoked[jti]
+                self._rebuild()
+
+    def load(self, db: Session) -> None:
+        """Rebuild the store from the database, deleting expired rows"""
+        db.query(RevokedToken).filter(RevokedToken.expires_at <= _utcnow()).delete(synchronize_session=False)
+        db.commit()
+
+        rows = db.query(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at).all()
+        with self._lock:
+            self._revoked = {}
+            self._watermark = None
+            self._rebuild()
+        self._remember(rows)
+        self._synced_at = time.monotonic()
+        logger.info("Loaded %d revoked tokens", len(rows))
+
+    def sync(self, db: Session) -> None:
+        """Pick up revocations made by other workers since the last sync"""
+        if time.monotonic() - self._synced_at < self._sync_seconds:
+            return
+        self._synced_at = time.monotonic()
+
+        query = db.query(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at)
+        if self._watermark is not None:
+            query = query.filter(RevokedToken.revoked_at >= self._watermark - SYNC_OVERLAP)
+        self._remember(query.all())
+        self._purge_expired()
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        """Check whether a token id has been revoked"""
+        if not jti or jti not in self._bloom:
+            return False
+        exp = self._revoked.get(jti)
+        return exp is not None and exp > time.time()
+
+    def revoke(self, db: Session, jti: str, exp: int) -> None:
+        """Persist a revocation and apply it locally"""
+        expires_at = datetime.fromtimestamp(exp, timezone.utc).replace(tzinfo=None)
+        revoked_at = _utcnow()
+        try:
+            db.add(RevokedToken(jti=jti, expires_at=expires_at, revoked_at=revoked_at))
+            db.commit()
+        except IntegrityError:
+            # Already revoked (e.g. repeated logout)
+            db.rollback()
+        self._remember([(jti, expires_at, revoked_at)])
+
+
+revocation_store = RevocationStore(
+    REVOCATION_BLOOM_CAPACITY,
+    REVOCATION_BLOOM_ERROR_RATE,
+    REVOCATION_SYNC_SECONDS
+)
@@ -0,0 +1,85 @@
+"""Course seats and waitlists
+
+``courses.seats_taken`` counts the enrolled students of a course. A seat is
+taken with a single conditional UPDATE (``seats_taken < capacity``), so
+concurrent enrollments in the last seats cannot oversubscribe the course,
+and nothing counts enrollment rows or locks more than the course row
+between that UPDATE and the commit. Enrollments that get no seat are
+waitlisted; when a seat is released the oldest waitlisted enrollment takes
+it in the same transaction.
+
+Everything that removes an enrolled student (dropping the enrollment,
+deleting the student) releases their seats with ``release_seats`` before
+committing.
+"""
+
+from typing import Dict, List
+
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import Session
+
+from models import Course, Enrollment, utc_now
+
+
+def _set_seats_taken(query, value) -> int:
+    """UPDATE seats_taken of the matched courses
+
+    Keeps updated_at (the course's ETag): seats changing hands is not an
+    edit of the course.
+    """
+    return query.update({"seats_taken": value, "updated_at": Course.updated_at}, synchronize_session=False)
+
+
+def take_seat(db: Session, course_id: int) -> bool:
+    """Take a seat in the course; False if it is full or does not exist"""
+    return _set_seats_taken(db.query(Course).filter(
+        Course.id == course_id,
+        or_(Course.capacity.is_(None), Course.seats_taken < Course.capacity)
+    ), Course.seats_taken + 1) == 1
+
+
+def enrolled_counts(db: Session, *criteria) -> Dict[int, int]:
+    """Seats held per course by the enrollments matching criteria"""
+    return dict(
+        db.query(Enrollment.course_id, func.count(Enrollment.id))
+        .filter(Enrollment.status == "enrolled", *criteria)
+        .group_by(Enrollment.course_id)
+        .all()
+    )
+
+
+def release_seats(db: Session, counts: Dict[int, int]) -> Dict[int, List[Enrollment]]:
+    """Give back seats per course and fill them from the waitlists
+
+    Returns the enrollments promoted from each course's waitlist.
+    """
+    promoted = {}
+    for course_id, count in sorted(counts.items()):
+        _set_seats_taken(
+            db.query(Course).filter(Course.id == course_id),
+            case((Course.seats_taken > count, Course.seats_taken - count), else_=0)
+        )
+        promoted[course_id] = promote_waitlisted(db, course_id)
+    return promoted
+
+
+def promote_waitlisted(db: Session, course_id: int) -> List[Enrollment]:
+    """Enroll the oldest waitlisted students for as long as the course has free seats"""
+    promoted = []
+    while take_seat(db, course_id):
+        waiting = (
+            db.query(Enrollment)
+            .filter(Enrollment.course_id == course_id, Enrollment.status == "waitlisted")
+            .order_by(Enrollment.id)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if waiting is None:
+            # Nobody to promote; give the seat back
+            _set_seats_taken(db.query(Course).filter(Course.id == course_id), Course.seats_taken - 1)
+            break
+        waiting.status = "enrolled"
+        waiting.updated_at = utc_now()
+        promoted.append(waiting)
+    db.flush()
+    return promoted
@@ -0,0 +1,139 @@
+"""Request coalescing for hot read endpoints
+
+When many users open the dashboard at once, each request would run the same
+queries. A GET endpoint decorated with ``@singleflight("name")`` runs once per
+distinct set of arguments at a time: requests arriving while an identical one
+is in flight wait for it and return its result (or raise its error) instead
+of querying the database themselves. Nothing is kept after the computation
+finishes, so no request sees a result older than its own arrival.
+
+Requests are identical when they have the same endpoint, the same query and
+path parameters and the same caller role. The role stands in for the caller,
+so only decorate endpoints whose response depends on nothing else about the
+user. The result is handed to several requests, so it must be plain data
+that nobody modifies (response models, dicts), never a ``Response``: an
+endpoint that needs one decorates a helper returning the data and builds
+its own ``Response`` from it (called with keyword arguments, which form the key).
+
+Decorated endpoints and helpers must be plain ``def``: FastAPI runs them in its
+threadpool, where waiting for the leading request does not block the event
+loop. A waiting request does hold one of the threadpool's threads (40 by
+default, shared by every sync endpoint and dependency), so a burst of
+identical requests can briefly take most of them while the first one runs.
+Waiting is bounded: a request that has waited REQUEST_COALESCING_WAIT_SECONDS
+runs the computation itself, so a stuck computation does not hold its
+waiters' threads indefinitely. Coalescing is per worker process.
+"""
+
+import functools
+import threading
+from concurrent.futures import Future, TimeoutError
+from typing import Callable, Dict, Hashable, Tuple
+
+from config import REQUEST_COALESCING, REQUEST_COALESCING_WAIT_SECONDS
+from . import AuthenticatedUser
+
+
+class _Counters:
+    __slots__ = ("requests", "executions", "coalesced", "errors", "timeouts")
+
+    def __init__(self):
+        self.requests = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.timeouts = 0
+
+
+class SingleFlight:
+    """In-flight computations by key, shared by the requests that ask for them"""
+
+    def __init__(self, enabled: bool = True, wait_seconds: float = 10):
+        self.enabled = enabled
+        self.wait_seconds = wait_seconds
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._counters: Dict[str, _Counters] = {}
+
+    def __call__(self, name: str) -> Callable:
+        """Decorator coalescing concurrent identical calls of an endpoint"""
+        def decorator(func: Callable) -> Callable:
+            with self._lock:
+                self._counters.setdefault(name, _Counters())
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                return self.do((name, _request_key(kwargs)), lambda: func(*args, **kwargs))
+            return wrapper
+        return decorator
+
+    def do(self, key: Tuple[str, Hashable], compute: Callable):
+        """Result of compute(), shared with concurrent calls for the same key"""
+        counters = self._counters[key[0]]
+        with self._lock:
+            counters.requests += 1
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                counters.executions += 1
+            else:
+                counters.coalesced += 1
+        if not leader:
+            try:
+                return future.result(timeout=self.wait_seconds)
+            except TimeoutError:
+                # Still running; stop waiting for it and compute separately
+                with self._lock:
+                    counters.timeouts += 1
+                return compute()
+
+        try:
+            result = compute()
+        except BaseException as e:
+            with self._lock:
+                counters.errors += 1
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._in_flight[key]
+        future.set_result(result)
+        return result
+
+    def stats(self) -> dict:
+        """Requests, executions and coalesced requests per endpoint in this worker"""
+        with self._lock:
+            in_flight: Dict[str, int] = {}
+            for name, _ in self._in_flight:
+                in_flight[name] = in_flight.get(name, 0) + 1
+            return {
+                name: {
+                    "requests": c.requests,
+                    "executions": c.executions,
+                    "coalesced": c.coalesced,
+                    "errors": c.errors,
+                    "timeouts": c.timeouts,
+                    "in_flight": in_flight.get(name, 0)
+                }
+                for name, c in sorted(self._counters.items())
+            }
+
+
+def _request_key(kwargs: dict) -> Hashable:
+    """Endpoint arguments that identify a request: plain values and the caller's role
+
+    Sessions, requests and other injected objects are left out.
+    """
+    key = []
+    for name, value in sorted(kwargs.items()):
+        if isinstance(value, AuthenticatedUser):
+            key.append((name, "role", value.role))
+        elif value is None or isinstance(value, (str, int, float, bool)):
+            key.append((name, value))
+    return tuple(key)
+
+
+singleflight = SingleFlight(REQUEST_COALESCING, REQUEST_COALESCING_WAIT_SECONDS)
@@ -0,0 +1,48 @@
+"""In-process cache for aggregate (GET /stats) results
+
+Aggregates are expensive relative to how often their inputs change. Student,
+course and enrollment writes call ``stats_cache.invalidate()`` so this
+worker's next read is fresh; other workers see the change once their entry
+expires after STATS_CACHE_SECONDS.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from config import STATS_CACHE_SECONDS
+
+
+class TTLCache:
+    """Maps keys to values computed by a loader, each kept for ``ttl_seconds``"""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        # Bumped by invalidate() so a load that raced with a write is not stored
+        self._generation = 0
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Cached value for key, calling loader() on a miss or after expiry"""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        generation = self._generation
+        value = loader()
+        if self.ttl_seconds > 0:
+            with self._lock:
+                if generation == self._generation:
+                    self._entries[key] = (now + self.ttl_seconds, value)
+        return value
+
+    def invalidate(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._generation += 1
+            self._entries = {}
+
+
+stats_cache = TTLCache(STATS_CACHE_SECONDS)
@@ -0,0 +1,86 @@
+"""In-memory map of user token versions
+
+Every issued token carries the user's ``token_version`` as the ``ver`` claim.
+Deactivation, role changes and password resets bump the version, which makes
+all previously issued tokens stale. Authenticated requests compare the claim
+against this map instead of fetching the user row.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from models import User
+from config import TOKEN_VERSION_SYNC_SECONDS, TOKEN_VERSION_FULL_SYNC_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Rows are re-read this far behind the newest updated_at seen, so changes
+# committed slightly out of order by other workers are not missed.
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class TokenVersionMap:
+    """Cache of user id -> token_version, refreshed incrementally"""
+
+    def __init__(self, sync_seconds: int, full_sync_seconds: int):
+        self._sync_seconds = sync_seconds
+        self._full_sync_seconds = full_sync_seconds
+        self._lock = threading.Lock()
+        self._versions: Dict[int, int] = {}
+        self._watermark: Optional[datetime] = None
+        self._synced_at = 0.0
+        self._full_synced_at = time.monotonic()
+
+    def _sync(self, db: Session) -> None:
+        """Apply version changes made since the last sync"""
+        now = time.monotonic()
+        if now - self._synced_at < self._sync_seconds:
+            return
+        with self._lock:
+            if now - self._synced_at < self._sync_seconds:
+                return
+            self._synced_at = now
+
+            if now - self._full_synced_at >= self._full_sync_seconds:
+                # Entries are reloaded on demand; this also forgets deleted users
+                self._versions = {}
+                self._full_synced_at = now
+
+            query = db.query(User.id, User.token_version, User.updated_at)
+            if self._watermark is not None:
+                query = query.filter(User.updated_at >= self._watermark - SYNC_OVERLAP)
+            else:
+                self._watermark = db.query(User.updated_at).order_by(User.updated_at.desc()).limit(1).scalar()
+                return
+
+            for user_id, version, updated_at in query.all():
+                if user_id in self._versions:
+                    self._versions[user_id] = version
+                if updated_at is not None and updated_at > self._watermark:
+                    self._watermark = updated_at
+
+    def get(self, db: Session, user_id: int) -> Optional[int]:
+        """Current token version of a user, or None if the user does not exist"""
+        self._sync(db)
+        version = self._versions.get(user_id)
+        if version is None:
+            version = db.query(User.token_version).filter(User.id == user_id).scalar()
+            if version is not None:
+                self._versions[user_id] = version
+        return version
+
+    def set(self, user_id: int, version: int) -> None:
+        """Record a version bump made by this worker"""
+        self._versions[user_id] = version
+
+    def discard(self, user_id: int) -> None:
+        """Forget a deleted user"""
+        self._versions.pop(user_id, None)
+
+
+token_versions = TokenVersionMap(TOKEN_VERSION_SYNC_SECONDS, TOKEN_VERSION_FULL_SYNC_SECONDS)
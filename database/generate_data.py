@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generator for Student Management System
+Populates the database with production-sized data for load testing:
+
+    python database/generate_data.py --students 20000 --years 2 --seed 42
+
+Every student gets a linked user account (password "Password@123"), 3-6
+course enrollments and one attendance record per weekday. Attendance rows
+come to roughly students x 260 x years. Output is fully determined by the
+seed. Run it against an empty database, or pass --reset to drop and
+recreate all tables first.
+
+Rows are written with batched executemany inserts; on MySQL, attendance is
+bulk loaded with LOAD DATA LOCAL INFILE (the server needs local_infile=ON).
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import bcrypt
+from sqlalchemy import create_engine, func, select, text, update
+
+from config import DATABASE_URL
+from models import Base, User, Student, Course, Enrollment, Attendance
+
+PASSWORD = "Password@123"
+BATCH_SIZE = 10000
+# Attendance rows per LOAD DATA file
+LOAD_FILE_ROWS = 1000000
+
+# (department, share of students, course code prefix)
+DEPARTMENTS = [
+    ("Computer Science", 0.24, "CS"),
+    ("Information Technology", 0.18, "IT"),
+    ("Electronics", 0.14, "EC"),
+    ("Mechanical", 0.13, "ME"),
+    ("Civil", 0.10, "CE"),
+    ("Electrical", 0.10, "EE"),
+    ("Chemical", 0.06, "CH"),
+    ("Biotechnology", 0.05, "BT"),
+]
+YEARS_OF_STUDY = ["1st Year", "2nd Year", "3rd Year", "4th Year", "5th Year"]
+YEAR_WEIGHTS = [0.28, 0.26, 0.24, 0.20, 0.02]
+GRADES = ["A+", "A", "B+", "B", "C+", "C", "D", "F"]
+GRADE_WEIGHTS = [0.08, 0.17, 0.22, 0.20, 0.14, 0.10, 0.06, 0.03]
+COURSE_TOPICS = [
+    "Foundations", "Systems", "Design", "Analysis", "Laboratory", "Theory",
+    "Applications", "Methods", "Project", "Seminar", "Modelling", "Practice"
+]
+FIRST_NAMES = [
+    "Aarav", "Aditi", "Akash", "Amelia", "Ananya", "Arjun", "Chen", "Daniel",
+    "Diya", "Elena", "Fatima", "Gabriel", "Hana", "Ishaan", "Isabella", "James",
+    "Kavya", "Liam", "Maya", "Mohammed", "Nina", "Noah", "Olivia", "Priya",
+    "Rahul", "Riya", "Samuel", "Sara", "Sofia", "Tanvi", "Vikram", "Yusuf",
+]
+LAST_NAMES = [
+    "Ahmed", "Brown", "Chen", "Das", "Fernandes", "Garcia", "Gupta", "Iyer",
+    "Johnson", "Khan", "Kim", "Kumar", "Lee", "Martin", "Mehta", "Nair",
+    "Nguyen", "Patel", "Reddy", "Rodriguez", "Sharma", "Singh", "Smith", "Wang",
+]
+
+
+def hash_password(password: str) -> str:
+    """Low-cost bcrypt hash; computed once and shared by all generated users"""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=4)).decode('utf-8')
+
+
+def school_days(start: date, years: float):
+    """Weekdays from start for the given number of years"""
+    end = start + timedelta(days=int(365 * years))
+    day = start
+    while day < end:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+
+class Generator:
+    """Generates rows for each table with consecutive ids after existing rows"""
+
+    def __init__(self, engine, args):
+        self.engine = engine
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.start = date.fromisoformat(args.start_date)
+        self.created = datetime.combine(self.start, datetime.min.time()) - timedelta(days=30)
+        self.is_mysql = engine.dialect.name == "mysql"
+
+    def next_id(self, conn, model) -> int:
+        return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+    def insert(self, conn, model, rows) -> int:
+        """executemany in batches; returns the number of rows written"""
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.args.batch_size:
+                conn.execute(model.__table__.insert(), batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            conn.execute(model.__table__.insert(), batch)
+            count += len(batch)
+        return count
+
+    def name(self) -> str:
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def faculty(self, conn, count: int) -> list:
+        first_id = self.next_id(conn, User)
+        hashed = hash_password(PASSWORD)
+        rows = [{
+            "id": first_id + i,
+            "email": f"faculty{first_id + i}@example.edu",
+            "username": f"faculty{first_id + i}",
+            "hashed_password": hashed,
+            "full_name": self.name(),
+            "role": "faculty",
+            "is_active": True,
+            "token_version": 0,
+            "created_at": self.created,
+            "updated_at": self.created
+        } for i in range(count)]
+        self.insert(conn, User, rows)
+        return [row["id"] for row in rows]
+
+    def courses(self, conn, faculty_ids: list) -> dict:
+        """Courses per department, spread over the departments' faculty"""
+        first_id = self.next_id(conn, Course)
+        per_department = max(1, self.args.courses // len(DEPARTMENTS))
+        rows = []
+        for department, _, prefix in DEPARTMENTS:
+            for n in range(per_department):
+                rows.append({
+                    "id": first_id + len(rows),
+                    "course_code": f"{prefix}{101 + n}-{first_id + len(rows)}",
+                    "course_name": f"{department} {self.rng.choice(COURSE_TOPICS)} {n + 1}",
+                    "description": None,
+                    "credits": self.rng.choice([2, 3, 3, 3, 4, 4]),
+                    "department": department,
+                    "instructor_id": self.rng.choice(faculty_ids) if faculty_ids else None,
+                    "created_at": self.created,
+                    "updated_at": self.created
+                })
+        self.insert(conn, Course, rows)
+
+        by_department = {}
+        for row in rows:
+            by_department.setdefault(row["department"], []).append(row["id"])
+        return by_department
+
+    def students(self, conn, count: int) -> list:
+        """Student users and their linked student records; returns (student id, department)"""
+        user_id = self.next_id(conn, User)
+        student_id = self.next_id(conn, Student)
+        hashed = hash_password(PASSWORD)
+        departments = [d[0] for d in DEPARTMENTS]
+        weights = [d[1] for d in DEPARTMENTS]
+
+        users, students = [], []
+        for i in range(count):
+            name = self.name()
+            email = f"student{student_id + i}@example.edu"
+            users.append({
+                "id": user_id + i,
+                "email": email,
+                "username": f"student{student_id + i}",
+                "hashed_password": hashed,
+                "full_name": name,
+                "role": "student",
+                "is_active": self.rng.random() > 0.02,
+                "token_version": 0,
+                "created_at": self.created,
+                "updated_at": self.created
+            })
+            students.append({
+                "id": student_id + i,
+                "user_id": user_id + i,
+                "full_name": name,
+                "roll_number": f"R{student_id + i:08d}",
+                "email": email,
+                "phone_number": f"9{self.rng.randrange(10 ** 9):09d}",
+                "department": self.rng.choices(departments, weights)[0],
+                "year_of_study": self.rng.choices(YEARS_OF_STUDY, YEAR_WEIGHTS)[0],
+                "created_at": self.created,
+                "updated_at": self.created
+            })
+        self.insert(conn, User, users)
+        self.insert(conn, Student, students)
+        return [(row["id"], row["department"]) for row in students]
+
+    def enrollments(self, conn, students: list, courses: dict) -> int:
+        """3-6 courses per student, mostly from their own department"""
+        all_courses = [course_id for ids in courses.values() for course_id in ids]
+        enrolled_at = datetime.combine(self.start, datetime.min.time())
+
+        def rows():
+            next_id = self.next_id(conn, Enrollment)
+            for student_id, department in students:
+                chosen = set()
+                for _ in range(self.rng.randint(3, 6)):
+                    pool = courses[department] if self.rng.random() < 0.8 else all_courses
+                    chosen.add(self.rng.choice(pool))
+                for course_id in sorted(chosen):
+                    graded = self.rng.random() < 0.6
+                    yield {
+                        "id": next_id,
+                        "student_id": student_id,
+                        "course_id": course_id,
+                        "enrolled_at": enrolled_at,
+                        "grade": self.rng.choices(GRADES, GRADE_WEIGHTS)[0] if graded else None
+                    }
+                    next_id += 1
+
+        count = self.insert(conn, Enrollment, rows())
+        # Generated courses have no capacity, but their seat counters are kept
+        conn.execute(
+            update(Course)
+            .where(Course.id.in_(all_courses))
+            .values(seats_taken=select(func.count(Enrollment.id)).where(Enrollment.course_id == Course.id).scalar_subquery())
+        )
+        return count
+
+    def attendance_rows(self, students: list, first_id: int):
+        """(id, student_id, date, status) for every student and school day
+
+        Each student has their own absence rate (mean about 8%, long tail),
+        so dashboards see a realistic spread rather than a uniform one.
+        """
+        rates = {student_id: min(0.6, self.rng.betavariate(1.5, 17)) for student_id, _ in students}
+        row_id = first_id
+        for day in school_days(self.start, self.args.years):
+            marked_at = datetime.combine(day, datetime.min.time()).replace(hour=9)
+            for student_id, _ in students:
+                roll = self.rng.random()
+                absent = rates[student_id]
+                if roll < absent:
+                    status = "Absent"
+                elif roll < absent + 0.04:
+                    status = "Late"
+                elif roll < absent + 0.05:
+                    status = "Excused"
+                else:
+                    status = "Present"
+                yield row_id, student_id, marked_at, status
+                row_id += 1
+
+    def attendance(self, conn, students: list) -> int:
+        rows = self.attendance_rows(students, self.next_id(conn, Attendance))
+        if self.is_mysql and self.args.bulk_load != "off":
+            try:
+                return self.load_attendance(conn, rows)
+            except Exception as e:
+                if self.args.bulk_load == "on":
+                    raise
+                print(f"LOAD DATA LOCAL INFILE unavailable ({e}); using batched inserts")
+                conn.rollback()
+                rows = self.attendance_rows(students, self.next_id(conn, Attendance))
+
+        return self.insert(conn, Attendance, (
+            {"id": row_id, "student_id": student_id, "date": marked_at, "status": status, "remarks": None}
+            for row_id, student_id, marked_at, status in rows
+        ))
+
+    def load_attendance(self, conn, rows) -> int:
+        """Bulk load attendance through tab-separated temp files"""
+        count = 0
+        done = False
+        while not done:
+            with tempfile.NamedTemporaryFile("w", suffix=".tsv", delete=False) as f:
+                path = f.name
+                written = 0
+                for row_id, student_id, marked_at, status in rows:
+                    f.write(f"{row_id}\t{student_id}\t{marked_at:%Y-%m-%d %H:%M:%S}\t{status}\n")
+                    written += 1
+                    if written >= LOAD_FILE_ROWS:
+                        break
+                else:
+                    done = True
+            try:
+                if written:
+                    conn.execute(text(
+                        "LOAD DATA LOCAL INFILE :path INTO TABLE attendance "
+                        "FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' "
+                        "(id, student_id, date, status)"
+                    ), {"path": path})
+                    count += written
+                    print(f"  {count} attendance rows loaded")
+            finally:
+                os.unlink(path)
+        return count
+
+    def run(self) -> None:
+        with self.engine.begin() as conn:
+            if self.is_mysql:
+                # Constraints are known to hold for generated rows
+                conn.execute(text("SET foreign_key_checks = 0"))
+                conn.execute(text("SET unique_checks = 0"))
+
+            started = time.perf_counter()
+            faculty_ids = self.faculty(conn, self.args.faculty)
+            courses = self.courses(conn, faculty_ids)
+            students = self.students(conn, self.args.students)
+            print(f"Created {len(faculty_ids)} faculty, {sum(map(len, courses.values()))} courses, "
+                  f"{len(students)} students ({time.perf_counter() - started:.1f}s)")
+
+            enrollments = self.enrollments(conn, students, courses)
+            print(f"Created {enrollments} enrollments ({time.perf_counter() - started:.1f}s)")
+
+            attendance = self.attendance(conn, students)
+            print(f"Created {attendance} attendance records ({time.perf_counter() - started:.1f}s)")
+
+            if self.is_mysql:
+                conn.execute(text("SET unique_checks = 1"))
+                conn.execute(text("SET foreign_key_checks = 1"))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate synthetic data for load testing")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--courses", type=int, default=80, help="split evenly across departments")
+    parser.add_argument("--faculty", type=int, default=40)
+    parser.add_argument("--years", type=float, default=1.0, help="years of daily attendance")
+    parser.add_argument("--start-date", default="2023-08-01", help="first attendance day (YYYY-MM-DD)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--bulk-load", choices=["auto", "on", "off"], default="auto",
+                        help="use LOAD DATA LOCAL INFILE on MySQL")
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    args = parser.parse_args()
+
+    connect_args = {"local_infile": True} if args.database_url.startswith("mysql") else {}
+    engine = create_engine(args.database_url, connect_args=connect_args)
+
+    if args.reset:
+        print("Dropping and recreating tables...")
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    try:
+        Generator(engine, args).run()
+    except Exception as e:
+        print(f"Error generating data: {e}")
+        return 1
+    finally:
+        engine.dispose()
+
+    print("Data generation completed successfully!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
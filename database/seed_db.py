@@ -4,7 +4,7 @@ Database seed script for Student Management System
 Run this script to create the database, tables, and an admin user
 """
 
-import sysh
+import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -0,0 +1,56 @@
+import { API_BASE_URL } from './config.js';
+import { getAuthHeaders } from './auth.js';
+
+// Live updates from GET /events (Server-Sent Events).
+// handlers maps event names ('attendance', 'dashboard', 'resync', ...) to
+// callbacks taking the parsed data. Returns a function closing the stream.
+export function subscribe(channels, handlers) {
+    let source = null;
+    let closed = false;
+    let retryDelay = 5000;
+
+    const retry = () => {
+        setTimeout(open, retryDelay);
+        retryDelay = Math.min(retryDelay * 2, 60000);
+    };
+
+    // The stream is opened with a short-lived ticket rather than the access
+    // token, which would end up in access logs
+    const open = async () => {
+        if (closed || !localStorage.getItem('access_token')) return;
+
+        let ticket;
+        try {
+            const response = await fetch(`${API_BASE_URL}/events/ticket`, {
+                method: 'POST',
+                headers: getAuthHeaders()
+            });
+            if (!response.ok) throw response;
+            ({ ticket } = await response.json());
+        } catch (error) {
+            retry();
+            return;
+        }
+        if (closed) return;
+
+        const query = new URLSearchParams({ channels: channels.join(','), ticket });
+        source = new EventSource(`${API_BASE_URL}/events?${query}`);
+        source.onopen = () => { retryDelay = 5000; };
+        Object.entries(handlers).forEach(([event, handler]) => {
+            source.addEventListener(event, e => handler(JSON.parse(e.data)));
+        });
+        source.onerror = () => {
+            // The browser reconnects dropped streams itself; once it gives up
+            // (e.g. the ticket expired or the session ended) reopen with a new ticket
+            if (source.readyState === EventSource.CLOSED) {
+                retry();
+            }
+        };
+    };
+
+    open();
+    return () => {
+        closed = true;
+        if (source) source.close();
+    };
+}
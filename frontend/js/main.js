@@ -5,7 +5,8 @@ import {
     saveTokens,
     saveUser,
     clearAuthData,
-    getCurrentUser
+    getCurrentUser,
+    getAuthHeaders
 } from './auth.js';
 import { API_BASE_URL } from './config.js';
 import { showMessage, clearErrors, escapeHtml } from './utils.js';
@@ -93,6 +94,7 @@ function showDashboard() {
 
     // Load Dashboard Data
     DashboardModule.loadDashboardStats();
+    DashboardModule.startDashboardUpdates();
     DashboardModule.renderCalendar();
 
     // Default view
@@ -100,6 +102,14 @@ function showDashboard() {
 }
 
 function logout() {
+    // Revoke both tokens server-side; the UI does not wait for the result
+    fetch(`${API_BASE_URL}/auth/logout`, {
+        method: 'POST',
+        headers: getAuthHeaders(),
+        body: JSON.stringify({ refresh_token: localStorage.getItem('refresh_token') })
+    }).catch(() => {});
+    DashboardModule.stopDashboardUpdates();
+    AttendanceModule.stopAttendanceUpdates();
     clearAuthData();
     showMessage('Logged out successfully', 'info');
     showLogin();
@@ -299,6 +309,7 @@ document.addEventListener('DOMContentLoaded', () => {
             course_name: fd.get('course_name'),
             description: fd.get('description'),
             credits: parseInt(fd.get('credits')),
+            capacity: fd.get('capacity') ? parseInt(fd.get('capacity')) : null,
             department: fd.get('department')
         };
         await CourseModule.createCourse(data);
@@ -2,6 +2,8 @@
 import { API_BASE_URL } from '../config.js';
 import { getAuthHeaders } from '../auth.js';
 import { showMessage, escapeHtml } from '../utils.js';
+import { subscribe } from '../events.js';
+import { fetchMyOverview } from './dashboard.js';
 
 // DOM Elements - Admin/Faculty
 const attendanceTableBody = document.getElementById('attendanceTableBody');
@@ -14,8 +16,43 @@ const myPresentDays = document.getElementById('myPresentDays');
 const myAbsentDays = document.getElementById('myAbsentDays');
 const myAttendancePercent = document.getElementById('myAttendancePercent');
 
+// GET /attendance is paginated; follow X-Next-Cursor until all pages are loaded
+async function fetchAttendance(params = {}) {
+    const records = [];
+    let cursor = null;
+    do {
+        const query = new URLSearchParams({ ...params, limit: 1000 });
+        if (cursor) query.set('cursor', cursor);
+        const response = await fetch(`${API_BASE_URL}/attendance?${query}`, { headers: getAuthHeaders() });
+        if (!response.ok) throw response;
+        records.push(...await response.json());
+        cursor = response.headers.get('X-Next-Cursor');
+    } while (cursor);
+    return records;
+}
+
 // --- Admin/Faculty Attendance ---
 
+// Live updates for the sheet's date (marks made by other users)
+let sheetDate = null;
+let stopSheetStream = null;
+
+export function stopAttendanceUpdates() {
+    if (stopSheetStream) stopSheetStream();
+    stopSheetStream = null;
+    sheetDate = null;
+}
+
+function watchAttendanceDate(date) {
+    if (date === sheetDate && stopSheetStream) return;
+    stopAttendanceUpdates();
+    sheetDate = date;
+    stopSheetStream = subscribe([`date:${date}`], {
+        attendance: record => updateStatusBadge(record.student_id, record.status),
+        resync: loadAttendance
+    });
+}
+
 export async function loadAttendance() {
     if (!attendanceTableBody) return;
     attendanceLoading.style.display = 'block';
@@ -25,16 +62,16 @@ export async function loadAttendance() {
 
     try {
         // Parallel fetch: Students + Attendance for date
-        const [studentsRes, attendanceRes] = await Promise.all([
-            fetch(`${API_BASE_URL}/students`, { headers: getAuthHeaders() }),
-            fetch(`${API_BASE_URL}/attendance?date=${date}`, { headers: getAuthHeaders() })
+        const [studentsRes, attendanceRecords] = await Promise.all([
+            fetch(`${API_BASE_URL}/students?fields=id,full_name,roll_number`, { headers: getAuthHeaders() }),
+            fetchAttendance({ date }).catch(() => [])
         ]);
 
         if (studentsRes.ok) {
             const students = await studentsRes.json();
-            const attendanceParams = attendanceRes.ok ? await attendanceRes.json() : [];
 
-            displayAttendanceTable(students, attendanceParams);
+            displayAttendanceTable(students, attendanceRecords);
+            watchAttendanceDate(date);
         } else {
             showMessage('Failed to load student list for attendance', 'error');
         }
@@ -56,19 +93,12 @@ function displayAttendanceTable(students, attendanceRecords) {
     attendanceRecords.forEach(r => statusMap[r.student_id] = r.status);
 
     students.forEach(student => {
-        const currentStatus = statusMap[student.id]; // undefined if not marked
-        const isPresent = currentStatus === 'Present';
-        const isAbsent = currentStatus === 'Absent';
-
         const row = document.createElement('tr');
+        row.dataset.studentId = student.id;
         row.innerHTML = `
             <td>${student.roll_number}</td>
             <td>${student.full_name}</td>
-            <td>
-                <span class="badge ${isPresent ? 'badge-success' : (isAbsent ? 'badge-danger' : 'badge-warning')}">
-                    ${currentStatus || 'Not Marked'}
-                </span>
-            </td>
+            <td>${statusBadge(statusMap[student.id])}</td>
             <td>
                 <button class="action-btn" onclick="window.markStudent(${student.id}, 'Present')" title="Mark Present" style="color: var(--success-color);">
                     <i class="fa-solid fa-check"></i>
@@ -82,6 +112,16 @@ function displayAttendanceTable(students, attendanceRecords) {
     });
 }
 
+function statusBadge(status) {
+    const badgeClass = status === 'Present' ? 'badge-success' : (status === 'Absent' ? 'badge-danger' : 'badge-warning');
+    return `<span class="badge ${badgeClass}">${escapeHtml(status || 'Not Marked')}</span>`;
+}
+
+function updateStatusBadge(studentId, status) {
+    const row = attendanceTableBody && attendanceTableBody.querySelector(`tr[data-student-id="${studentId}"]`);
+    if (row) row.cells[2].innerHTML = statusBadge(status);
+}
+
 export async function markStudent(studentId, status) {
     try {
         const response = await fetch(`${API_BASE_URL}/attendance`, {
@@ -95,9 +135,9 @@ export async function markStudent(studentId, status) {
         });
 
         if (response.ok) {
-            // refresh table to show new status
+            const record = await response.json();
             showMessage('Attendance marked!', 'success');
-            loadAttendance(); // Simple full reload, or optimization: update DOM row
+            updateStatusBadge(record.student_id, record.status);
         } else {
             showMessage('Failed to mark attendance', 'error');
         }
@@ -124,36 +164,21 @@ export async function loadMyAttendance() {
             return;
         }
 
-        // Get current student's attendance by user_id - backend will convert to student_id
-        console.log(`Fetching attendance for user_id: ${user.id}`);
-        const response = await fetch(`${API_BASE_URL}/attendance?user_id=${user.id}`, { 
-            headers: getAuthHeaders() 
-        });
-
-        console.log('Response status:', response.status);
-
-        if (!response.ok) {
+        // Totals and the latest records come with the overview
+        let summary, records;
+        try {
+            ({ attendance: summary, recent_attendance: records } = await fetchMyOverview());
+        } catch (response) {
+            if (!(response instanceof Response)) throw response;
             const errorData = await response.json();
             console.error('API Error:', errorData);
             showMessage(`Error loading attendance: ${response.status}`, 'error');
             myAttendanceTableBody.innerHTML = '<tr><td colspan="3">Failed to load attendance records</td></tr>';
             return;
         }
-
-        const records = await response.json();
         console.log('Attendance records:', records);
 
-        // Calculate stats
-        let present = 0, absent = 0, late = 0, excused = 0;
-        records.forEach(r => {
-            if (r.status === 'Present') present++;
-            else if (r.status === 'Absent') absent++;
-            else if (r.status === 'Late') late++;
-            else if (r.status === 'Excused') excused++;
-        });
-
-        const total = present + absent + late + excused;
-        const percent = total > 0 ? Math.round((present / total) * 100) : 0;
+        const { present, absent, percent } = summary;
 
         // Update statistics
         if (myPresentDays) myPresentDays.textContent = present;
@@ -170,10 +195,8 @@ export async function loadMyAttendance() {
         if (!records || records.length === 0) {
             myAttendanceTableBody.innerHTML = '<tr><td colspan="3" style="text-align: center;">No attendance records found</td></tr>';
         } else {
-            // Sort by date (newest first)
-            const sortedRecords = records.sort((a, b) => new Date(b.date) - new Date(a.date));
-            
-            sortedRecords.slice(0, 30).forEach(record => {
+            // Newest first, as returned
+            records.forEach(record => {
                 const row = document.createElement('tr');
                 const date = new Date(record.date);
                 const dateStr = date.toLocaleDateString('en-IN', { 
@@ -198,7 +221,7 @@ export async function loadMyAttendance() {
                 myAttendanceTableBody.appendChild(row);
             });
             
-            console.log(`Displayed ${Math.min(sortedRecords.length, 30)} attendance records`);
+            console.log(`Displayed ${records.length} attendance records`);
         }
         
     } catch (error) {
@@ -47,6 +47,7 @@ function displayCourses(courses) {
             <td>${escapeHtml(course.course_code)}</td>
             <td>${escapeHtml(course.course_name)}</td>
             <td>${course.credits}</td>
+            <td>${course.capacity ? `${course.seats_taken} / ${course.capacity}` : course.seats_taken}</td>
             <td>${escapeHtml(course.department)}</td>
              <td>
                 ${user && (user.role === 'admin' || (user.role === 'faculty' && course.instructor_id === user.id)) ?
@@ -2,6 +2,7 @@
 import { API_BASE_URL } from '../config.js';
 import { getAuthHeaders, getCurrentUser, saveUser } from '../auth.js';
 import { showMessage, escapeHtml } from '../utils.js';
+import { subscribe } from '../events.js';
 
 // Elements
 const statStudentsPresent = document.querySelector('.stat-card:nth-child(1) .stat-value');
@@ -10,6 +11,27 @@ const statFeesCollected = document.querySelector('.stat-card:nth-child(3) .stat-
 const statStaffAlerts = document.querySelector('.stat-card:nth-child(4) .stat-value');
 const chartContainer = document.querySelector('.section-card:nth-child(3) div');
 
+let dashboardStats = null;
+let stopDashboardStream = null;
+
+// GET /me/overview: the signed-in student's profile, enrollments and
+// attendance in one request, shared by the views opened within OVERVIEW_MAX_AGE_MS
+const OVERVIEW_MAX_AGE_MS = 30000;
+let overview = null;
+let overviewFetchedAt = 0;
+
+export function fetchMyOverview({ refresh = false } = {}) {
+    if (refresh || !overview || Date.now() - overviewFetchedAt > OVERVIEW_MAX_AGE_MS) {
+        overviewFetchedAt = Date.now();
+        overview = fetch(`${API_BASE_URL}/me/overview`, { headers: getAuthHeaders() }).then(response => {
+            if (!response.ok) throw response;
+            return response.json();
+        });
+        overview.catch(() => { overview = null; });
+    }
+    return overview;
+}
+
 export async function loadDashboardStats() {
     try {
         const response = await fetch(`${API_BASE_URL}/dashboard/stats`, { 
@@ -17,22 +39,47 @@ export async function loadDashboardStats() {
         });
 
         if (response.ok) {
-            const data = await response.json();
-
-            // Update Stats Wrapper
-            if (statStudentsPresent) statStudentsPresent.textContent = data.students_present;
-            if (statEmployeesPresent) statEmployeesPresent.textContent = data.employees_present;
-            if (statFeesCollected) statFeesCollected.textContent = `₹${data.fees_collected.toLocaleString('en-IN')}`;
-            if (statStaffAlerts) statStaffAlerts.textContent = data.staff_alerts;
-
-            // Render Chart
-            renderAttendanceChart(data.students_present, data.total_students);
+            dashboardStats = await response.json();
+            renderDashboardStats();
         }
     } catch (error) {
         console.error('Error loading stats:', error);
     }
 }
 
+function renderDashboardStats() {
+    const data = dashboardStats;
+
+    // Update Stats Wrapper
+    if (statStudentsPresent) statStudentsPresent.textContent = data.students_present;
+    if (statEmployeesPresent) statEmployeesPresent.textContent = data.employees_present;
+    if (statFeesCollected) statFeesCollected.textContent = `₹${data.fees_collected.toLocaleString('en-IN')}`;
+    if (statStaffAlerts) statStaffAlerts.textContent = data.staff_alerts;
+
+    // Render Chart
+    renderAttendanceChart(data.students_present, data.total_students);
+}
+
+// Keep the stats current from count deltas instead of refetching them
+export function startDashboardUpdates() {
+    stopDashboardUpdates();
+    stopDashboardStream = subscribe(['dashboard'], {
+        dashboard: delta => {
+            if (!dashboardStats) return;
+            dashboardStats.students_present += delta.present || 0;
+            dashboardStats.total_students += delta.students || 0;
+            dashboardStats.total_courses += delta.courses || 0;
+            renderDashboardStats();
+        },
+        resync: loadDashboardStats
+    });
+}
+
+export function stopDashboardUpdates() {
+    if (stopDashboardStream) stopDashboardStream();
+    stopDashboardStream = null;
+}
+
 let attendanceChart = null;
 
 function renderAttendanceChart(present, total) { 
@@ -2,6 +2,7 @@
 import { API_BASE_URL } from '../config.js';
 import { getAuthHeaders, getCurrentUser } from '../auth.js';
 import { showMessage, escapeHtml } from '../utils.js';
+import { fetchMyOverview } from './dashboard.js';
 
 // DOM Elements
 const enrollmentsTableBody = document.getElementById('enrollmentsTableBody');
@@ -49,9 +50,10 @@ function displayEnrollments(enrollments) {
             <td>${escapeHtml(enrollment.course_name || 'Unknown')}</td>
             <td>${new Date(enrollment.enrolled_at).toLocaleDateString()}</td>
             <td>
+                ${enrollment.status === 'waitlisted' ? '<span class="badge badge-secondary">Waitlisted</span>' : `
                 <span class="badge ${enrollment.grade ? 'badge-success' : 'badge-secondary'}">
                     ${enrollment.grade || 'Not Graded'}
-                </span>
+                </span>`}
             </td>
             <td>
                 ${user && user.role === 'admin' ?
@@ -67,8 +69,8 @@ function displayEnrollments(enrollments) {
 export async function loadEnrollmentSelects() {
     try {
         const [studentsRes, coursesRes] = await Promise.all([
-            fetch(`${API_BASE_URL}/students`, { headers: getAuthHeaders() }),
-            fetch(`${API_BASE_URL}/courses`, { headers: getAuthHeaders() })
+            fetch(`${API_BASE_URL}/students?fields=id,full_name,roll_number`, { headers: getAuthHeaders() }),
+            fetch(`${API_BASE_URL}/courses?fields=id,course_code,course_name`, { headers: getAuthHeaders() })
         ]);
 
         if (studentsRes.ok) {
@@ -160,32 +162,30 @@ export async function loadMyCourses() {
             return;
         }
 
-        // Fetch only courses the student is enrolled in
-        const response = await fetch(`${API_BASE_URL}/enrollments/student/${user.id}/courses`, { headers: getAuthHeaders() });
-        const enrollments = await response.json();
+        // The student's enrollments come with the overview
+        const { enrollments } = await fetchMyOverview();
 
-        if (response.ok) {
-            if (enrollments.length === 0) {
-                myCoursesEmpty.style.display = 'block';
-            } else {
-                enrollments.forEach(enrollment => {
-                    const card = document.createElement('div');
-                    card.className = 'stat-card';
-                    card.style.cursor = 'pointer';
-                    card.innerHTML = `
-                        <div class="stat-header">
-                            <span>${escapeHtml(enrollment.course_name || 'Unknown Course')}</span>
-                            <span class="badge ${enrollment.grade ? 'badge-success' : 'badge-secondary'}">
-                                ${enrollment.grade || 'Not Graded'}
-                            </span>
-                        </div>
-                        <p style="color: var(--text-secondary); font-size: 0.9rem; margin: 0.5rem 0;">
-                            Enrolled: ${new Date(enrollment.enrolled_at).toLocaleDateString()}
-                        </p>
-                    `;
-                    myCoursesGrid.appendChild(card);
-                });
-            }
+        if (enrollments.length === 0) {
+            myCoursesEmpty.style.display = 'block';
+        } else {
+            enrollments.forEach(enrollment => {
+                const card = document.createElement('div');
+                card.className = 'stat-card';
+                card.style.cursor = 'pointer';
+                card.innerHTML = `
+                    <div class="stat-header">
+                        <span>${escapeHtml(enrollment.course_name || 'Unknown Course')}</span>
+                        ${enrollment.status === 'waitlisted' ? '<span class="badge badge-secondary">Waitlisted</span>' : `
+                        <span class="badge ${enrollment.grade ? 'badge-success' : 'badge-secondary'}">
+                            ${enrollment.grade || 'Not Graded'}
+                        </span>`}
+                    </div>
+                    <p style="color: var(--text-secondary); font-size: 0.9rem; margin: 0.5rem 0;">
+                        Enrolled: ${new Date(enrollment.enrolled_at).toLocaleDateString()}
+                    </p>
+                `;
+                myCoursesGrid.appendChild(card);
+            });
         }
     } catch (error) {
         console.error('Error loading courses:', error);
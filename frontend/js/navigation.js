@@ -2,7 +2,7 @@
 import { loadStudents } from './modules/students.js';
 import { loadCourses } from './modules/courses.js';
 import { loadEmployees } from './modules/employees.js';
-import { loadAttendance, loadMyAttendance } from './modules/attendance.js';
+import { loadAttendance, loadMyAttendance, stopAttendanceUpdates } from './modules/attendance.js';
 import { loadEnrollments, loadMyCourses } from './modules/enrollments.js';
 import { loadDashboardStats, renderCalendar, loadFees, loadProfileData } from './modules/dashboard.js';
 import { getCurrentUser } from './auth.js';
@@ -51,6 +51,7 @@ export function hideAllViews() {
         viewProfile, viewFees, viewReports, viewSettings, viewHelp,
         viewComingSoon, viewEnrollments, viewMyCourses, viewMyAttendance];
     allViews.forEach(v => { if (v) v.style.display = 'none'; });
+    stopAttendanceUpdates();
 
     // Reset active nav state
     document.querySelectorAll('.nav-item').forEach(btn => btn.classList.remove('active'));
@@ -0,0 +1,42 @@
+import { readdirSync, readFileSync, statSync, writeFileSync } from 'node:fs';
+import { join, extname } from 'node:path';
+import { brotliCompressSync, gzipSync, constants } from 'node:zlib';
+
+const COMPRESSIBLE = new Set(['.html', '.js', '.css', '.json', '.svg', '.txt']);
+
+function* walk(dir) {
+    for (const name of readdirSync(dir)) {
+        const path = join(dir, name);
+        if (statSync(path).isDirectory()) {
+            yield* walk(path);
+        } else {
+            yield path;
+        }
+    }
+}
+
+/**
+ * Writes .br and .gz next to every compressible build output, so the API
+ * (FRONTEND_DIST_DIR) can serve them without compressing per request.
+ */
+export default function precompress({ minSize = 1024 } = {}) {
+    let outDir;
+    return {
+        name: 'precompress',
+        apply: 'build',
+        configResolved(config) {
+            outDir = join(config.root, config.build.outDir);
+        },
+        closeBundle() {
+            for (const path of walk(outDir)) {
+                if (!COMPRESSIBLE.has(extname(path))) continue;
+                const content = readFileSync(path);
+                if (content.length < minSize) continue;
+                writeFileSync(`${path}.gz`, gzipSync(content, { level: 9 }));
+                writeFileSync(`${path}.br`, brotliCompressSync(content, {
+                    params: { [constants.BROTLI_PARAM_QUALITY]: 11 }
+                }));
+            }
+        }
+    };
+}
@@ -1,6 +1,8 @@
 import { defineConfig } from 'vite';
+import precompress from './precompress.js';
 
 export default defineConfig({
+    plugins: [precompress()],
     server: {
         port: 3000,
         proxy: {
@@ -10,7 +12,9 @@ export default defineConfig({
             '/attendance': 'http://127.0.0.1:8005',
             '/dashboard': 'http://127.0.0.1:8005',
             '/users': 'http://127.0.0.1:8005',
-            '/enrollments': 'http://127.0.0.1:8005'
+            '/enrollments': 'http://127.0.0.1:8005',
+            '/events': 'http://127.0.0.1:8005',
+            '^/me/': 'http://127.0.0.1:8005'
         }
     }
 });